@@ -1,10 +1,18 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 import httpx
-from app.core.config import settings
+from app.core.cache import AsyncTTLCache
+from app.core.cities import get_city_index
+from app.core.config import get_settings
+from app.core.http_client import get_http_client
+from app.core.metrics import CACHE_REQUESTS, register_collector
 
 router = APIRouter()
 
+# 城市ID几乎不变，缓存时间长；实时天气只缓存几分钟
+_location_cache = AsyncTTLCache(get_settings().WEATHER_LOCATION_TTL, get_settings().WEATHER_CACHE_SIZE)
+_weather_cache = AsyncTTLCache(get_settings().WEATHER_NOW_TTL, get_settings().WEATHER_CACHE_SIZE)
+
 class WeatherResponse(BaseModel):
     city: str
     temperature: float
@@ -12,72 +20,146 @@ class WeatherResponse(BaseModel):
     humidity: int
     windSpeed: float
 
+async def _request_qweather(path: str, params: dict) -> dict:
+    """通过共用客户端请求和风天气API，返回码不是200时抛出HTTPException"""
+    settings = get_settings()
+    response = await get_http_client().get(
+        f"{settings.QWEATHER_API_HOST}{path}",
+        params={**params, "key": settings.QWEATHER_API_KEY}
+    )
+    response.raise_for_status()
+    data = response.json()
+
+    if data["code"] != "200":
+        raise HTTPException(status_code=400, detail=f"和风天气API错误: {data['code']}")
+    return data
+
+async def lookup_location(city: str) -> dict:
+    """
+    查询城市ID
+    优先从本地城市索引解析，未收录的城市再请求远程API，
+    远程结果按城市名缓存，同一城市的并发查询只请求一次上游
+    """
+    local = get_city_index().resolve(city)
+    if local is not None:
+        return {
+            "locationId": local.location_id,
+            "city": local.name
+        }
+
+    async def load():
+        # 使用城市搜索API
+        data = await _request_qweather("/geo/v2/city/lookup", {
+            "location": city,
+            "range": "cn",  # 限定在中国范围内搜索
+            "number": 1     # 只返回第一个匹配结果
+        })
+        if not data.get("location"):
+            raise HTTPException(status_code=404, detail=f"未找到城市: {city}")
+
+        location = data["location"][0]
+        return {
+            "locationId": location["id"],
+            "city": location["name"]
+        }
+
+    return await _location_cache.get_or_load(city.strip(), load)
+
+async def fetch_current_weather(location: str) -> dict:
+    """查询实时天气，结果按城市ID缓存"""
+    async def load():
+        data = await _request_qweather("/v7/weather/now", {
+            "location": location,
+            "lang": "zh"  # 使用中文
+        })
+        weather_data = data["now"]
+        return {
+            "temperature": float(weather_data["temp"]),
+            "description": weather_data["text"],
+            "humidity": int(weather_data["humidity"]),
+            "windSpeed": float(weather_data["windSpeed"])
+        }
+
+    return await _weather_cache.get_or_load(location, load)
+
+def cache_stats() -> dict:
+    """天气缓存的命中统计"""
+    return {"location": _location_cache.stats, "weather": _weather_cache.stats}
+
+def _cache_samples() -> dict:
+    """供/metrics输出的缓存命中计数"""
+    samples = {}
+    for name, cache in (("weather_location", _location_cache), ("weather_now", _weather_cache)):
+        samples[(name, "hit")] = cache.hits
+        samples[(name, "miss")] = cache.misses
+        samples[(name, "coalesced")] = cache.coalesced
+    return samples
+
+register_collector(CACHE_REQUESTS, _cache_samples)
+
 @router.get("/weather/location")
 async def get_location(city: str):
     """
     获取城市ID
     """
     try:
-        async with httpx.AsyncClient() as client:
-            # 使用城市搜索API
-            response = await client.get(
-                "https://pd7p3ymyfp.re.qweatherapi.com/geo/v2/city/lookup",
-                params={
-                    "location": city,
-                    "key": settings.QWEATHER_API_KEY,
-                    "range": "cn",  # 限定在中国范围内搜索
-                    "number": 1     # 只返回第一个匹配结果
-                }
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            if data["code"] != "200":
-                raise HTTPException(status_code=400, detail=f"和风天气API错误: {data['code']}")
-
-            if not data.get("location"):
-                raise HTTPException(status_code=404, detail=f"未找到城市: {city}")
-
-            location = data["location"][0]
-            return {
-                "locationId": location["id"],
-                "city": location["name"]
-            }
+        return await lookup_location(city)
+    except HTTPException:
+        raise
     except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"请求和风天气API失败: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取城市信息失败: {str(e)}")
 
+@router.get("/weather/cities")
+async def suggest_cities(q: str, limit: int = Query(10, ge=1, le=50)):
+    """
+    按中文名或拼音前缀提示城市
+    """
+    return [
+        {
+            "locationId": city.location_id,
+            "city": city.name,
+            "adm1": city.adm1,
+            "adm2": city.adm2,
+            "adcode": city.adcode
+        }
+        for city in get_city_index().prefix(q, limit)
+    ]
+
+@router.get("/weather/city", response_model=WeatherResponse)
+async def get_city_weather(city: str):
+    """
+    按城市名获取当前天气，城市ID在本地解析，只需一次上游请求
+    """
+    try:
+        location = await lookup_location(city)
+        weather = await fetch_current_weather(location["locationId"])
+        return {
+            "city": location["city"],
+            **weather
+        }
+    except HTTPException:
+        raise
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=500, detail=f"请求和风天气API失败: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取天气信息失败: {str(e)}")
+
 @router.get("/weather/current")
 async def get_current_weather(location: str, city_name: str):
     """
     获取指定城市的当前天气
     """
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://pd7p3ymyfp.re.qweatherapi.com/v7/weather/now",
-                params={
-                    "location": location,
-                    "key": settings.QWEATHER_API_KEY,
-                    "lang": "zh"  # 使用中文
-                }
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            if data["code"] != "200":
-                raise HTTPException(status_code=400, detail=f"和风天气API错误: {data['code']}")
-
-            weather_data = data["now"]
-            return {
-                "city": city_name,  # 使用传入的城市名称
-                "temperature": float(weather_data["temp"]),
-                "description": weather_data["text"],
-                "humidity": int(weather_data["humidity"]),
-                "windSpeed": float(weather_data["windSpeed"])
-            }
+        weather = await fetch_current_weather(location)
+        return {
+            "city": city_name,  # 使用传入的城市名称
+            **weather
+        }
+    except HTTPException:
+        raise
     except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"请求和风天气API失败: {str(e)}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取天气信息失败: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"获取天气信息失败: {str(e)}")
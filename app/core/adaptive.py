@@ -0,0 +1,49 @@
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Optional
+
+# 榜单变化程度高于该值时缩短间隔，低于QUIET_VOLATILITY时延长间隔
+BUSY_VOLATILITY = 0.2
+QUIET_VOLATILITY = 0.05
+# 每次调整的倍数：变化剧烈时减半，平稳时延长一半
+SHRINK_FACTOR = 0.5
+GROW_FACTOR = 1.5
+
+BUDGET_WINDOW = timedelta(hours=1)
+
+class AdaptiveInterval:
+    """
+    单个来源的自适应抓取间隔
+    根据每次抓取观测到的榜单变化程度在[min, max]之间乘性调整间隔，
+    并按滑动一小时窗口限制请求次数，预算用完时推迟到窗口内最早的请求过期之后
+    """
+
+    def __init__(self, initial: float, minimum: float, maximum: float, hourly_budget: Optional[int] = None):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.interval = min(max(initial, minimum), maximum)
+        self.hourly_budget = hourly_budget
+        self._requests: Deque[datetime] = deque()
+
+    def record_request(self, at: datetime):
+        """记录一次对上游的请求，用于预算统计"""
+        self._requests.append(at)
+
+    def observe(self, volatility: float) -> float:
+        """根据本次的变化程度调整间隔（分钟），返回新的间隔"""
+        if volatility >= BUSY_VOLATILITY:
+            self.interval = max(self.minimum, self.interval * SHRINK_FACTOR)
+        elif volatility <= QUIET_VOLATILITY:
+            self.interval = min(self.maximum, self.interval * GROW_FACTOR)
+        return self.interval
+
+    def next_run(self, now: datetime) -> datetime:
+        """下一次抓取时间：按当前间隔，且不超过每小时预算"""
+        next_run = now + timedelta(minutes=self.interval)
+        while self._requests and self._requests[0] <= now - BUDGET_WINDOW:
+            self._requests.popleft()
+        if self.hourly_budget and len(self._requests) >= self.hourly_budget:
+            # 窗口内第(len - budget + 1)早的请求过期后才有余量
+            oldest = self._requests[len(self._requests) - self.hourly_budget]
+            next_run = max(next_run, oldest + BUDGET_WINDOW)
+        return next_run
@@ -0,0 +1,81 @@
+"""
+热榜页面归档
+
+每次解析的页面按内容的SHA-256存为gzip文件（objects/ab/abcdef....html.gz），
+内容相同的页面只存一份；抓取时间、来源和哈希记录在archived_pages表中。
+页面结构变化导致解析结果变少时，可以用python -m app.reparse重新解析归档的页面并补写历史。
+"""
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.models.archived_page import ArchivedPage
+
+logger = logging.getLogger(__name__)
+
+class PageArchive:
+    """按内容哈希寻址的页面存储"""
+
+    def __init__(self, root: str, compresslevel: int = 6):
+        self.root = root
+        self.compresslevel = compresslevel
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.html.gz")
+
+    def put(self, data: bytes) -> str:
+        """保存UTF-8编码的页面，返回内容哈希；相同内容已存在时不重复写入"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            return digest
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # 先写临时文件再替换，读取方不会读到写了一半的文件
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(gzip.compress(data, compresslevel=self.compresslevel))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return digest
+
+    def get(self, digest: str) -> str:
+        with open(self.object_path(digest), "rb") as f:
+            return gzip.decompress(f.read()).decode("utf-8")
+
+def get_archive() -> Optional[PageArchive]:
+    """未配置ARCHIVE_DIR时不归档"""
+    root = get_settings().ARCHIVE_DIR
+    return PageArchive(root) if root else None
+
+def archive_page(source: str, html: str) -> Optional[int]:
+    """
+    归档一个页面并记录索引，返回archived_pages中的ID
+    归档失败只记录日志，不影响本次抓取
+    """
+    archive = get_archive()
+    if archive is None:
+        return None
+    fetched_at = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        data = html.encode("utf-8")
+        page = ArchivedPage(source=source, fetched_at=fetched_at, digest=archive.put(data), size=len(data))
+        db.add(page)
+        db.commit()
+        return page.id
+    except Exception as e:
+        db.rollback()
+        logger.error(f"归档{source}页面失败：{str(e)}")
+        return None
+    finally:
+        db.close()
@@ -0,0 +1,126 @@
+from typing import Dict, Iterable, List
+
+# 热度变化条目中携带的字段
+HEAT_FIELDS = ("heat", "hot_value", "heat_label")
+
+# 入库时保存的新上榜话题字段
+NEW_TOPIC_FIELDS = ("topic_key", "title", "url", "source", "rank", "global_rank") + HEAT_FIELDS
+
+def _diff(previous: List[dict], current: List[dict]) -> Dict[str, list]:
+    """
+    按topic_key比较相邻两个批次的话题，返回变化集合
+    - new: 新上榜的话题，携带完整字段
+    - dropped: 下榜话题的topic_key
+    - moved: 排名变化的话题 {topic_key, source, rank, previous_rank, global_rank}
+    - heat: 热度变化的话题 {topic_key, heat, hot_value, heat_label}
+    """
+    previous_by_key = {topic["topic_key"]: topic for topic in previous}
+    current_keys = set()
+    new, moved, heat = [], [], []
+    for topic in current:
+        key = topic["topic_key"]
+        current_keys.add(key)
+        before = previous_by_key.get(key)
+        if before is None:
+            new.append(topic)
+            continue
+        if before["rank"] != topic["rank"] or before.get("global_rank") != topic.get("global_rank"):
+            moved.append({
+                "topic_key": key,
+                "source": topic["source"],
+                "rank": topic["rank"],
+                "previous_rank": before["rank"],
+                "global_rank": topic.get("global_rank"),
+            })
+        if any(before.get(name) != topic.get(name) for name in HEAT_FIELDS):
+            heat.append({"topic_key": key, **{name: topic.get(name) for name in HEAT_FIELDS}})
+
+    dropped = [key for key in previous_by_key if key not in current_keys]
+    return {"new": new, "dropped": dropped, "moved": moved, "heat": heat}
+
+def compact_changes(previous: List[dict], current: List[dict]) -> Dict[str, list]:
+    """
+    相邻两个批次的变化集合，入库保存，/hot-topics/changes和SSE推送都使用这一格式
+    - new: 新上榜的话题，只保留NEW_TOPIC_FIELDS中展示需要的字段
+    - dropped: 下榜的话题及下榜前的排名 {topic_key, previous_rank}，合并时用于还原重新上榜话题的排名变化
+    - moved: 排名变化的话题 {topic_key, source, rank, previous_rank, global_rank}
+    - heat: 热度变化的话题 {topic_key, heat, hot_value, heat_label}
+    """
+    changes = _diff(previous, current)
+    previous_ranks = {topic["topic_key"]: topic["rank"] for topic in previous}
+    changes["new"] = [{name: topic.get(name) for name in NEW_TOPIC_FIELDS} for topic in changes["new"]]
+    changes["dropped"] = [{"topic_key": key, "previous_rank": previous_ranks[key]} for key in changes["dropped"]]
+    return changes
+
+def merge_changes(change_sets: Iterable[Dict[str, list]]) -> Dict[str, list]:
+    """
+    按批次顺序合并多个compact_changes的结果，得到从起始批次到最新批次的净变化
+    区间内上榜又下榜的话题不出现；起始时在榜、中途下榜又重新上榜的话题按排名变化处理
+    """
+    new: Dict[int, dict] = {}
+    dropped: Dict[int, dict] = {}
+    moved: Dict[int, dict] = {}
+    heat: Dict[int, dict] = {}
+    for changes in change_sets:
+        # 同一个变化集合中各类条目的topic_key互不重复，按此顺序处理即可
+        for item in changes["dropped"]:
+            key = item["topic_key"]
+            heat.pop(key, None)
+            if new.pop(key, None) is not None:
+                continue
+            before = moved.pop(key, None)
+            dropped[key] = {"topic_key": key, "previous_rank": (before or item)["previous_rank"]}
+        for topic in changes["new"]:
+            key = topic["topic_key"]
+            gone = dropped.pop(key, None)
+            if gone is None:
+                new[key] = topic
+                continue
+            moved[key] = {
+                "topic_key": key,
+                "source": topic["source"],
+                "rank": topic["rank"],
+                "previous_rank": gone["previous_rank"],
+                "global_rank": topic.get("global_rank"),
+            }
+            heat[key] = {"topic_key": key, **{name: topic.get(name) for name in HEAT_FIELDS}}
+        for item in changes["moved"]:
+            key = item["topic_key"]
+            if key in new:
+                new[key] = {**new[key], "rank": item["rank"], "global_rank": item.get("global_rank")}
+            else:
+                moved[key] = {**item, "previous_rank": moved.get(key, item)["previous_rank"]}
+        for item in changes["heat"]:
+            key = item["topic_key"]
+            if key in new:
+                new[key] = {**new[key], **item}
+            else:
+                heat[key] = item
+    return {
+        "new": list(new.values()),
+        "dropped": list(dropped.values()),
+        "moved": list(moved.values()),
+        "heat": list(heat.values()),
+    }
+
+def is_empty(changes: Dict[str, list]) -> bool:
+    """变化集合是否为空"""
+    return not any(changes.values())
+
+def ranking_volatility(previous: List[dict], current: List[dict], depth: int = 20) -> float:
+    """
+    衡量同一来源相邻两次抓取前depth名的变化程度，取值0~1
+    新上榜计1，排名变化按变动名次计入（变动5名及以上计1），再对前depth名取平均
+    """
+    top = [topic for topic in current if topic["rank"] <= depth]
+    if not top:
+        return 0.0
+    previous_ranks = {topic["topic_key"]: topic["rank"] for topic in previous}
+    total = 0.0
+    for topic in top:
+        before = previous_ranks.get(topic["topic_key"])
+        if before is None:
+            total += 1
+        else:
+            total += min(abs(before - topic["rank"]) / 5, 1)
+    return total / len(top)
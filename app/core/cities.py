@@ -0,0 +1,139 @@
+import csv
+import logging
+import unicodedata
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# 随应用发布的城市表，可通过CITY_INDEX_PATH换成和风天气完整的China-City-List
+DEFAULT_CITY_FILE = Path(__file__).resolve().parent.parent / "data" / "cities.csv"
+
+# 和风天气LocationList的列名 -> 本地城市表的列名
+_QWEATHER_COLUMNS = {
+    "Location_ID": "location_id",
+    "Location_Name_ZH": "name",
+    "Location_Name_EN": "pinyin",
+    "Adm1_Name_ZH": "adm1",
+    "Adm2_Name_ZH": "adm2",
+    "AD_code": "adcode",
+}
+
+@dataclass(frozen=True)
+class City:
+    location_id: str
+    name: str
+    pinyin: str
+    adm1: str
+    adm2: str
+    adcode: str
+
+def normalize_city_name(text: str) -> str:
+    """城市名归一化：全半角统一、去空白、英文小写，去掉末尾的"市"字"""
+    text = unicodedata.normalize("NFKC", text or "").replace(" ", "").strip().lower()
+    if len(text) > 2 and text.endswith("市"):
+        text = text[:-1]
+    return text
+
+def read_city_rows(path: Path) -> Iterator[dict]:
+    """
+    读取城市表，支持本地格式和和风天气LocationList格式
+    LocationList的第一行是版本说明，从第二行开始才是表头
+    """
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        lines = iter(f)
+        first = next(lines, "")
+        if "location_id" not in first.lower():
+            first = next(lines, "")
+        reader = csv.DictReader(lines, fieldnames=next(csv.reader([first])))
+        for row in reader:
+            if "Location_ID" in row:
+                row = {target: row.get(source, "") for source, target in _QWEATHER_COLUMNS.items()}
+            if row.get("location_id") and row.get("name"):
+                yield row
+
+class CityIndex:
+    """
+    城市名/拼音到和风天气LocationID的本地索引
+    所有查询键（中文名、拼音）排序后存在一个列表中，与之平行的array保存城市下标，
+    精确查询和前缀匹配都通过二分查找完成。同名城市按城市表中的先后顺序优先
+    """
+
+    def __init__(self, cities: List[City]):
+        self.cities = cities
+        entries = sorted(
+            (key, row)
+            for row, city in enumerate(cities)
+            for key in {normalize_city_name(city.name), city.pinyin.lower()}
+            if key
+        )
+        self._keys = [key for key, _ in entries]
+        self._rows = array("I", (row for _, row in entries))
+        self._by_adcode: Dict[str, int] = {}
+        for row, city in enumerate(cities):
+            if city.adcode:
+                self._by_adcode.setdefault(city.adcode, row)
+
+    def __len__(self) -> int:
+        return len(self.cities)
+
+    def resolve(self, text: str) -> Optional[City]:
+        """按中文名、拼音或adcode精确查找城市，找不到时返回None"""
+        text = (text or "").strip()
+        if text.isdigit():
+            row = self._by_adcode.get(text)
+            return self.cities[row] if row is not None else None
+
+        key = normalize_city_name(text)
+        index = bisect_left(self._keys, key)
+        best = None
+        while index < len(self._keys) and self._keys[index] == key:
+            row = self._rows[index]
+            best = row if best is None else min(best, row)
+            index += 1
+        return self.cities[best] if best is not None else None
+
+    def prefix(self, text: str, limit: int = 10) -> List[City]:
+        """前缀匹配，用于输入提示"""
+        key = normalize_city_name(text)
+        if not key:
+            return []
+        rows = set()
+        index = bisect_left(self._keys, key)
+        while index < len(self._keys) and self._keys[index].startswith(key):
+            rows.add(self._rows[index])
+            index += 1
+        return [self.cities[row] for row in sorted(rows)[:limit]]
+
+def load_city_index(path: Path) -> CityIndex:
+    """从城市表文件构建索引"""
+    cities = [
+        City(
+            location_id=row["location_id"].strip(),
+            name=row["name"].strip(),
+            pinyin=(row.get("pinyin") or "").strip(),
+            adm1=(row.get("adm1") or "").strip(),
+            adm2=(row.get("adm2") or "").strip(),
+            adcode=(row.get("adcode") or "").strip(),
+        )
+        for row in read_city_rows(path)
+    ]
+    return CityIndex(cities)
+
+@lru_cache()
+def get_city_index() -> CityIndex:
+    """获取城市索引，首次调用时加载，文件缺失或损坏时返回空索引，查询全部回落到远程API"""
+    path = Path(get_settings().CITY_INDEX_PATH or DEFAULT_CITY_FILE)
+    try:
+        index = load_city_index(path)
+    except (OSError, csv.Error, KeyError) as e:
+        logger.error(f"加载城市表失败：{str(e)}")
+        return CityIndex([])
+    logger.info(f"城市索引已加载，城市数：{len(index)}")
+    return index
@@ -1,12 +1,113 @@
+import itertools
+import logging
+import time
+from typing import Any, AsyncGenerator, Dict, List, Optional
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import get_settings
+from app.core.metrics import DB_POOL_CHECKOUT_SECONDS, DB_READ_SESSIONS
+
+logger = logging.getLogger(__name__)
+
+# 同步驱动到异步驱动的映射
+ASYNC_DRIVERS = {
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
 
 settings = get_settings()
-engine = create_engine(settings.DATABASE_URL)
+
+def to_async_url(url: str) -> str:
+    """将同步数据库URL转换为对应的异步驱动URL"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+class TimedQueuePool(QueuePool):
+    """记录取得连接的等待耗时，连接池耗尽时该耗时会明显上升"""
+    engine_label = "sync"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start, self.engine_label)
+
+class TimedAsyncQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    engine_label = "async"
+
+class TimedReplicaPool(TimedAsyncQueuePool):
+    engine_label = "replica"
+
+def engine_options(url: str, is_async: bool = False, replica: bool = False) -> Dict[str, Any]:
+    """连接池参数，SQLite不使用连接池大小相关配置"""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    if replica:
+        poolclass = TimedReplicaPool
+    else:
+        poolclass = TimedAsyncQueuePool if is_async else TimedQueuePool
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+# 同步引擎，供调度器等后台任务使用
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 异步引擎，供API路由使用，查询期间不阻塞事件循环
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or to_async_url(settings.DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, is_async=True))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+class ReplicaSet:
+    """
+    只读副本：轮流分配，连接失败的副本暂停使用一段时间，到期后再次尝试
+    """
+
+    def __init__(self, urls: List[str], retry_interval: float):
+        self.urls = urls
+        self.engines: List[AsyncEngine] = []
+        for url in urls:
+            async_url = to_async_url(url)
+            self.engines.append(create_async_engine(async_url, **engine_options(async_url, is_async=True, replica=True)))
+        self.retry_interval = retry_interval
+        self._retry_at = [0.0] * len(urls)
+        self._counter = itertools.count()
+
+    def choose(self) -> Optional[int]:
+        """按轮询顺序返回下一个可用副本的序号，全部不可用时返回None"""
+        now = time.monotonic()
+        for _ in range(len(self.engines)):
+            index = next(self._counter) % len(self.engines)
+            if self._retry_at[index] <= now:
+                return index
+        return None
+
+    def mark_failed(self, index: int, error: Exception):
+        self._retry_at[index] = time.monotonic() + self.retry_interval
+        url = make_url(self.urls[index]).render_as_string(hide_password=True)
+        logger.warning(f"只读副本{url}不可用，{self.retry_interval}秒内改用其他副本或主库：{str(error)}")
+
+# 只读副本，供接口的只读查询使用；写入和后台任务始终使用主库
+read_replicas = ReplicaSet(settings.DATABASE_REPLICA_URLS, settings.DB_REPLICA_RETRY_INTERVAL)
+
+# 请求头中带上该值为primary时只读主库，用于必须读到刚写入数据的场景
+READ_CONSISTENCY_HEADER = "X-Read-Consistency"
+
 Base = declarative_base()
 
 def get_db():
@@ -14,4 +115,59 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def open_read_session(require_primary: bool = False) -> AsyncSession:
+    """
+    打开只读会话：优先使用副本，取连接失败时换下一个副本，副本都不可用时回退到主库
+    副本会话的info["replica"]为True
+    """
+    if require_primary or not read_replicas.engines:
+        DB_READ_SESSIONS.inc("primary")
+        return AsyncSessionLocal()
+    while (index := read_replicas.choose()) is not None:
+        db = AsyncSessionLocal(bind=read_replicas.engines[index], info={"replica": True})
+        try:
+            # 提前取得连接，副本故障时还能换用其他副本，而不是在查询时才失败
+            await db.connection()
+        except (DBAPIError, OSError) as e:
+            await db.close()
+            read_replicas.mark_failed(index, e)
+            continue
+        DB_READ_SESSIONS.inc("replica")
+        return db
+    DB_READ_SESSIONS.inc("fallback")
+    return AsyncSessionLocal()
+
+class ReadSessionProvider:
+    """按需打开只读会话，请求由内存快照处理时不取数据库连接"""
+
+    def __init__(self, require_primary: bool = False):
+        self.require_primary = require_primary
+        self._session: Optional[AsyncSession] = None
+
+    async def get(self) -> AsyncSession:
+        if self._session is None:
+            self._session = await open_read_session(self.require_primary)
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+async def get_read_db(request: Request) -> AsyncGenerator[ReadSessionProvider, None]:
+    """
+    只读查询使用的会话依赖，配置了只读副本时读副本；会话在第一次调用get()时才打开
+    请求头X-Read-Consistency: primary表示要求读主库
+    """
+    require_primary = request.headers.get(READ_CONSISTENCY_HEADER, "").lower() == "primary"
+    reader = ReadSessionProvider(require_primary)
+    try:
+        yield reader
+    finally:
+        await reader.close()
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import AsyncIterator, Deque, List, Optional, Set, Tuple
+
+from app.core.changes import compact_changes
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.core.ingest import load_changes
+from app.schemas.hot_topic import TopicChanges
+
+logger = logging.getLogger(__name__)
+
+# 事件流中建议客户端的重连间隔（毫秒）
+RETRY_MS = 5000
+
+_KEEPALIVE = b": ping\n\n"
+
+def format_event(event: str, data: dict, event_id: Optional[int] = None) -> bytes:
+    """按SSE格式编码一条事件"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+class ChangeBroker:
+    """
+    将每次抓取的变化推送给所有SSE订阅者
+    事件只编码一次，各订阅者队列中保存的是同一份bytes；
+    每个订阅者的队列有上限，积压满时断开该订阅者，由客户端携带Last-Event-ID重连续传
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: Set[asyncio.Queue] = set()
+        # (批次, 上一批次, 已编码事件)
+        self._history: Deque[Tuple[int, int, bytes]] = deque(maxlen=get_settings().SSE_REPLAY_SIZE)
+        self._generation = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def bind(self, loop: asyncio.AbstractEventLoop, generation: int):
+        """在应用启动时绑定事件循环和当前批次"""
+        self._loop = loop
+        self._generation = generation
+
+    def publish(self, generation: int, previous_generation: int, changes: dict):
+        """发布一次抓取的变化，可在调度器线程中调用"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        payload = format_event(
+            "changes",
+            {"generation": generation, "previous_generation": previous_generation, **changes},
+            event_id=generation
+        )
+        self._loop.call_soon_threadsafe(self._fan_out, generation, previous_generation, payload)
+
+    def _fan_out(self, generation: int, previous_generation: int, payload: bytes):
+        self._history.append((generation, previous_generation, payload))
+        self._generation = generation
+        dropped = 0
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                self._disconnect(queue)
+                dropped += 1
+        if dropped:
+            logger.warning(f"{dropped}个订阅者消费过慢，已断开")
+
+    def _disconnect(self, queue: asyncio.Queue):
+        """清空队列并放入结束标记，订阅者读到None后结束事件流"""
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def _replay(self, last_event_id: Optional[int]) -> List[bytes]:
+        """计算新订阅者需要先收到的事件"""
+        ready = format_event("ready", {"generation": self._generation}, event_id=self._generation)
+        if last_event_id is None:
+            return [f"retry: {RETRY_MS}\n\n".encode("utf-8"), ready]
+        if last_event_id == self._generation:
+            return []
+        missed = [item for item in self._history if item[0] > last_event_id]
+        # 只有缺失的事件能首尾相接时才能续传，否则通知客户端重新拉取全量
+        if not missed or missed[0][1] != last_event_id:
+            return [format_event("reset", {"generation": self._generation}, event_id=self._generation)]
+        return [payload for _, _, payload in missed]
+
+    def open_stream(self, last_event_id: Optional[int] = None) -> Optional[AsyncIterator[bytes]]:
+        """注册订阅者并返回事件流，订阅者已满时返回None"""
+        settings = get_settings()
+        if len(self._subscribers) >= settings.SSE_MAX_SUBSCRIBERS:
+            return None
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.SSE_QUEUE_SIZE)
+        # 注册和计算补发事件之间没有await，不会漏掉或重复事件
+        self._subscribers.add(queue)
+        return self._stream(queue, self._replay(last_event_id), settings.SSE_KEEPALIVE)
+
+    async def _stream(self, queue: asyncio.Queue, initial: List[bytes], keepalive: float) -> AsyncIterator[bytes]:
+        try:
+            for payload in initial:
+                yield payload
+            while True:
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield _KEEPALIVE
+                    continue
+                if payload is None:
+                    break
+                yield payload
+        finally:
+            self._subscribers.discard(queue)
+
+    def close(self):
+        """关闭所有事件流，在应用关闭时调用"""
+        for queue in list(self._subscribers):
+            self._disconnect(queue)
+
+_broker = ChangeBroker()
+
+def get_broker() -> ChangeBroker:
+    """获取全局的变化推送器"""
+    return _broker
+
+def publish_changes(previous, current):
+    """
+    推送前后两个快照之间的变化，previous为None时全部话题视为新上榜
+    推送入库时保存的变化集合，内容与/hot-topics/changes相同；
+    保存的变化集合不完整时才比较两个快照
+    """
+    if current is None or (previous is not None and previous.generation == current.generation):
+        return
+    previous_topics = previous.topics if previous is not None else []
+    previous_generation = previous.generation if previous is not None else 0
+    changes = None
+    if previous is not None:
+        db = SessionLocal()
+        try:
+            changes = load_changes(db, previous_generation, current.generation)
+        except Exception as e:
+            logger.error(f"读取批次 {current.generation} 的变化失败：{str(e)}")
+        finally:
+            db.close()
+    if changes is None:
+        changes = compact_changes(previous_topics, current.topics)
+    # 与/hot-topics/changes按同一个模型序列化，topic_key输出为字符串
+    _broker.publish(current.generation, previous_generation, TopicChanges(**changes).model_dump(mode="json"))
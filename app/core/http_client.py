@@ -0,0 +1,27 @@
+from typing import Optional
+
+import httpx
+
+from app.core.config import get_settings
+
+_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    获取应用共用的HTTP客户端，用于调用和风天气等外部API
+    整个应用生命周期内复用同一个连接池，避免每次请求重新建立TCP/TLS连接
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=get_settings().WEATHER_TIMEOUT,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        )
+    return _client
+
+async def close_http_client():
+    """关闭共用的HTTP客户端，在应用关闭时调用"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
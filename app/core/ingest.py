@@ -0,0 +1,328 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from sqlalchemy import bindparam, case, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.changes import compact_changes, merge_changes
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.core.normalize import normalize_heat_values, topic_key
+from app.core.ranking import assign_global_scores
+from app.models.archived_page import ArchivedPage
+from app.models.crawl_generation import CrawlGeneration
+from app.models.generation_change import GenerationChange
+from app.models.hot_topic import HotTopic, SOURCES
+from app.models.topic import Topic
+from app.models.topic_history import TopicHistory
+
+logger = logging.getLogger(__name__)
+
+# 清理旧批次的后台线程，单线程保证清理任务串行执行
+_cleanup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="generation-cleanup")
+
+# 每批删除的行数，避免一次删除过多行长时间持有锁
+CLEANUP_BATCH_SIZE = 500
+
+def current_generation_query():
+    """最新已发布批次的标量子查询，没有任何批次时为0（兼容批次引入前的数据）"""
+    return select(func.coalesce(func.max(CrawlGeneration.id), 0))\
+        .where(CrawlGeneration.status == 'published')\
+        .scalar_subquery()
+
+def get_current_generation(db: Session) -> int:
+    """获取最新已发布批次"""
+    return db.execute(select(current_generation_query())).scalar_one()
+
+def load_changes(db: Session, since: int, until: int) -> Optional[Dict[str, list]]:
+    """
+    合并since之后直到until（含）的已保存变化集合，since等于until时为空的变化集合
+    变化集合不能从since首尾相接到until（中间的已被清理或尚未写入）时返回None
+    """
+    if since == until:
+        return merge_changes([])
+    rows = db.execute(
+        select(GenerationChange.generation, GenerationChange.previous_generation, GenerationChange.changes)
+        .where(GenerationChange.generation > since, GenerationChange.generation <= until)
+        .order_by(GenerationChange.generation)
+    ).all()
+    if not rows or rows[0].previous_generation != since or rows[-1].generation != until:
+        return None
+    return merge_changes(row.changes for row in rows)
+
+def _generation_topics(db: Session, generation: int) -> List[dict]:
+    """读取某个批次的全部话题，用于沿用未变化的来源和计算本批次的变化"""
+    rows = db.execute(
+        select(HotTopic.topic_key, HotTopic.title, HotTopic.url, HotTopic.source, HotTopic.rank,
+               HotTopic.hot_value, HotTopic.heat, HotTopic.heat_label, HotTopic.global_rank)
+        .where(HotTopic.generation == generation)
+        .order_by(HotTopic.rank)
+    ).mappings().all()
+    return [dict(row) for row in rows]
+
+def _unique_by_key(rows: List[dict]) -> Dict[int, dict]:
+    """按topic_key去重，同一话题只保留排名最高的一条"""
+    unique = {}
+    for row in rows:
+        key = row['topic_key']
+        if key not in unique or row['rank'] < unique[key]['rank']:
+            unique[key] = row
+    return unique
+
+def history_rows(unique: Dict[int, dict], crawled_at: datetime) -> List[dict]:
+    """由本批次话题生成历史记录"""
+    return [
+        {
+            "topic_key": key,
+            "crawled_at": crawled_at,
+            "generation": row['generation'],
+            "source": row['source'],
+            "rank": row['rank'],
+            "heat": row['heat']
+        }
+        for key, row in unique.items()
+    ]
+
+def upsert_topics(db: Session, unique: Dict[int, dict], seen_at: datetime) -> List[int]:
+    """
+    更新话题维表，返回本批次中首次出现的topic_key
+    是否为新话题通过整数主键的IN查询判断
+    """
+    keys = list(unique)
+    existing = set(db.execute(select(Topic.topic_key).where(Topic.topic_key.in_(keys))).scalars())
+    new_keys = [key for key in keys if key not in existing]
+    if new_keys:
+        db.execute(insert(Topic), [
+            {
+                "topic_key": key,
+                "source": unique[key]['source'],
+                "title": unique[key]['title'],
+                "url": unique[key]['url'],
+                "first_seen_at": seen_at,
+                "last_seen_at": seen_at
+            }
+            for key in new_keys
+        ])
+    if existing:
+        db.execute(update(Topic).where(Topic.topic_key.in_(existing)).values(last_seen_at=seen_at))
+    return new_keys
+
+def publish_generation(
+    db: Session,
+    topics_by_source: Dict[str, Optional[List[dict]]],
+    archived_pages: Iterable[int] = ()
+) -> int:
+    """
+    将本次抓取结果写入一个新批次并发布
+    来源为None时沿用上一批次的数据，保证每个批次都是完整的
+    新批次在同一个事务中批量插入并标记为已发布，提交前对读取方不可见
+    同一事务中为本次抓取到的来源追加排名历史并更新话题维表（沿用的来源没有新的观测，不写历史），
+    并保存相对上一批次的变化；
+    archived_pages为本次解析的归档页面，记录其对应的批次和历史记录时间
+    """
+    previous = get_current_generation(db)
+    previous_topics = _generation_topics(db, previous)
+    generation = CrawlGeneration(status='pending')
+    db.add(generation)
+    db.flush()
+
+    now = datetime.utcnow()
+    rows = []
+    fetched_sources = set()
+    for source in SOURCES:
+        topics = topics_by_source.get(source)
+        if topics is None:
+            topics = [topic for topic in previous_topics if topic['source'] == source]
+        else:
+            fetched_sources.add(source)
+        for topic in topics:
+            rows.append({
+                "generation": generation.id,
+                "topic_key": topic.get('topic_key') or topic_key(source, topic['url'], topic['title']),
+                "title": topic['title'],
+                "url": topic['url'],
+                "source": source,
+                "rank": topic['rank'],
+                "hot_value": topic.get('hot_value', ''),
+                "created_at": now,
+                "updated_at": now
+            })
+
+    # 批量解析热度文本
+    for row, (heat, heat_label) in zip(rows, normalize_heat_values([row['hot_value'] for row in rows])):
+        row['heat'] = heat
+        row['heat_label'] = heat_label
+
+    # 每次抓取批量计算一次跨来源综合得分，读取时直接按global_rank排序
+    assign_global_scores(rows)
+
+    if rows:
+        # executemany形式的批量插入，驱动会合并为多行INSERT
+        db.execute(insert(HotTopic), rows)
+    observed = [row for row in rows if row['source'] in fetched_sources]
+    if observed:
+        unique = _unique_by_key(observed)
+        db.execute(insert(TopicHistory), history_rows(unique, now))
+        new_keys = upsert_topics(db, unique, now)
+        logger.info(f"批次 {generation.id} 新出现话题 {len(new_keys)} 个")
+
+    db.add(GenerationChange(
+        generation=generation.id,
+        previous_generation=previous,
+        changes=compact_changes(previous_topics, rows),
+        created_at=now
+    ))
+
+    archived_pages = list(archived_pages)
+    if archived_pages:
+        db.execute(
+            update(ArchivedPage)
+            .where(ArchivedPage.id.in_(archived_pages))
+            .values(generation=generation.id, crawled_at=now)
+        )
+
+    generation.status = 'published'
+    generation.topic_count = len(rows)
+    generation.published_at = now
+    db.commit()
+    return generation.id
+
+def backfill_topics(db: Session, seen: Dict[int, Tuple[dict, datetime, datetime]]):
+    """
+    补写话题维表，seen为topic_key到(话题, 最早出现时间, 最晚出现时间)的映射
+    已有话题只把首次/最近出现时间向外扩展，不会因补写旧数据而倒退
+    """
+    keys = list(seen)
+    existing = set(db.execute(select(Topic.topic_key).where(Topic.topic_key.in_(keys))).scalars())
+    new_rows = [
+        {
+            "topic_key": key,
+            "source": topic['source'],
+            "title": topic['title'],
+            "url": topic['url'],
+            "first_seen_at": first,
+            "last_seen_at": last
+        }
+        for key, (topic, first, last) in seen.items() if key not in existing
+    ]
+    if new_rows:
+        db.execute(insert(Topic), new_rows)
+    if existing:
+        table = Topic.__table__
+        db.execute(
+            table.update()
+            .where(table.c.topic_key == bindparam('b_key'))
+            .values(
+                first_seen_at=case(
+                    (table.c.first_seen_at > bindparam('b_first'), bindparam('b_first')),
+                    else_=table.c.first_seen_at
+                ),
+                last_seen_at=case(
+                    (table.c.last_seen_at < bindparam('b_last'), bindparam('b_last')),
+                    else_=table.c.last_seen_at
+                )
+            ),
+            [{"b_key": key, "b_first": seen[key][1], "b_last": seen[key][2]} for key in existing]
+        )
+
+def page_history(source: str, generation: int, topics: List[dict]) -> Dict[int, dict]:
+    """把重新解析的一个页面转换为按topic_key去重的行，带有标题和链接，可同时用于补写历史和话题维表"""
+    rows = [
+        {
+            "topic_key": topic.get('topic_key') or topic_key(source, topic['url'], topic['title']),
+            "generation": generation,
+            "source": source,
+            "title": topic['title'],
+            "url": topic['url'],
+            "rank": topic['rank'],
+            "heat": heat
+        }
+        for topic, (heat, _) in zip(topics, normalize_heat_values([t.get('hot_value', '') for t in topics]))
+    ]
+    return _unique_by_key(rows)
+
+def note_seen(seen: Dict[int, Tuple[dict, datetime, datetime]], unique: Dict[int, dict], crawled_at: datetime):
+    """把一次抓取的话题计入seen（topic_key到(话题, 最早出现时间, 最晚出现时间)），供backfill_topics使用"""
+    for key, row in unique.items():
+        _, first, last = seen.get(key, (row, crawled_at, crawled_at))
+        seen[key] = (row, min(first, crawled_at), max(last, crawled_at))
+
+def backfill_history(db: Session, pages: List[Tuple[str, datetime, int, List[dict]]]) -> int:
+    """
+    用重新解析的结果替换历史记录，返回写入的行数
+    pages为(来源, 历史记录时间, 批次, 话题列表)；先批量删除这些来源在这些时间点的旧记录，
+    再批量插入，并补写话题维表。调用方负责提交
+    """
+    rows = []
+    times_by_source: Dict[str, List[datetime]] = {}
+    seen: Dict[int, Tuple[dict, datetime, datetime]] = {}
+    for source, crawled_at, generation, topics in pages:
+        times_by_source.setdefault(source, []).append(crawled_at)
+        unique = page_history(source, generation, topics)
+        rows.extend(history_rows(unique, crawled_at))
+        note_seen(seen, unique, crawled_at)
+
+    for source, times in times_by_source.items():
+        db.execute(delete(TopicHistory).where(TopicHistory.source == source, TopicHistory.crawled_at.in_(times)))
+    if rows:
+        db.execute(insert(TopicHistory), rows)
+        backfill_topics(db, seen)
+    return len(rows)
+
+def _cleanup_changes(db: Session, keep: int):
+    """只保留最近keep个批次的变化集合"""
+    oldest_kept = db.execute(
+        select(GenerationChange.generation)
+        .order_by(GenerationChange.generation.desc())
+        .offset(keep - 1)
+        .limit(1)
+    ).scalar()
+    if oldest_kept is not None:
+        db.execute(delete(GenerationChange).where(GenerationChange.generation < oldest_kept))
+        db.commit()
+
+def cleanup_generations(keep: Optional[int] = None):
+    """分批删除旧批次的话题和批次记录，只保留最近keep个已发布批次"""
+    keep = keep or get_settings().KEEP_GENERATIONS
+    db = SessionLocal()
+    try:
+        # 变化集合体积小，比完整批次保留得更久，供落后较多的客户端增量同步
+        _cleanup_changes(db, get_settings().KEEP_CHANGES)
+        published = db.execute(
+            select(CrawlGeneration.id)
+            .where(CrawlGeneration.status == 'published')
+            .order_by(CrawlGeneration.id.desc())
+            .limit(keep)
+        ).scalars().all()
+        if len(published) < keep:
+            return
+        oldest_kept = published[-1]
+
+        deleted = 0
+        while True:
+            ids = db.execute(
+                select(HotTopic.id)
+                .where(HotTopic.generation < oldest_kept)
+                .limit(CLEANUP_BATCH_SIZE)
+            ).scalars().all()
+            if not ids:
+                break
+            db.execute(delete(HotTopic).where(HotTopic.id.in_(ids)))
+            db.commit()
+            deleted += len(ids)
+
+        db.execute(delete(CrawlGeneration).where(CrawlGeneration.id < oldest_kept))
+        db.commit()
+        if deleted:
+            logger.info(f"已清理 {oldest_kept} 之前的抓取批次，删除话题 {deleted} 条")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"清理旧抓取批次失败：{str(e)}")
+    finally:
+        db.close()
+
+def schedule_cleanup():
+    """在后台线程中清理旧批次，不阻塞本次抓取"""
+    _cleanup_executor.submit(cleanup_generations)
@@ -1,5 +1,12 @@
 from app.core.database import Base, engine
 from app.models.hot_topic import HotTopic
+from app.models.crawl_generation import CrawlGeneration
+from app.models.topic_history import TopicHistory
+from app.models.topic_history_rollup import TopicHistoryHourly, TopicHistoryDaily
+from app.models.topic import Topic
+from app.models.scheduler_lock import SchedulerLock
+from app.models.archived_page import ArchivedPage
+from app.models.generation_change import GenerationChange
 
 def init_db():
     """初始化数据库，创建所有表"""
@@ -0,0 +1,84 @@
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.database import SessionLocal
+from app.models.scheduler_lock import SchedulerLock
+
+logger = logging.getLogger(__name__)
+
+class LeaderElector:
+    """
+    基于数据库租约表的主节点选举
+    每个worker定期调用try_acquire：租约无人持有、已过期或本来就属于自己时获得/续期租约。
+    判断和写入在一条UPDATE中完成，同一时刻只有一个worker能更新成功
+    """
+
+    def __init__(self, name: str, ttl: int):
+        self.name = name
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._expires_at: Optional[datetime] = None
+
+    @property
+    def is_leader(self) -> bool:
+        """本地判断租约是否仍然有效，不访问数据库"""
+        return self._expires_at is not None and self._expires_at > datetime.utcnow()
+
+    def try_acquire(self) -> bool:
+        """尝试获得或续期租约，返回当前是否为主节点"""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        db = SessionLocal()
+        try:
+            result = db.execute(
+                update(SchedulerLock)
+                .where(
+                    SchedulerLock.name == self.name,
+                    (SchedulerLock.owner == self.owner) | (SchedulerLock.expires_at < now)
+                )
+                .values(owner=self.owner, acquired_at=now, expires_at=expires_at)
+            )
+            if result.rowcount == 0:
+                # 锁行不存在时插入，已存在（被其他worker持有）时插入失败
+                db.add(SchedulerLock(name=self.name, owner=self.owner, acquired_at=now, expires_at=expires_at))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            self._expires_at = None
+            return False
+        except Exception as e:
+            db.rollback()
+            logger.error(f"更新调度租约失败：{str(e)}")
+            self._expires_at = None
+            return False
+        finally:
+            db.close()
+
+        self._expires_at = expires_at
+        return True
+
+    def release(self):
+        """主动释放租约，正常退出时调用，其他worker无需等待租约过期"""
+        if self._expires_at is None:
+            return
+        self._expires_at = None
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(SchedulerLock)
+                .where(SchedulerLock.name == self.name, SchedulerLock.owner == self.owner)
+                .values(expires_at=datetime.utcnow())
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"释放调度租约失败：{str(e)}")
+        finally:
+            db.close()
@@ -0,0 +1,483 @@
+"""
+进程内指标采集，按Prometheus文本格式输出
+
+计数和直方图按线程分片：每个线程只写自己的分片，热路径上不加锁；
+输出时合并所有分片。多worker部署时配置METRICS_DIR，各进程定期把自己的合计值
+写入该目录下以进程号加随机后缀命名的文件，任一worker的/metrics都会合并所有进程的数据；
+已退出进程的文件由下一个启动的进程接手合并，计数不会倒退。
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.core.config import get_settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 默认耗时分桶（秒），与Prometheus客户端一致
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# 抓取耗时包含重试和退避，分桶上限更高
+CRAWL_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# 样本键：(指标名, 标签值)
+SampleKey = Tuple[str, Tuple[str, ...]]
+
+_local = threading.local()
+# 所有线程的分片，线程退出后分片仍保留，计数不会倒退
+_shards: List[Dict[SampleKey, object]] = []
+_shards_lock = threading.Lock()
+
+def _shard() -> Dict[SampleKey, object]:
+    """当前线程的分片，首次使用时登记"""
+    try:
+        return _local.shard
+    except AttributeError:
+        shard = _local.shard = {}
+        with _shards_lock:
+            _shards.append(shard)
+        return shard
+
+# 指标名 -> 指标定义，输出时用于生成HELP和TYPE
+_registry: Dict[str, "Metric"] = {}
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry[name] = self
+
+class Counter(Metric):
+    """只增不减的计数，标签值按labelnames的顺序传入"""
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        shard = _shard()
+        key = (self.name, labels)
+        shard[key] = shard.get(key, 0.0) + amount
+
+class Histogram(Metric):
+    """
+    分桶直方图，标签值按labelnames的顺序传入
+    每个样本保存各桶的非累计计数和总和，输出时再累计
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str):
+        shard = _shard()
+        key = (self.name, labels)
+        entry = shard.get(key)
+        if entry is None:
+            # 最后两项分别是+Inf桶和总和
+            entry = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        entry[bisect.bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        """记录with块的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+# 输出时才读取的计数，例如缓存自己维护的命中次数
+_collectors: List[Tuple[Counter, Callable[[], Dict[Tuple[str, ...], float]]]] = []
+
+def register_collector(counter: Counter, collect: Callable[[], Dict[Tuple[str, ...], float]]):
+    """登记一个在输出时调用的函数，返回标签值到当前累计值的映射"""
+    _collectors.append((counter, collect))
+
+def _merge(totals: Dict[SampleKey, object], key: SampleKey, value):
+    current = totals.get(key)
+    if current is None:
+        totals[key] = list(value) if isinstance(value, list) else value
+    elif isinstance(current, list):
+        for index, item in enumerate(value):
+            current[index] += item
+    else:
+        totals[key] = current + value
+
+def collect() -> Dict[SampleKey, object]:
+    """合并本进程所有线程的分片、登记的采集函数和从已退出进程接手的数据"""
+    with _shards_lock:
+        shards = list(_shards) + [dict(_retained)]
+    totals: Dict[SampleKey, object] = {}
+    for shard in shards:
+        # dict.copy在持有GIL时完成，不会与写入线程冲突
+        for key, value in shard.copy().items():
+            _merge(totals, key, value)
+    for counter, collect_samples in _collectors:
+        try:
+            samples = collect_samples()
+        except Exception as e:
+            logger.error(f"采集指标{counter.name}失败：{str(e)}")
+            continue
+        for labels, value in samples.items():
+            _merge(totals, (counter.name, tuple(labels)), value)
+    return totals
+
+# 本进程在共享目录中的文件名（不含扩展名），进程号加随机后缀，进程号被复用也不会覆盖已退出进程的文件
+_process_name: Optional[str] = None
+# 从已退出进程的文件接手的合计值，之后随本进程的文件一起输出
+_retained: Dict[SampleKey, object] = {}
+# 已并入本进程合计值的文件名，写入本进程的文件中，读取方据此跳过，避免文件删除前重复计算
+_absorbed: List[str] = []
+# 本进程的锁文件和已接手但尚未删除的文件的锁，进程存活期间一直持有
+_locks: Dict[str, object] = {}
+
+def _try_lock(f) -> bool:
+    """非阻塞地独占锁定文件，持有锁的进程退出时由操作系统释放"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+def _load_process_file(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    # 早期版本的文件只有样本列表
+    return {"absorbed": [], "samples": data} if isinstance(data, list) else data
+
+def _release(directory: str, stem: str):
+    """删除已接手的文件后释放并删除其锁文件；删除失败时继续持有锁，其他进程不会再次接手"""
+    try:
+        os.remove(os.path.join(directory, f"{stem}.json"))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"删除指标文件{stem}.json失败：{str(e)}")
+        return
+    lock = _locks.pop(stem, None)
+    if lock is not None:
+        lock.close()
+    try:
+        os.remove(os.path.join(directory, f"{stem}.lock"))
+    except OSError:
+        pass
+
+def write_process_metrics(directory: str):
+    """把本进程的合计值写入共享目录，先写临时文件再替换，读取方不会读到半个文件"""
+    path = os.path.join(directory, f"{_process_name or os.getpid()}.json")
+    samples = [[name, list(labels), value] for (name, labels), value in collect().items()]
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"absorbed": _absorbed, "samples": samples}, f)
+    os.replace(tmp_path, path)
+
+def fold_exited_processes(directory: str):
+    """
+    把已退出进程的文件并入本进程的合计值并删除，计数不会倒退，目录也不会随重启不断增加文件
+    存活的进程一直锁定自己的锁文件，能锁住即说明进程已退出；同时启动的进程不会重复接手同一个文件
+    """
+    files = {}
+    for filename in os.listdir(directory):
+        stem, ext = os.path.splitext(filename)
+        if ext != ".json" or stem == _process_name:
+            continue
+        try:
+            files[stem] = _load_process_file(os.path.join(directory, filename))
+        except FileNotFoundError:
+            # 列目录之后已被其他进程接手
+            continue
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取指标文件{filename}失败：{str(e)}")
+    # 已被其他文件合并过的文件不再接手，只在接手合并它的文件时一并删除
+    absorbed = {name for data in files.values() for name in data["absorbed"]}
+
+    folded: Dict[SampleKey, object] = {}
+    names: List[str] = []
+    for stem in files:
+        if f"{stem}.json" in absorbed:
+            continue
+        lock = open(os.path.join(directory, f"{stem}.lock"), "a")
+        if not _try_lock(lock):
+            lock.close()
+            continue
+        _locks[stem] = lock
+        try:
+            # 加锁后重新读取，列目录之后可能已被其他进程接手
+            data = _load_process_file(os.path.join(directory, f"{stem}.json"))
+        except (OSError, ValueError):
+            _release(directory, stem)
+            continue
+        for name, labels, value in data["samples"]:
+            _merge(folded, (name, tuple(labels)), value)
+        names.extend(data["absorbed"])
+        names.append(f"{stem}.json")
+    if not names:
+        return
+
+    with _shards_lock:
+        for key, value in folded.items():
+            _merge(_retained, key, value)
+        _absorbed.extend(names)
+    # 先写出包含接手数据的文件，再删除被接手的文件
+    write_process_metrics(directory)
+    for name in names:
+        _release(directory, os.path.splitext(name)[0])
+    logger.info(f"已合并{len(names)}个已退出进程的指标文件")
+
+def _read_process_metrics(directory: str) -> Dict[SampleKey, object]:
+    """合并共享目录中其他进程的数据，跳过已被其他进程合并的文件"""
+    for _ in range(3):
+        files = {}
+        vanished = False
+        for filename in os.listdir(directory):
+            stem, ext = os.path.splitext(filename)
+            if ext != ".json" or stem == _process_name:
+                continue
+            try:
+                files[filename] = _load_process_file(os.path.join(directory, filename))
+            except FileNotFoundError:
+                # 列目录之后文件被合并删除，其数据已转到另一个文件中，重新读取避免漏算
+                vanished = True
+            except (OSError, ValueError) as e:
+                logger.warning(f"读取指标文件{filename}失败：{str(e)}")
+        if not vanished:
+            break
+
+    absorbed = set(_absorbed)
+    for data in files.values():
+        absorbed.update(data["absorbed"])
+    totals: Dict[SampleKey, object] = {}
+    for filename, data in files.items():
+        if filename in absorbed:
+            continue
+        for name, labels, value in data["samples"]:
+            _merge(totals, (name, tuple(labels)), value)
+    return totals
+
+class MetricsExporter:
+    """后台线程，定期把本进程的指标写入共享目录"""
+
+    def __init__(self, directory: str, interval: float):
+        self.directory = directory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+
+    def start(self):
+        global _process_name
+        os.makedirs(self.directory, exist_ok=True)
+        # 同一进程内重新启动时沿用原来的文件，不能把自己当作已退出的进程接手
+        name = _process_name or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        lock = open(os.path.join(self.directory, f"{name}.lock"), "a")
+        _try_lock(lock)
+        _locks[name] = lock
+        _process_name = name
+        try:
+            fold_exited_processes(self.directory)
+        except OSError as e:
+            logger.error(f"合并已退出进程的指标文件失败：{str(e)}")
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        try:
+            write_process_metrics(self.directory)
+        except OSError as e:
+            logger.error(f"写入指标文件失败：{str(e)}")
+
+    def stop(self):
+        """停止并写入最后一次数据，释放锁后由下一个启动的进程接手"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.flush()
+        lock = _locks.pop(_process_name, None)
+        if lock is not None:
+            lock.close()
+
+_exporter: Optional[MetricsExporter] = None
+
+def start_metrics_export():
+    """配置了METRICS_DIR时启动定期写入，未配置时只输出本进程的数据"""
+    global _exporter
+    settings = get_settings()
+    if settings.METRICS_DIR and _exporter is None:
+        _exporter = MetricsExporter(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL)
+        _exporter.start()
+        logger.info(f"指标定期写入{settings.METRICS_DIR}，间隔{settings.METRICS_FLUSH_INTERVAL}秒")
+
+def stop_metrics_export():
+    global _exporter
+    if _exporter is not None:
+        _exporter.stop()
+        _exporter = None
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    return repr(float(value))
+
+def render_metrics() -> str:
+    """输出Prometheus文本格式，配置了METRICS_DIR时包含所有进程的数据"""
+    totals = collect()
+    directory = get_settings().METRICS_DIR
+    if directory and os.path.isdir(directory):
+        for key, value in _read_process_metrics(directory).items():
+            _merge(totals, key, value)
+
+    by_metric: Dict[str, List[Tuple[Tuple[str, ...], object]]] = {}
+    for (name, labels), value in totals.items():
+        by_metric.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name in sorted(by_metric):
+        metric = _registry.get(name)
+        if metric is None:
+            continue
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        for labels, value in sorted(by_metric[name]):
+            if isinstance(metric, Histogram):
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float("inf"),), value[:-1]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _format_value(bound)
+                    bucket_labels = _format_labels(metric.labelnames, labels, f'le="{le}"')
+                    lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                label_text = _format_labels(metric.labelnames, labels)
+                lines.append(f"{name}_sum{label_text} {_format_value(value[-1])}")
+                lines.append(f"{name}_count{label_text} {cumulative}")
+            else:
+                lines.append(f"{name}{_format_labels(metric.labelnames, labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+# 请求
+HTTP_REQUEST_SECONDS = Histogram(
+    "hot_news_http_request_duration_seconds",
+    "HTTP请求处理耗时（到发出响应头为止）",
+    ("method", "route", "status")
+)
+REQUESTS_REJECTED = Counter(
+    "hot_news_http_requests_rejected_total",
+    "被限流（rate_limited，429）或过载保护（overloaded，503）拒绝的请求数",
+    ("route_class", "reason")
+)
+
+# 抓取
+CRAWL_FETCH_SECONDS = Histogram(
+    "hot_news_crawl_fetch_duration_seconds",
+    "热榜页面请求耗时，包含重试",
+    ("source",),
+    buckets=CRAWL_BUCKETS
+)
+CRAWL_PARSE_SECONDS = Histogram(
+    "hot_news_crawl_parse_duration_seconds",
+    "热榜页面解析耗时",
+    ("source",)
+)
+CRAWL_BYTES = Counter(
+    "hot_news_crawl_bytes_total",
+    "下载的热榜页面字节数（解压后）",
+    ("source",)
+)
+CRAWL_ITEMS = Counter(
+    "hot_news_crawl_items_total",
+    "解析出的话题数",
+    ("source",)
+)
+CRAWLS = Counter(
+    "hot_news_crawls_total",
+    "抓取次数，result为success、unchanged、failed、timeout或skipped",
+    ("source", "result")
+)
+
+# 数据库
+DB_SAVE_SECONDS = Histogram(
+    "hot_news_db_save_duration_seconds",
+    "写入并发布一个抓取批次的耗时"
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "hot_news_db_pool_checkout_duration_seconds",
+    "从连接池取得连接的等待耗时，包含新建连接",
+    ("engine",)
+)
+DB_READ_SESSIONS = Counter(
+    "hot_news_db_read_sessions_total",
+    "接口只读会话数，target为replica、primary（要求读主库或未配置副本）或fallback（副本不可用）",
+    ("target",)
+)
+
+# 缓存
+CACHE_REQUESTS = Counter(
+    "hot_news_cache_requests_total",
+    "缓存请求次数，result为hit、miss或coalesced",
+    ("cache", "result")
+)
+
+class MetricsMiddleware:
+    """
+    记录每个请求的耗时，route使用路由模板而不是实际路径，避免标签数量无限增长
+    只计到发出响应头为止，SSE长连接不会被记为超长请求
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        recorded = False
+
+        def record(status):
+            nonlocal recorded
+            recorded = True
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                scope["method"], route.path if route is not None else "unmatched", str(status)
+            )
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                record(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            if not recorded:
+                record(500)
+            raise
@@ -0,0 +1,87 @@
+import hashlib
+import re
+import unicodedata
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
+
+_HEAT = re.compile(r"^(?P<prefix>[^\d]*?)\s*(?P<number>\d+(?:\.\d+)?)\s*(?P<multiplier>万|亿)?(?P<suffix>.*)$")
+_MULTIPLIERS = {None: 1, "万": 10_000, "亿": 100_000_000}
+_ZHIHU_QUESTION = re.compile(r"/question/(\d+)")
+_WHITESPACE = re.compile(r"\s+")
+
+# 与hot_topics.heat_label列长度一致
+HEAT_LABEL_LENGTH = 32
+
+def zhihu_question_id(url: str) -> str:
+    """从知乎链接中提取问题ID，不是问题链接时返回空字符串"""
+    match = _ZHIHU_QUESTION.search(url or "")
+    return match.group(1) if match else ""
+
+def normalize_title(title: str) -> str:
+    """标题归一化：全半角统一、去掉首尾的#、合并空白、英文小写"""
+    title = unicodedata.normalize("NFKC", title or "")
+    title = _WHITESPACE.sub(" ", title).strip().strip("#").strip()
+    return title.lower()
+
+def canonicalize(source: str, url: str, title: str) -> Tuple[str, str]:
+    """
+    计算话题的规范链接和身份标识
+    链接能唯一确定话题时（知乎问题ID、微博搜索词）身份取自链接，否则取归一化标题
+    """
+    url = (url or "").strip()
+    parts = urlsplit(url)
+
+    if source == "zhihu":
+        question_id = zhihu_question_id(url)
+        if question_id:
+            return f"https://www.zhihu.com/question/{question_id}", f"zhihu|q:{question_id}"
+
+    if source == "weibo" and parts.path.rstrip("/") == "/weibo":
+        keyword = parse_qs(parts.query).get("q", [""])[0]
+        if keyword:
+            # 只保留搜索词，去掉Refer、t等统计参数
+            canonical = f"https://s.weibo.com/weibo?q={quote(keyword, safe='')}"
+            return canonical, f"weibo|q:{normalize_title(keyword)}"
+
+    if parts.scheme in ("http", "https") and parts.netloc:
+        url = f"https://{parts.netloc.lower()}{parts.path or '/'}" + (f"?{parts.query}" if parts.query else "")
+    return url, f"{source}|t:{normalize_title(title)}"
+
+def identity_key(identity: str) -> int:
+    """将身份标识哈希为64位有符号整数，可直接存入BIGINT列"""
+    digest = hashlib.blake2b(identity.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+def topic_key(source: str, url: str, title: str) -> int:
+    """根据规范链接和归一化标题计算话题的64位整数标识，跨抓取保持稳定"""
+    _, identity = canonicalize(source, url, title)
+    return identity_key(identity)
+
+def normalize_heat_values(values: Sequence[Optional[str]]) -> List[Tuple[Optional[int], str]]:
+    """
+    批量解析热度文本，返回(热度整数, 标签)列表
+    - "1234 万热度" -> (12340000, "热度")
+    - "剧集 166903" -> (166903, "剧集")
+    - "热"、"新"等非数字标签 -> (None, "热")
+    同一批次中相同的文本只解析一次
+    """
+    parsed: Dict[Optional[str], Tuple[Optional[int], str]] = {}
+    result = []
+    for value in values:
+        if value not in parsed:
+            parsed[value] = _parse_heat_text(value)
+        result.append(parsed[value])
+    return result
+
+def _parse_heat_text(value: Optional[str]) -> Tuple[Optional[int], str]:
+    text = unicodedata.normalize("NFKC", value or "").replace(",", "").strip()
+    match = _HEAT.match(text)
+    if not match:
+        return None, text[:HEAT_LABEL_LENGTH]
+    number = float(match.group("number")) * _MULTIPLIERS[match.group("multiplier")]
+    label = (match.group("prefix") or match.group("suffix") or "").strip()
+    return int(number), label[:HEAT_LABEL_LENGTH]
+
+def parse_heat(hot_value: Optional[str]) -> Optional[int]:
+    """将热度文本解析为整数，如"1234 万热度" -> 12340000，无法解析时返回None"""
+    return _parse_heat_text(hot_value)[0]
@@ -0,0 +1,47 @@
+import math
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Dict, List
+
+# 热度分位数在综合得分中的权重，其余为排名衰减
+HEAT_WEIGHT = 0.5
+# 排名衰减常数，排名每增加该值，衰减项降为原来的1/e
+RANK_DECAY = 10.0
+
+def _heat_percentiles(rows: List[dict]) -> Dict[int, float]:
+    """计算同一来源内各话题热度的分位数（0~1），相同热度取中间分位"""
+    heats = sorted(row['heat'] for row in rows if row['heat'] is not None)
+    if not heats:
+        return {}
+    percentiles = {}
+    for index, row in enumerate(rows):
+        heat = row['heat']
+        if heat is None:
+            continue
+        below = bisect_left(heats, heat)
+        equal = bisect_right(heats, heat) - below
+        percentiles[index] = (below + 0.5 * equal) / len(heats)
+    return percentiles
+
+def assign_global_scores(rows: List[dict]):
+    """
+    为一次抓取的全部话题计算跨来源的综合得分和全局排名，直接写入rows
+    各来源的热度量纲不同，先在来源内转换为分位数，再与排名衰减加权，
+    没有数字热度的话题用其在来源内的排名分位代替
+    """
+    by_source = defaultdict(list)
+    for row in rows:
+        by_source[row['source']].append(row)
+
+    for source_rows in by_source.values():
+        count = len(source_rows)
+        percentiles = _heat_percentiles(source_rows)
+        for index, row in enumerate(source_rows):
+            rank_percentile = 1 - (row['rank'] - 1) / max(count, 1)
+            heat_percentile = percentiles.get(index, rank_percentile)
+            decay = math.exp(-(row['rank'] - 1) / RANK_DECAY)
+            row['score'] = round(HEAT_WEIGHT * heat_percentile + (1 - HEAT_WEIGHT) * decay, 6)
+
+    ordered = sorted(rows, key=lambda row: (-row['score'], row['rank'], row['source']))
+    for global_rank, row in enumerate(ordered, 1):
+        row['global_rank'] = global_rank
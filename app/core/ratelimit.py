@@ -0,0 +1,136 @@
+"""
+公开接口的限流和过载保护
+
+- 按客户端（可信的API Key，否则为IP）和接口类别分别使用令牌桶限流，超出时返回429
+- 同时处理的请求数超过上限时直接返回503，避免请求排队拖慢数据库和抓取写入
+令牌桶保存在按最近访问排序的字典中，数量超过上限时淘汰最久未访问的，内存占用有界。
+中间件只在事件循环线程中运行，不需要加锁。
+"""
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import get_settings
+from app.core.metrics import REQUESTS_REJECTED
+
+# 路径前缀 -> 接口类别，按顺序匹配；不匹配的路径（首页、/metrics、文档）不限流
+ROUTE_CLASSES = (
+    ("/api/v1/weather", "weather"),
+    ("/api/v1/", "default"),
+)
+
+# 长连接不计入并发数，订阅者数量由推送器自己限制
+LONG_LIVED_PATHS = frozenset({"/api/v1/hot-topics/stream"})
+
+def route_class(path: str) -> Optional[str]:
+    for prefix, name in ROUTE_CLASSES:
+        if path.startswith(prefix):
+            return name
+    return None
+
+class RateLimiter:
+    """按(客户端, 接口类别)划分的令牌桶"""
+
+    def __init__(self, rules: Dict[str, Sequence[float]], max_buckets: int):
+        # 接口类别 -> (每秒补充的令牌数, 桶容量)
+        self.rules = {name: (float(rate), float(burst)) for name, (rate, burst) in rules.items()}
+        self.max_buckets = max_buckets
+        # (客户端, 接口类别) -> [剩余令牌数, 上次补充时间]
+        self._buckets: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+
+    def acquire(self, client: str, name: str) -> float:
+        """取一个令牌，成功返回0，否则返回还需等待的秒数；未配置规则的类别不限流"""
+        rule = self.rules.get(name, self.rules.get("default"))
+        if rule is None:
+            return 0.0
+        rate, burst = rule
+        now = time.monotonic()
+        key = (client, name)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [burst, now]
+            if len(self._buckets) > self.max_buckets:
+                # 被淘汰的桶长时间未访问，令牌多半已经补满，重新创建时按满桶处理
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / rate
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+async def _reject(send, status: int, detail: str, retry_after: float):
+    body = f'{{"detail":"{detail}"}}'.encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class RateLimitMiddleware:
+    """
+    限流和过载保护中间件，被拒绝的请求不进入路由，开销只有一次字典查找和几次算术
+    """
+
+    def __init__(self, app):
+        self.app = app
+        settings = get_settings()
+        self.limiter = RateLimiter(settings.RATE_LIMITS, settings.RATE_LIMIT_MAX_CLIENTS)
+        self.api_keys = frozenset(settings.RATE_LIMIT_API_KEYS)
+        self.trust_forwarded = settings.RATE_LIMIT_TRUST_FORWARDED
+        self.max_in_flight = settings.MAX_IN_FLIGHT_REQUESTS
+        self.in_flight = 0
+
+    def client_id(self, scope) -> str:
+        """可信的API Key按Key识别，否则按IP；反向代理之后按X-Forwarded-For中的第一个地址"""
+        forwarded = None
+        for name, value in scope["headers"]:
+            if name == b"x-api-key":
+                key = value.decode("latin-1")
+                if key in self.api_keys:
+                    return f"key:{key}"
+            elif name == b"x-forwarded-for" and self.trust_forwarded:
+                forwarded = value.decode("latin-1").split(",", 1)[0].strip()
+        if forwarded:
+            return forwarded
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        name = route_class(path)
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        wait = self.limiter.acquire(self.client_id(scope), name)
+        if wait:
+            REQUESTS_REJECTED.inc(name, "rate_limited")
+            await _reject(send, 429, "Too many requests", wait)
+            return
+        if path in LONG_LIVED_PATHS or not self.max_in_flight:
+            await self.app(scope, receive, send)
+            return
+        if self.in_flight >= self.max_in_flight:
+            REQUESTS_REJECTED.inc(name, "overloaded")
+            await _reject(send, 503, "Server busy", 1)
+            return
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,273 @@
+"""
+话题历史的逐级汇总
+
+原始历史（每次抓取每个话题一行）超过HISTORY_RAW_DAYS天后按小时汇总，
+小时汇总超过HISTORY_HOURLY_DAYS天后按天汇总，汇总后删除较细粒度的记录。
+每个事务只处理一个时间段中的少量抓取时间点：合并进汇总表并删除对应的行后提交，
+不会长时间锁表，中途中断也不会丢失或重复计入数据。
+查询时按时间窗口选择粒度，见choose_resolution。
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.models.topic_history import TopicHistory
+from app.models.topic_history_rollup import TopicHistoryDaily, TopicHistoryHourly
+
+logger = logging.getLogger(__name__)
+
+HOUR = timedelta(hours=1)
+DAY = timedelta(days=1)
+
+# 查询粒度 -> 时间段长度
+RESOLUTIONS = {"raw": None, "hour": HOUR, "day": DAY}
+
+# 不超过该窗口时返回原始记录，不超过小时窗口时按小时，否则按天
+RAW_MAX_WINDOW = timedelta(days=2)
+HOURLY_MAX_WINDOW = timedelta(days=31)
+
+# 每个事务汇总的原始抓取时间点数、小时数
+CRAWLS_PER_TRANSACTION = 10
+HOURS_PER_TRANSACTION = 6
+
+def floor_time(value: datetime, step: timedelta) -> datetime:
+    """截断到所在小时或天的开始"""
+    if step >= DAY:
+        return value.replace(hour=0, minute=0, second=0, microsecond=0)
+    return value.replace(minute=0, second=0, microsecond=0)
+
+def raw_cutoff(now: Optional[datetime] = None) -> datetime:
+    """早于该时间的原始历史会被汇总进小时表"""
+    now = now or datetime.utcnow()
+    return floor_time(now - timedelta(days=get_settings().HISTORY_RAW_DAYS), HOUR)
+
+def hourly_cutoff(now: Optional[datetime] = None) -> datetime:
+    """早于该时间的小时汇总会被合并进天表"""
+    now = now or datetime.utcnow()
+    return floor_time(now - timedelta(days=get_settings().HISTORY_HOURLY_DAYS), DAY)
+
+def rollup_step(crawled_at: datetime, now: Optional[datetime] = None) -> Optional[timedelta]:
+    """某个时间点的历史所在的层级：仍为原始记录时返回None，否则返回所在汇总表的时间段长度"""
+    if crawled_at >= raw_cutoff(now):
+        return None
+    if crawled_at >= hourly_cutoff(now):
+        return HOUR
+    return DAY
+
+def choose_resolution(start: datetime, end: datetime, now: Optional[datetime] = None) -> str:
+    """
+    按查询窗口选择粒度：窗口较短且起点仍在原始历史保留期内时返回原始记录，
+    窗口不超过一个月且起点在小时汇总保留期内时按小时，否则按天
+    """
+    settings = get_settings()
+    now = now or datetime.utcnow()
+    window = end - start
+    if window <= RAW_MAX_WINDOW and start >= now - timedelta(days=settings.HISTORY_RAW_DAYS):
+        return "raw"
+    if window <= HOURLY_MAX_WINDOW and start >= now - timedelta(days=settings.HISTORY_HOURLY_DAYS):
+        return "hour"
+    return "day"
+
+def merge_points(points: Iterable[dict], step: timedelta) -> List[dict]:
+    """
+    把不同粒度的记录对齐到step合并：取最高排名和最高热度，累加记录数和在榜时长
+    含有未汇总的原始记录（on_list_seconds为None）的时间段不给出在榜时长
+    """
+    buckets: Dict[datetime, dict] = {}
+    for point in points:
+        bucket_start = floor_time(point["crawled_at"], step)
+        bucket = buckets.get(bucket_start)
+        if bucket is None:
+            buckets[bucket_start] = {**point, "crawled_at": bucket_start}
+            continue
+        bucket["rank"] = min(bucket["rank"], point["rank"])
+        bucket["heat"] = _max_heat(bucket["heat"], point["heat"])
+        bucket["samples"] += point["samples"]
+        if bucket["on_list_seconds"] is None or point["on_list_seconds"] is None:
+            bucket["on_list_seconds"] = None
+        else:
+            bucket["on_list_seconds"] += point["on_list_seconds"]
+    return [buckets[key] for key in sorted(buckets)]
+
+def _max_heat(a: Optional[int], b: Optional[int]) -> Optional[int]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return max(a, b)
+
+def _accumulate(items: Dict[int, dict], key: int, source: str, rank: int,
+                heat: Optional[int], samples: int, seconds: int):
+    item = items.get(key)
+    if item is None:
+        items[key] = {"source": source, "best_rank": rank, "peak_heat": heat,
+                      "samples": samples, "on_list_seconds": seconds}
+        return
+    item["best_rank"] = min(item["best_rank"], rank)
+    item["peak_heat"] = _max_heat(item["peak_heat"], heat)
+    item["samples"] += samples
+    item["on_list_seconds"] += seconds
+
+def _merge_rollup(db: Session, model, bucket_start: datetime, items: Dict[int, dict]):
+    """合并进汇总表的同一时间段，已有的行取最高排名、最高热度并累加记录数和在榜时长"""
+    if not items:
+        return
+    existing = db.execute(
+        select(model).where(model.bucket_start == bucket_start, model.topic_key.in_(list(items)))
+    ).scalars().all()
+    for row in existing:
+        item = items.pop(row.topic_key)
+        row.best_rank = min(row.best_rank, item["best_rank"])
+        row.peak_heat = _max_heat(row.peak_heat, item["peak_heat"])
+        row.samples += item["samples"]
+        row.on_list_seconds += item["on_list_seconds"]
+    if items:
+        db.execute(insert(model), [
+            {"topic_key": key, "bucket_start": bucket_start, **item} for key, item in items.items()
+        ])
+
+def _crawl_durations(db: Session, start: datetime, end: datetime,
+                     max_gap: timedelta) -> Dict[Tuple[str, datetime], int]:
+    """时间段内每个来源每次抓取代表的在榜时长：到该来源下一次抓取的间隔，不超过max_gap"""
+    crawls = db.execute(
+        select(TopicHistory.source, TopicHistory.crawled_at)
+        .where(TopicHistory.crawled_at >= start, TopicHistory.crawled_at < end + max_gap)
+        .distinct()
+        .order_by(TopicHistory.crawled_at)
+    ).all()
+    by_source = defaultdict(list)
+    for source, crawled_at in crawls:
+        by_source[source].append(crawled_at)
+    durations = {}
+    for source, times in by_source.items():
+        for current, following in zip(times, times[1:] + [None]):
+            if current >= end:
+                break
+            gap = min(following - current, max_gap) if following else max_gap
+            durations[(source, current)] = int(gap.total_seconds())
+    return durations
+
+def _compact_raw_hour(db: Session, bucket_start: datetime, max_gap: timedelta) -> int:
+    """把一个小时内的原始历史汇总进小时表并删除，返回处理的原始记录数"""
+    durations = _crawl_durations(db, bucket_start, bucket_start + HOUR, max_gap)
+    times = sorted({crawled_at for _, crawled_at in durations})
+    compacted = 0
+    for i in range(0, len(times), CRAWLS_PER_TRANSACTION):
+        chunk = times[i:i + CRAWLS_PER_TRANSACTION]
+        rows = db.execute(
+            select(TopicHistory.topic_key, TopicHistory.crawled_at, TopicHistory.source,
+                   TopicHistory.rank, TopicHistory.heat)
+            .where(TopicHistory.crawled_at.in_(chunk))
+        ).all()
+        items: Dict[int, dict] = {}
+        for row in rows:
+            _accumulate(items, row.topic_key, row.source, row.rank, row.heat, 1,
+                        durations.get((row.source, row.crawled_at), 0))
+        _merge_rollup(db, TopicHistoryHourly, bucket_start, items)
+        db.execute(delete(TopicHistory).where(TopicHistory.crawled_at.in_(chunk)))
+        db.commit()
+        compacted += len(rows)
+    return compacted
+
+def _compact_hourly_day(db: Session, day_start: datetime) -> int:
+    """把一天内的小时汇总合并进天表并删除，返回处理的小时汇总行数"""
+    hours = db.execute(
+        select(TopicHistoryHourly.bucket_start)
+        .where(TopicHistoryHourly.bucket_start >= day_start,
+               TopicHistoryHourly.bucket_start < day_start + DAY)
+        .distinct()
+        .order_by(TopicHistoryHourly.bucket_start)
+    ).scalars().all()
+    compacted = 0
+    for i in range(0, len(hours), HOURS_PER_TRANSACTION):
+        chunk = hours[i:i + HOURS_PER_TRANSACTION]
+        rows = db.execute(
+            select(TopicHistoryHourly).where(TopicHistoryHourly.bucket_start.in_(chunk))
+        ).scalars().all()
+        items: Dict[int, dict] = {}
+        for row in rows:
+            _accumulate(items, row.topic_key, row.source, row.best_rank, row.peak_heat,
+                        row.samples, row.on_list_seconds)
+        _merge_rollup(db, TopicHistoryDaily, day_start, items)
+        db.execute(delete(TopicHistoryHourly).where(TopicHistoryHourly.bucket_start.in_(chunk)))
+        db.commit()
+        compacted += len(rows)
+    return compacted
+
+def replace_bucket(db: Session, source: str, step: timedelta, bucket_start: datetime,
+                   crawls: List[Tuple[datetime, Dict[int, dict]]], following: Optional[datetime],
+                   max_gap: timedelta) -> int:
+    """
+    用一个来源在某个汇总时间段内全部抓取的历史重建该时间段的汇总，返回汇总行数
+    crawls为按时间排序的(抓取时间, 按topic_key去重的历史行)，following为该来源在时间段之后的下一次抓取时间，
+    在榜时长的计算与汇总任务相同。汇总表按累加合并，不能只替换其中一次抓取，因此整段重建；
+    同时删除该来源在时间段内尚未汇总的较细记录，避免之后再次汇总时重复计入。调用方负责提交
+    """
+    model = TopicHistoryDaily if step >= DAY else TopicHistoryHourly
+    end = bucket_start + step
+    items: Dict[int, dict] = {}
+    for (crawled_at, unique), (next_crawl, _) in zip(crawls, crawls[1:] + [(following, None)]):
+        gap = min(next_crawl - crawled_at, max_gap) if next_crawl else max_gap
+        for key, row in unique.items():
+            _accumulate(items, key, source, row["rank"], row["heat"], 1, int(gap.total_seconds()))
+
+    db.execute(delete(TopicHistory).where(
+        TopicHistory.source == source, TopicHistory.crawled_at >= bucket_start, TopicHistory.crawled_at < end
+    ))
+    if model is TopicHistoryDaily:
+        db.execute(delete(TopicHistoryHourly).where(
+            TopicHistoryHourly.source == source,
+            TopicHistoryHourly.bucket_start >= bucket_start,
+            TopicHistoryHourly.bucket_start < end
+        ))
+    db.execute(delete(model).where(model.source == source, model.bucket_start == bucket_start))
+    if items:
+        db.execute(insert(model), [
+            {"topic_key": key, "bucket_start": bucket_start, **item} for key, item in items.items()
+        ])
+    return len(items)
+
+def compact_history(now: Optional[datetime] = None,
+                    should_continue: Callable[[], bool] = lambda: True) -> Dict[str, int]:
+    """
+    从最早的时间段开始逐个汇总超过保留期的历史，返回处理的原始记录数和小时汇总行数
+    每个时间段处理完后调用should_continue，返回False时提前结束（例如失去主节点身份）
+    """
+    settings = get_settings()
+    now = now or datetime.utcnow()
+    raw_before = raw_cutoff(now)
+    hourly_before = hourly_cutoff(now)
+    max_gap = timedelta(minutes=settings.CRAWL_MAX_INTERVAL)
+    stats = {"raw_rows": 0, "hourly_rows": 0}
+    db = SessionLocal()
+    try:
+        while should_continue():
+            oldest = db.execute(
+                select(func.min(TopicHistory.crawled_at)).where(TopicHistory.crawled_at < raw_before)
+            ).scalar()
+            if oldest is None:
+                break
+            stats["raw_rows"] += _compact_raw_hour(db, floor_time(oldest, HOUR), max_gap)
+
+        while should_continue():
+            oldest = db.execute(
+                select(func.min(TopicHistoryHourly.bucket_start))
+                .where(TopicHistoryHourly.bucket_start < hourly_before)
+            ).scalar()
+            if oldest is None:
+                break
+            stats["hourly_rows"] += _compact_hourly_day(db, floor_time(oldest, DAY))
+    except Exception as e:
+        db.rollback()
+        logger.error(f"汇总话题历史失败：{str(e)}")
+    finally:
+        db.close()
+    if stats["raw_rows"] or stats["hourly_rows"]:
+        logger.info(f"话题历史汇总完成，原始记录 {stats['raw_rows']} 条，小时汇总 {stats['hourly_rows']} 条")
+    return stats
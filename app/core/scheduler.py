@@ -2,62 +2,115 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from app.crawlers.zhihu_crawler import ZhihuCrawler
 from app.crawlers.weibo_crawler import WeiboCrawler
+from app.crawlers.http_client import create_crawl_session
+from app.core.config import get_settings
 from app.core.database import SessionLocal
-from app.models.hot_topic import HotTopic
-from datetime import datetime
+from app.core.ingest import current_generation_query, publish_generation, schedule_cleanup
+from app.core.rollup import compact_history
+from app.core.leader import LeaderElector
+from app.core.adaptive import AdaptiveInterval
+from app.core.changes import ranking_volatility
+from app.crawlers.resilience import get_breaker
+from app.core.metrics import CRAWLS, DB_SAVE_SECONDS
+from app.core.snapshot_sync import apply_new_generation
+from app.models.hot_topic import HotTopic, SOURCES
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select
 import logging
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import random
+import threading
 
 logger = logging.getLogger(__name__)
 
-async def crawl_topics():
-    """异步抓取热搜话题"""
+# 抓取主节点选举，部署多个抓取进程时只有主节点执行抓取
+_elector: LeaderElector = None
+# 内嵌在API进程中运行时，抓取后直接刷新本进程的快照，不必等待轮询
+_apply_locally = False
+# 各来源独立抓取，入库时要读取上一批次来沿用其他来源的数据，必须串行
+_save_lock = threading.Lock()
+# 各来源的自适应抓取间隔
+_intervals: Dict[str, AdaptiveInterval] = {}
+# 各来源上一次抓取到的话题，用于计算榜单变化程度
+_last_topics: Dict[str, List[dict]] = {}
+
+CRAWLERS = {
+    'zhihu': ZhihuCrawler,
+    'weibo': WeiboCrawler
+}
+
+async def fetch_with_timeout(crawler, session):
+    """
+    在总超时时间内抓取单个来源（含重试），超时或失败的来源返回空列表，不影响其他来源
+    熔断中的来源直接跳过，与失败一样返回空列表：沿用上一批次，也不调整抓取间隔
+    """
+    breaker = get_breaker(crawler.source)
+    if not breaker.allow():
+        logger.warning(f"{crawler.source} 处于熔断状态，跳过本次抓取")
+        CRAWLS.inc(crawler.source, "skipped")
+        return []
+
+    try:
+        topics = await asyncio.wait_for(
+            crawler.fetch_hot_topics(session),
+            timeout=get_settings().CRAWL_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        logger.error(f"{crawler.__class__.__name__} 抓取超时")
+        CRAWLS.inc(crawler.source, "timeout")
+        breaker.record_failure()
+        return []
+
+    if topics == []:
+        CRAWLS.inc(crawler.source, "failed")
+        breaker.record_failure()
+    else:
+        CRAWLS.inc(crawler.source, "unchanged" if topics is None else "success")
+        breaker.record_success()
+    return topics
+
+async def crawl_topics(sources: Iterable[str] = SOURCES) -> Tuple[Dict[str, Optional[List[dict]]], Dict[str, int]]:
+    """
+    异步抓取热搜话题
+    返回来源到话题列表的映射（热榜未变化的来源为None），以及来源到本次归档页面ID的映射
+    """
+    sources = list(sources)
     try:
         # 创建爬虫实例
-        zhihu_crawler = ZhihuCrawler()
-        weibo_crawler = WeiboCrawler()
+        crawlers = {source: CRAWLERS[source]() for source in sources}
         
-        # 获取热搜话题
-        zhihu_topics = await zhihu_crawler.fetch_hot_topics()
-        weibo_topics = await weibo_crawler.fetch_hot_topics()
+        # 所有来源共用一个连接池，并发抓取，总耗时取决于最慢的来源
+        async with create_crawl_session() as session:
+            results = await asyncio.gather(*(
+                fetch_with_timeout(crawler, session) for crawler in crawlers.values()
+            ))
         
-        return zhihu_topics, weibo_topics
+        archived_pages = {
+            source: crawler.archived_page_id
+            for source, crawler in crawlers.items()
+            if crawler.archived_page_id is not None
+        }
+        return dict(zip(crawlers.keys(), results)), archived_pages
     except Exception as e:
         logger.error(f"抓取热搜话题失败：{str(e)}")
-        return [], []
+        return {source: [] for source in sources}, {}
 
-def save_topics(zhihu_topics, weibo_topics):
-    """保存热搜话题到数据库"""
+def save_topics(topics_by_source, archived_pages: Iterable[int] = ()):
+    """
+    保存热搜话题到数据库
+    写入一个新的抓取批次并原子发布，来源为None或未抓取时沿用上一批次的数据
+    archived_pages为解析出这些话题的归档页面
+    """
     db = SessionLocal()
     try:
-        # 清空旧数据
-        db.query(HotTopic).delete()
-        
-        # 保存知乎话题
-        for topic in zhihu_topics:
-            db_topic = HotTopic(
-                title=topic['title'],
-                url=topic['url'],
-                source='zhihu',
-                rank=topic['rank'],
-                hot_value=topic.get('hot_value', '')
-            )
-            db.add(db_topic)
-        
-        # 保存微博话题
-        for topic in weibo_topics:
-            db_topic = HotTopic(
-                title=topic['title'],
-                url=topic['url'],
-                source='weibo',
-                rank=topic['rank'],
-                hot_value=topic.get('hot_value', '')
-            )
-            db.add(db_topic)
-        
-        db.commit()
-        logger.info(f"成功更新热搜话题，知乎：{len(zhihu_topics)}条，微博：{len(weibo_topics)}条")
+        with _save_lock, DB_SAVE_SECONDS.time():
+            generation = publish_generation(db, topics_by_source, archived_pages)
+        summary = "，".join(
+            f"{source}：{'未变化' if topics is None else f'{len(topics)}条'}"
+            for source, topics in topics_by_source.items()
+        )
+        logger.info(f"成功更新热搜话题，批次：{generation}，{summary}")
     except Exception as e:
         db.rollback()
         logger.error(f"保存热搜话题失败：{str(e)}")
@@ -65,39 +118,162 @@ def save_topics(zhihu_topics, weibo_topics):
     finally:
         db.close()
 
-def crawl_and_save_topics():
-    """抓取并保存热搜话题"""
+    # 旧批次在后台清理，不阻塞本次抓取
+    schedule_cleanup()
+
+def crawl_and_save_topics(sources: Iterable[str] = SOURCES) -> Dict[str, Optional[List[dict]]]:
+    """抓取并保存热搜话题，返回各来源的抓取结果，出错时返回空字典"""
     try:
         # 创建事件循环
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         
         # 运行异步抓取
-        zhihu_topics, weibo_topics = loop.run_until_complete(crawl_topics())
-        
-        # 保存到数据库
-        save_topics(zhihu_topics, weibo_topics)
+        topics_by_source, archived_pages = loop.run_until_complete(crawl_topics(sources))
         
         # 关闭事件循环
         loop.close()
+
+        # 抓取失败或结果为空的来源按未变化处理，沿用上一批次，不会清空已有数据
+        changed = {source: topics or None for source, topics in topics_by_source.items()}
+        if all(topics is None for topics in changed.values()):
+            # 所有来源都未变化，本次抓取不解析也不写库
+            logger.info("热搜内容未变化，本次抓取为空操作")
+        else:
+            # 保存到数据库
+            save_topics(changed, [
+                page_id for source, page_id in archived_pages.items() if changed.get(source) is not None
+            ])
+
+            # 内嵌模式下直接刷新本进程的快照，独立的抓取进程由API进程轮询加载
+            if _apply_locally:
+                apply_new_generation()
+        return topics_by_source
     except Exception as e:
         logger.error(f"抓取热搜话题失败：{str(e)}")
+        return {}
 
-def init_scheduler():
-    """初始化调度器"""
+def previous_topics(source: str) -> List[dict]:
+    """来源上一次的话题，进程启动后首次抓取时从最新批次读取"""
+    if source not in _last_topics:
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(HotTopic.topic_key, HotTopic.rank)
+                .where(HotTopic.generation == current_generation_query(), HotTopic.source == source)
+            ).all()
+            _last_topics[source] = [{"topic_key": row.topic_key, "rank": row.rank} for row in rows]
+        except Exception as e:
+            logger.error(f"读取{source}上一批次话题失败：{str(e)}")
+            return []
+        finally:
+            db.close()
+    return _last_topics[source]
+
+def crawl_source(source: str, scheduler):
+    """
+    抓取单个来源，只在主节点上执行
+    根据本次与上次榜单的变化程度调整该来源的抓取间隔，并安排下一次抓取
+    """
+    # 执行前先续期租约，确保租约过期的旧主节点不会抓取
+    if not _elector.try_acquire():
+        logger.debug(f"当前worker不是抓取主节点，跳过{source}抓取")
+        return
+
+    previous = previous_topics(source)
+    adaptive = _intervals[source]
+    adaptive.record_request(datetime.now())
+
+    topics = crawl_and_save_topics([source]).get(source, [])
+    if topics == []:
+        # 抓取失败或熔断跳过时不根据结果调整间隔，避免来源故障期间间隔被拉长
+        logger.warning(f"{source} 本次未抓取到话题，保持抓取间隔{adaptive.interval:.1f}分钟")
+    else:
+        volatility = 0.0 if topics is None else ranking_volatility(previous, topics)
+        if topics is not None:
+            _last_topics[source] = topics
+        adaptive.observe(volatility)
+        logger.info(f"{source} 榜单变化程度：{volatility:.2f}，抓取间隔调整为{adaptive.interval:.1f}分钟")
+
+    jitter = timedelta(seconds=random.uniform(0, get_settings().CRAWL_JITTER))
+    scheduler.modify_job(f'crawl_{source}', next_run_time=adaptive.next_run(datetime.now()) + jitter)
+
+def renew_leadership(scheduler):
+    """定期竞争或续期租约，新成为主节点时立即抓取各来源"""
+    was_leader = _elector.is_leader
+    if _elector.try_acquire() and not was_leader:
+        logger.info(f"当前worker成为抓取主节点：{_elector.owner}")
+        for source in SOURCES:
+            scheduler.modify_job(
+                f'crawl_{source}',
+                next_run_time=datetime.now() + timedelta(seconds=random.uniform(0, 5))
+            )
+    elif was_leader and not _elector.is_leader:
+        logger.warning("当前worker失去抓取主节点身份")
+
+def compact_history_as_leader():
+    """只由抓取主节点汇总历史，失去主节点身份后在当前时间段处理完时停止"""
+    if _elector is not None and _elector.is_leader:
+        compact_history(should_continue=lambda: _elector.is_leader)
+
+def init_scheduler(apply_locally: bool = False):
+    """
+    初始化抓取调度器，由抓取进程（python -m app.worker）或内嵌模式下的API进程调用
+    每个进程都启动调度器，但只有持有租约的主节点执行抓取；
+    主节点退出后租约过期，由其他进程接管
+    """
+    global _elector, _apply_locally
+    _apply_locally = apply_locally
+    settings = get_settings()
+    _elector = LeaderElector('crawl_hot_topics', settings.SCHEDULER_LEASE_TTL)
     scheduler = BackgroundScheduler()
     
-    # 立即执行一次
-    scheduler.add_job(crawl_and_save_topics, 'date', run_date=datetime.now())
-    
-    # 每30分钟执行一次
+    # 竞争抓取主节点，续期间隔为租约有效期的三分之一
     scheduler.add_job(
-        crawl_and_save_topics,
-        IntervalTrigger(minutes=30),
-        id='crawl_hot_topics',
-        replace_existing=True
+        renew_leadership,
+        IntervalTrigger(seconds=settings.SCHEDULER_LEASE_TTL / 3),
+        args=[scheduler],
+        id='renew_leadership',
+        next_run_time=datetime.now(),
+        max_instances=1,
+        coalesce=True
     )
     
+    # 每个来源一个任务，下一次执行时间由crawl_source按自适应间隔设置，
+    # 触发器的最长间隔只是兜底
+    for source in SOURCES:
+        _intervals[source] = AdaptiveInterval(
+            settings.CRAWL_INTERVAL,
+            settings.CRAWL_MIN_INTERVAL,
+            settings.CRAWL_MAX_INTERVAL,
+            settings.CRAWL_HOURLY_BUDGET.get(source)
+        )
+        scheduler.add_job(
+            crawl_source,
+            IntervalTrigger(minutes=settings.CRAWL_MAX_INTERVAL),
+            args=[source, scheduler],
+            id=f'crawl_{source}',
+            replace_existing=True,
+            next_run_time=datetime.now() + timedelta(minutes=settings.CRAWL_INTERVAL),
+            max_instances=1,
+            coalesce=True
+        )
+
+    # 把超过保留期的排名历史逐级汇总为小时、天粒度
+    scheduler.add_job(
+        compact_history_as_leader,
+        IntervalTrigger(minutes=settings.HISTORY_COMPACT_INTERVAL),
+        id='compact_history',
+        max_instances=1,
+        coalesce=True
+    )
+
     scheduler.start()
     logger.info("热搜话题抓取任务已启动")
-    return scheduler 
\ No newline at end of file
+    return scheduler
+
+def shutdown_scheduler(scheduler):
+    """停止调度器并释放租约，其他抓取进程可立即接管"""
+    scheduler.shutdown()
+    if _elector is not None:
+        _elector.release()
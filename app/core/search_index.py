@@ -0,0 +1,240 @@
+import heapq
+import logging
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.core.normalize import normalize_title, topic_key
+from app.models.topic import Topic
+
+logger = logging.getLogger(__name__)
+
+# 切分二元组前去掉的字符：空白和标点
+_NON_WORD = re.compile(r"[\W_]+")
+
+def title_bigrams(text: str) -> List[str]:
+    """将标题切分为去重后的相邻二字组，顺序与出现顺序一致，不足两个字时整体作为一项"""
+    text = _NON_WORD.sub("", normalize_title(text))
+    if len(text) < 2:
+        return [text] if text else []
+    return list(dict.fromkeys(text[i:i + 2] for i in range(len(text) - 1)))
+
+@dataclass
+class SearchDocument:
+    """索引中的一个话题"""
+    topic_key: int
+    source: str
+    title: str
+    url: str
+    heat: Optional[int] = None
+    # 当前批次中的排名和hot_topics.id，不在榜时为None
+    rank: Optional[int] = None
+    topic_id: Optional[int] = None
+
+class SearchIndex:
+    """
+    话题标题的二字组倒排索引
+    每个二字组对应一个升序的文档编号数组（array('I')），文档编号按加入顺序递增分配，
+    新话题只需在数组末尾追加；同一话题标题变化时只增删差异的二字组。
+    同命中数时的先后顺序（在榜优先、热度高优先）在每次更新后预先排好，查询时不再逐条比较
+    """
+
+    def __init__(self):
+        self._docs: List[SearchDocument] = []
+        self._doc_ids: Dict[int, int] = {}
+        self._postings: Dict[str, array] = {}
+        self._current: Set[int] = set()
+        # 文档编号 -> 同命中数时的排序位置
+        self._order = array("I")
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _add_posting(self, gram: str, doc_id: int):
+        posting = self._postings.get(gram)
+        if posting is None:
+            posting = self._postings[gram] = array("I")
+        if not posting or posting[-1] < doc_id:
+            posting.append(doc_id)
+            return
+        index = bisect_left(posting, doc_id)
+        if index == len(posting) or posting[index] != doc_id:
+            posting.insert(index, doc_id)
+
+    def _remove_posting(self, gram: str, doc_id: int):
+        posting = self._postings.get(gram)
+        if posting is None:
+            return
+        index = bisect_left(posting, doc_id)
+        if index < len(posting) and posting[index] == doc_id:
+            posting.pop(index)
+        if not posting:
+            del self._postings[gram]
+
+    def _upsert(self, key: int, source: str, title: str, url: str) -> SearchDocument:
+        doc_id = self._doc_ids.get(key)
+        if doc_id is None:
+            doc_id = len(self._docs)
+            document = SearchDocument(topic_key=key, source=source, title=title, url=url)
+            self._docs.append(document)
+            self._doc_ids[key] = doc_id
+            # 新文档先排在最后，下次_reorder时再归位
+            self._order.append(doc_id)
+            for gram in title_bigrams(title):
+                self._add_posting(gram, doc_id)
+            return document
+
+        document = self._docs[doc_id]
+        if title != document.title:
+            # 不保存每个文档的二字组集合以节省内存，标题变化时从旧标题重新切分
+            old_grams = set(title_bigrams(document.title))
+            grams = set(title_bigrams(title))
+            for gram in old_grams - grams:
+                self._remove_posting(gram, doc_id)
+            for gram in grams - old_grams:
+                self._add_posting(gram, doc_id)
+        document.title = title
+        document.url = url
+        return document
+
+    def _reorder(self):
+        order = sorted(
+            range(len(self._docs)),
+            key=lambda doc_id: (
+                self._docs[doc_id].rank is None,
+                -(self._docs[doc_id].heat or 0),
+                self._docs[doc_id].rank or 0,
+                -doc_id
+            )
+        )
+        positions = array("I", bytes(4 * len(order)))
+        for position, doc_id in enumerate(order):
+            positions[doc_id] = position
+        self._order = positions
+
+    def add(self, key: int, source: str, title: str, url: str):
+        """加入一个历史话题，已存在时更新标题和链接"""
+        with self._lock:
+            self._upsert(key, source, title, url)
+
+    def add_many(self, rows: Iterable[Tuple[int, str, str, str]]):
+        """批量加入历史话题，rows为(topic_key, source, title, url)"""
+        with self._lock:
+            for key, source, title, url in rows:
+                self._upsert(key, source, title, url)
+            self._reorder()
+
+    def update_current(self, topics: List[dict]):
+        """用最新批次的话题（快照中的字典）更新索引，并刷新在榜状态"""
+        with self._lock:
+            for doc_id in self._current:
+                self._docs[doc_id].rank = None
+                self._docs[doc_id].topic_id = None
+            current = set()
+            for topic in topics:
+                # 快照中的topic_key按JSON输出格式保存为字符串
+                key = topic.get("topic_key")
+                if key is None:
+                    key = topic_key(topic["source"], topic["url"], topic["title"])
+                else:
+                    key = int(key)
+                document = self._upsert(key, topic["source"], topic["title"], topic["url"])
+                document.rank = topic["rank"]
+                document.topic_id = topic.get("id")
+                if topic.get("heat") is not None:
+                    document.heat = topic["heat"]
+                current.add(self._doc_ids[key])
+            self._current = current
+            self._reorder()
+
+    def search(self, query: str, source: Optional[str] = None, limit: int = 20) -> List[dict]:
+        """
+        按二字组重合数检索话题
+        至少命中查询中一半的二字组才算匹配，结果按命中数、是否在榜、热度排序
+        """
+        grams = title_bigrams(query)
+        if not grams:
+            return []
+        required = (len(grams) + 1) // 2
+
+        with self._lock:
+            counts = Counter(chain.from_iterable(
+                self._postings.get(gram, ()) for gram in grams
+            ))
+            # 将(未命中数, 排序位置, 文档编号)编码为一个整数，交给heapq在C层比较
+            size = len(self._docs) + 1
+            order = self._order
+            docs = self._docs
+            codes = [
+                ((len(grams) - count) * size + order[doc_id]) * size + doc_id
+                for doc_id, count in counts.items()
+                if count >= required and (not source or docs[doc_id].source == source)
+            ]
+            best = [
+                (len(grams) - code // (size * size), docs[code % size])
+                for code in heapq.nsmallest(limit, codes)
+            ]
+            return [
+                {
+                    "topic_key": doc.topic_key,
+                    "title": doc.title,
+                    "url": doc.url,
+                    "source": doc.source,
+                    "heat": doc.heat,
+                    "rank": doc.rank,
+                    "id": doc.topic_id,
+                    "match": round(count / len(grams), 3),
+                }
+                for count, doc in best
+            ]
+
+def build_search_index(db: Session, topics: List[dict], days: int) -> SearchIndex:
+    """从最近出现过的话题和当前批次构建索引"""
+    index = SearchIndex()
+    since = datetime.utcnow() - timedelta(days=days)
+    rows = db.query(Topic.topic_key, Topic.source, Topic.title, Topic.url)\
+        .filter(Topic.last_seen_at >= since)\
+        .order_by(Topic.last_seen_at)\
+        .yield_per(1000)
+    index.add_many(rows)
+    index.update_current(topics)
+    return index
+
+_index = SearchIndex()
+
+def get_search_index() -> SearchIndex:
+    """获取当前的搜索索引"""
+    return _index
+
+def rebuild_search_index(topics: List[dict]) -> Optional[SearchIndex]:
+    """从数据库重建索引，构建完成后整体替换，构建期间查询仍使用旧索引"""
+    global _index
+    db = SessionLocal()
+    try:
+        index = build_search_index(db, topics, get_settings().SEARCH_HISTORY_DAYS)
+    except Exception as e:
+        logger.error(f"构建搜索索引失败：{str(e)}")
+        return None
+    finally:
+        db.close()
+    _index = index
+    logger.info(f"搜索索引已重建，话题数：{len(index)}")
+    return index
+
+def update_search_index(topics: List[dict]):
+    """每次抓取后增量更新索引，话题数超过上限时重建以淘汰过期话题"""
+    if len(_index) + len(topics) > get_settings().SEARCH_MAX_DOCS:
+        rebuild_search_index(topics)
+    else:
+        _index.update_current(topics)
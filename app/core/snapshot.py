@@ -0,0 +1,127 @@
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.core.ingest import get_current_generation
+from app.models.hot_topic import HotTopic
+from app.schemas.hot_topic import HotTopicResponse
+
+logger = logging.getLogger(__name__)
+
+# 跨来源综合榜单的视图名
+GLOBAL_VIEW = "global"
+
+# 预渲染的视图：(来源, 数量限制)，来源为None表示全部
+PRERENDERED_VIEWS = [
+    (None, 50),
+    ("zhihu", 50),
+    ("weibo", 50),
+    (GLOBAL_VIEW, 50),
+]
+
+# 单个快照中按需渲染视图的数量上限，防止任意limit撑爆内存
+MAX_VIEWS = 64
+
+
+@dataclass(frozen=True)
+class SnapshotView:
+    """某个(来源, 数量)组合的预渲染响应"""
+    body: bytes
+    gzip_body: bytes
+    etag: str
+
+
+@dataclass
+class TopicSnapshot:
+    """某一次抓取后的热搜快照，渲染结果按视图缓存"""
+    generation: int
+    topics: List[dict]
+    # 按global_rank排序的全部话题
+    global_topics: List[dict] = field(default_factory=list)
+    _views: Dict[Tuple[Optional[str], int], SnapshotView] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def _select(self, source: Optional[str], limit: int) -> List[dict]:
+        if source == GLOBAL_VIEW:
+            topics = self.global_topics
+        elif source:
+            topics = [t for t in self.topics if t["source"] == source]
+        else:
+            topics = self.topics
+        return topics[:max(limit, 0)]
+
+    def render(self, source: Optional[str], limit: int) -> SnapshotView:
+        """获取视图，未渲染过的视图在首次访问时渲染并缓存"""
+        selected = self._select(source, limit)
+        # 以实际条数作为缓存键，limit=50和limit=1000命中同一份结果
+        key = (source, len(selected))
+        view = self._views.get(key)
+        if view is not None:
+            return view
+
+        body = json.dumps(selected, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha1(body).hexdigest()[:16]
+        view = SnapshotView(
+            body=body,
+            gzip_body=gzip.compress(body, compresslevel=6),
+            etag=f'"g{self.generation}-{digest}"'
+        )
+        with self._lock:
+            if len(self._views) < MAX_VIEWS:
+                self._views[key] = view
+        return view
+
+
+_snapshot: Optional[TopicSnapshot] = None
+_refresh_lock = threading.Lock()
+
+
+def get_snapshot() -> Optional[TopicSnapshot]:
+    """获取当前快照，尚未加载时返回None"""
+    return _snapshot
+
+
+def build_snapshot(db: Session) -> TopicSnapshot:
+    """读取最新已发布批次的热搜话题并构建快照"""
+    generation = get_current_generation(db)
+    rows = db.query(HotTopic)\
+        .filter(HotTopic.generation == generation)\
+        .order_by(HotTopic.rank, HotTopic.id)\
+        .all()
+    topics = [
+        HotTopicResponse.model_validate(row).model_dump(mode="json")
+        for row in rows
+    ]
+    global_topics = sorted(
+        topics,
+        key=lambda t: (t["global_rank"] is None, t["global_rank"] or 0, t["rank"])
+    )
+    snapshot = TopicSnapshot(generation=generation, topics=topics, global_topics=global_topics)
+    for source, limit in PRERENDERED_VIEWS:
+        snapshot.render(source, limit)
+    return snapshot
+
+
+def refresh_snapshot() -> Optional[TopicSnapshot]:
+    """重新加载快照，在每次成功保存热搜后调用"""
+    global _snapshot
+    with _refresh_lock:
+        db = SessionLocal()
+        try:
+            snapshot = build_snapshot(db)
+        except Exception as e:
+            logger.error(f"刷新热搜快照失败：{str(e)}")
+            return None
+        finally:
+            db.close()
+        # 整体替换引用，读取方要么看到旧快照，要么看到完整的新快照
+        _snapshot = snapshot
+    logger.info(f"热搜快照已刷新，批次：{snapshot.generation}，话题数：{len(snapshot.topics)}")
+    return snapshot
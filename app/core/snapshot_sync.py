@@ -0,0 +1,79 @@
+"""
+API进程加载抓取结果：启动时读取最新批次，之后轮询数据库发现新批次
+
+抓取由独立的抓取进程（python -m app.worker）或内嵌调度器写入数据库，
+本模块只依赖数据库和内存中的快照、搜索索引、推送，不导入爬虫。
+"""
+import logging
+import threading
+from typing import Optional
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.core.events import publish_changes
+from app.core.ingest import get_current_generation
+from app.core.search_index import rebuild_search_index, update_search_index
+from app.core.snapshot import TopicSnapshot, get_snapshot, refresh_snapshot
+
+logger = logging.getLogger(__name__)
+
+# 抓取线程和轮询线程都可能加载新批次，串行执行避免重复推送
+_apply_lock = threading.Lock()
+
+def apply_new_generation():
+    """
+    加载最新批次：刷新内存快照和搜索索引，并向SSE订阅者推送变化
+    内嵌调度器在抓取后调用，其他情况由定期轮询调用
+    """
+    with _apply_lock:
+        previous = get_snapshot()
+        snapshot = refresh_snapshot()
+        if snapshot is not None:
+            update_search_index(snapshot.topics)
+            # 向SSE订阅者推送本次抓取的变化
+            publish_changes(previous, snapshot)
+
+def sync_snapshot():
+    """数据库中有新批次时重新加载"""
+    snapshot = get_snapshot()
+    db = SessionLocal()
+    try:
+        generation = get_current_generation(db)
+    except Exception as e:
+        logger.error(f"查询最新批次失败：{str(e)}")
+        return
+    finally:
+        db.close()
+    if snapshot is None or generation != snapshot.generation:
+        apply_new_generation()
+
+def _build_search_index():
+    # 构建期间到达的新批次要等索引建好后再加载，避免被较旧的索引覆盖
+    with _apply_lock:
+        snapshot = get_snapshot()
+        rebuild_search_index(snapshot.topics if snapshot else [])
+
+def load_initial_state() -> Optional[TopicSnapshot]:
+    """
+    启动时加载快照，搜索索引在后台线程中构建
+    快照加载完成即可提供列表接口，不必等待读取近几天的历史话题
+    """
+    snapshot = refresh_snapshot()
+    threading.Thread(target=_build_search_index, name="search-index", daemon=True).start()
+    return snapshot
+
+def start_snapshot_sync() -> BackgroundScheduler:
+    """定期检查新批次，抓取进程写入的数据通过轮询加载"""
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(
+        sync_snapshot,
+        IntervalTrigger(seconds=get_settings().SNAPSHOT_POLL_INTERVAL),
+        id='sync_snapshot',
+        max_instances=1,
+        coalesce=True
+    )
+    scheduler.start()
+    return scheduler
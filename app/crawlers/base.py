@@ -0,0 +1,131 @@
+import aiohttp
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from app.core.archive import archive_page
+from app.core.metrics import CRAWL_BYTES, CRAWL_FETCH_SECONDS, CRAWL_ITEMS, CRAWL_PARSE_SECONDS
+from app.core.normalize import canonicalize, identity_key
+from app.crawlers.resilience import RETRYABLE_STATUS, UpstreamError, with_retries
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PageState:
+    """上一次成功解析的页面信息，用于条件请求和内容比对"""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+
+@dataclass
+class FetchedPage:
+    """抓取到的页面"""
+    html: str
+    status: int
+    state: PageState
+
+class BaseCrawler:
+    """
+    爬虫基类，负责条件请求和内容哈希比对
+    页面未变化时fetch_page返回None，调用方应跳过解析和入库
+    """
+    source: str = ""
+    # 计算哈希时截取的片段起止标记，只比对热榜部分，忽略页面中的时间戳等噪声
+    fragment_start: str = ""
+    fragment_end: str = ""
+    encoding: Optional[str] = None
+
+    # 按来源保存，跨爬虫实例共享
+    _page_states: Dict[str, PageState] = {}
+    # 本次抓取归档的页面ID，入库时与批次关联
+    archived_page_id: Optional[int] = None
+
+    def content_hash(self, html: str) -> str:
+        """计算热榜片段的内容哈希，找不到标记时使用整个页面"""
+        fragment = html
+        start = html.find(self.fragment_start) if self.fragment_start else -1
+        if start != -1:
+            end = html.find(self.fragment_end, start) if self.fragment_end else -1
+            fragment = html[start:end] if end != -1 else html[start:]
+        return hashlib.sha1(fragment.encode("utf-8")).hexdigest()
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """根据上次的ETag/Last-Modified构造条件请求头"""
+        state = self._page_states.get(self.source)
+        headers = {}
+        if state and state.etag:
+            headers["If-None-Match"] = state.etag
+        if state and state.last_modified:
+            headers["If-Modified-Since"] = state.last_modified
+        return headers
+
+    async def fetch_page(self, session: aiohttp.ClientSession, url: str, headers: Dict[str, str]) -> Optional[FetchedPage]:
+        """
+        发送条件请求获取页面，未变化（304或内容哈希相同）时返回None
+        5xx、429和连接错误按退避时间重试，重试用完后抛出异常
+        有变化的页面在解析前归档，解析失败时仍可事后重新解析
+        """
+        with CRAWL_FETCH_SECONDS.time(self.source):
+            page = await with_retries(
+                lambda: self._fetch_page_once(session, url, headers),
+                f"{self.source} 热榜请求"
+            )
+        if page is not None and page.status == 200:
+            self.archived_page_id = await asyncio.to_thread(archive_page, self.source, page.html)
+        return page
+
+    async def _fetch_page_once(self, session: aiohttp.ClientSession, url: str, headers: Dict[str, str]) -> Optional[FetchedPage]:
+        request_headers = {**headers, **self.conditional_headers()}
+        async with session.get(url, headers=request_headers) as response:
+            if response.status == 304:
+                logger.info(f"{self.source} 热榜未变化（HTTP 304）")
+                return None
+            if response.status in RETRYABLE_STATUS:
+                raise UpstreamError(response.status, url)
+            body = await response.read()
+            CRAWL_BYTES.inc(self.source, amount=len(body))
+            html = await response.text(encoding=self.encoding)
+            state = PageState(
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                content_hash=self.content_hash(html)
+            )
+            status = response.status
+
+        previous = self._page_states.get(self.source)
+        if status == 200 and previous and previous.content_hash == state.content_hash:
+            logger.info(f"{self.source} 热榜内容哈希未变化，跳过解析")
+            return None
+        return FetchedPage(html=html, status=status, state=state)
+
+    def parse_page(self, html: str) -> List[Dict[str, Any]]:
+        """解析页面，记录解析耗时和解析出的话题数"""
+        with CRAWL_PARSE_SECONDS.time(self.source):
+            topics = self.parse_hot_topics(html)
+        CRAWL_ITEMS.inc(self.source, amount=len(topics))
+        return topics
+
+    def parse_hot_topics(self, html: str) -> List[Dict[str, Any]]:
+        """由子类实现：从热榜页面中解析话题"""
+        raise NotImplementedError
+
+    def remember_page(self, page: FetchedPage):
+        """解析成功后记录页面状态，解析失败的页面下次仍会重新抓取"""
+        self._page_states[self.source] = page.state
+
+    def canonicalize_topics(self, topics: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        规范化阶段：改写为规范链接并计算稳定的topic_key
+        同一话题在榜单中出现多次时只保留排名最高的一条
+        """
+        seen = set()
+        result = []
+        for topic in topics:
+            url, identity = canonicalize(self.source, topic["url"], topic["title"])
+            key = identity_key(identity)
+            if key in seen:
+                continue
+            seen.add(key)
+            result.append({**topic, "url": url, "topic_key": key})
+        return result
@@ -0,0 +1,101 @@
+import importlib.util
+import logging
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+
+logger = logging.getLogger(__name__)
+
+# 优先使用lxml，未安装时退回标准库解析器
+PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+def class_strainer(class_name: str, name: Optional[str] = None) -> SoupStrainer:
+    """只解析带有指定class的标签及其子树"""
+    pattern = re.compile(rf"(?:^|\s){re.escape(class_name)}(?:\s|$)")
+    if name:
+        return SoupStrainer(name, class_=pattern)
+    return SoupStrainer(class_=pattern)
+
+@dataclass
+class ItemRule:
+    """热榜条目定位规则：strainer限定需要解析的子树，selector在子树中选出条目"""
+    strainer: SoupStrainer
+    selector: str
+
+class SelectorChain:
+    """按顺序尝试的一组选择器，记住上次命中的选择器并优先使用"""
+
+    def __init__(self, selectors: List[str]):
+        self.selectors = selectors
+        self._preferred = 0
+
+    def _order(self) -> List[int]:
+        return [self._preferred] + [i for i in range(len(self.selectors)) if i != self._preferred]
+
+    def select_one(self, item: Tag) -> Optional[Tag]:
+        for index in self._order():
+            element = item.select_one(self.selectors[index])
+            if element is not None:
+                self._preferred = index
+                return element
+        return None
+
+class HotListExtractor:
+    """
+    热榜抽取器
+    只解析热榜条目所在的子树，并记住上次命中的规则，页面结构不变时不再尝试备用规则
+    """
+
+    def __init__(self, name: str, item_rules: List[ItemRule], title_selectors: List[str], metric_selectors: List[str]):
+        self.name = name
+        self.item_rules = item_rules
+        self.title_chain = SelectorChain(title_selectors)
+        self.metric_chain = SelectorChain(metric_selectors)
+        self._preferred = 0
+
+    def _find_items(self, html: str) -> List[Tag]:
+        order = [self._preferred] + [i for i in range(len(self.item_rules)) if i != self._preferred]
+        for index in order:
+            rule = self.item_rules[index]
+            soup = BeautifulSoup(html, PARSER, parse_only=rule.strainer)
+            items = soup.select(rule.selector)
+            if items:
+                if index != self._preferred:
+                    logger.info(f"{self.name} 热榜条目规则切换为: {rule.selector}")
+                    self._preferred = index
+                return items
+        return []
+
+    def extract(self, html: str) -> List[Dict[str, str]]:
+        """
+        抽取热榜条目
+        返回的每一项包含rank（条目在榜单中的位置）以及title、href、parent_href和hot_value原始文本
+        """
+        items = self._find_items(html)
+        logger.info(f"{self.name} 找到热搜条目数: {len(items)}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+
+        entries = []
+        for index, item in enumerate(items, 1):
+            if debug:
+                logger.debug(f"{self.name} Item {index} HTML: {item}")
+
+            title_element = self.title_chain.select_one(item)
+            if title_element is None:
+                continue
+
+            parent = title_element.parent
+            metrics_element = self.metric_chain.select_one(item)
+            entry = {
+                "rank": index,
+                "title": title_element.get_text().strip(),
+                "href": title_element.get("href", "") or "",
+                "parent_href": (parent.get("href", "") if parent is not None else "") or "",
+                "hot_value": metrics_element.get_text().strip() if metrics_element is not None else ""
+            }
+            if debug:
+                logger.debug(f"{self.name} Item {index} 抽取结果: {entry}")
+            entries.append(entry)
+        return entries
@@ -0,0 +1,21 @@
+import aiohttp
+from app.core.config import get_settings
+
+def create_crawl_session() -> aiohttp.ClientSession:
+    """
+    创建一次抓取共用的HTTP客户端
+    所有爬虫共享同一个连接池和DNS缓存，并设置连接/读取超时
+    """
+    settings = get_settings()
+    connector = aiohttp.TCPConnector(
+        limit=settings.CRAWL_POOL_SIZE,
+        limit_per_host=settings.CRAWL_POOL_SIZE_PER_HOST,
+        ttl_dns_cache=settings.CRAWL_DNS_CACHE_TTL,
+        use_dns_cache=True
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=settings.CRAWL_TIMEOUT,
+        connect=settings.CRAWL_CONNECT_TIMEOUT,
+        sock_read=settings.CRAWL_READ_TIMEOUT
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
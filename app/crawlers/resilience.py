@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import aiohttp
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 可以重试的HTTP状态码：限流和服务端错误
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+class UpstreamError(Exception):
+    """上游返回了可重试的错误状态码"""
+
+    def __init__(self, status: int, url: str):
+        super().__init__(f"HTTP {status}: {url}")
+        self.status = status
+
+def is_retryable(error: Exception) -> bool:
+    """连接错误、读超时和可重试的状态码才重试，解析错误等重试也没有意义"""
+    return isinstance(error, (UpstreamError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError))
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """第attempt次重试前的等待时间，指数退避加全量抖动，避免多个请求同时重试"""
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+async def with_retries(call: Callable[[], Awaitable[T]], description: str) -> T:
+    """执行call，遇到可重试的错误时按退避时间重试，重试次数用完后抛出最后一次的错误"""
+    settings = get_settings()
+    for attempt in range(settings.CRAWL_RETRIES + 1):
+        try:
+            return await call()
+        except Exception as e:
+            if attempt >= settings.CRAWL_RETRIES or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, settings.CRAWL_BACKOFF_BASE, settings.CRAWL_BACKOFF_MAX)
+            logger.warning(f"{description} 第{attempt + 1}次请求失败（{e.__class__.__name__}: {e}），{delay:.1f}秒后重试")
+            await asyncio.sleep(delay)
+
+class CircuitBreaker:
+    """
+    单个来源的熔断器
+    连续失败达到阈值后打开，冷却期内直接跳过该来源；冷却结束后放行一次试探，
+    试探成功则关闭，失败则重新进入冷却
+    """
+
+    def __init__(self, source: str, threshold: int, cooldown: float):
+        self.source = source
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """是否允许本次抓取"""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"{self.source} 抓取恢复，熔断器关闭")
+            self.failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self._opened_at is not None or self.failures >= self.threshold:
+                self._opened_at = time.monotonic()
+                logger.error(f"{self.source} 连续失败{self.failures}次，熔断{self.cooldown}秒")
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(source: str) -> CircuitBreaker:
+    """获取来源的熔断器，按来源在进程内共享"""
+    with _breakers_lock:
+        breaker = _breakers.get(source)
+        if breaker is None:
+            settings = get_settings()
+            breaker = _breakers[source] = CircuitBreaker(
+                source, settings.CRAWL_BREAKER_THRESHOLD, settings.CRAWL_BREAKER_COOLDOWN
+            )
+        return breaker
@@ -1,12 +1,29 @@
 import aiohttp
-from bs4 import BeautifulSoup
 from app.core.config import get_settings
-from typing import List, Dict, Any
+from app.crawlers.base import BaseCrawler
+from app.crawlers.extractor import HotListExtractor, ItemRule, class_strainer
+from app.crawlers.http_client import create_crawl_session
+from typing import List, Dict, Any, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
-class WeiboCrawler:
+class WeiboCrawler(BaseCrawler):
+    source = "weibo"
+    fragment_start = 'id="pl_top_realtimehot"'
+    fragment_end = "</tbody>"
+    # 使用gb2312编码解码响应内容
+    encoding = "gb2312"
+
+    # 抽取器跨实例共享，以便记住上次命中的选择器
+    # 只解析标题单元格.td-02，热度数字位于其中的span中
+    extractor = HotListExtractor(
+        name="微博",
+        item_rules=[ItemRule(class_strainer("td-02", name="td"), ".td-02")],
+        title_selectors=["a"],
+        metric_selectors=["span"]
+    )
+
     def __init__(self):
         self.settings = get_settings()
         self.headers = {
@@ -19,62 +36,48 @@ class WeiboCrawler:
         self.url = self.settings.WEIBO_HOT_URL
         logger.info(f"微博爬虫初始化完成，URL: {self.url}")
 
-    async def fetch_hot_topics(self) -> List[Dict[str, Any]]:
-        """获取微博热搜话题"""
+    def parse_hot_topics(self, html: str) -> List[Dict[str, Any]]:
+        """从热榜页面中解析热搜话题"""
+        hot_topics = []
+        for entry in self.extractor.extract(html):
+            # 获取链接
+            href = entry["href"]
+            if href.startswith('/'):
+                href = f"https://s.weibo.com{href}"
+
+            hot_topics.append({
+                "title": entry["title"],
+                "url": href,
+                "source": "weibo",
+                "rank": entry["rank"],
+                "hot_value": entry["hot_value"]
+            })
+        # 规范化阶段会去掉搜索链接中的统计参数
+        return self.canonicalize_topics(hot_topics)
+
+    async def fetch_hot_topics(self, session: Optional[aiohttp.ClientSession] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        获取微博热搜话题，未传入session时使用临时客户端
+        热榜未变化时返回None
+        """
+        if session is None:
+            async with create_crawl_session() as session:
+                return await self.fetch_hot_topics(session)
+
         try:
             logger.info("开始获取微博热搜...")
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.url, headers=self.headers) as response:
-                    # 使用gb2312编码解码响应内容
-                    html = await response.text(encoding='gb2312')
-                    logger.info(f"微博响应状态码: {response.status}")
-                    logger.debug(f"微博响应内容: {html[:500]}...")
-            
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # 调试信息：打印所有可能的类名
-            all_classes = set()
-            for tag in soup.find_all(class_=True):
-                all_classes.update(tag['class'])
-            # logger.info(f"页面中所有的类名: {all_classes}")
-            
-            # 获取热搜列表
-            items = soup.select('.td-02')
-            logger.info(f"找到热搜条目数: {len(items)}")
-            
-            hot_topics = []
-            for index, item in enumerate(items, 1):
-                # 打印每个item的HTML结构，用于调试
-                logger.debug(f"Item {index} HTML: {item}")
-                
-                # 获取标题和链接
-                title_element = item.select_one('a')
-                if title_element:
-                    # 打印找到的标题元素，用于调试
-                    logger.debug(f"Title element found: {title_element}")
-                    logger.debug(f"Title element attrs: {title_element.attrs}")
-                    
-                    # 获取链接
-                    href = title_element.get('href', '')
-                    if href.startswith('/'):
-                        href = f"https://s.weibo.com{href}"
-                    
-                    # 获取热度值
-                    hot_value = ""
-                    hot_element = item.select_one('.td-03')
-                    if hot_element:
-                        hot_value = hot_element.text.strip()
-                    
-                    hot_topic = {
-                        "title": title_element.text.strip(),
-                        "url": href,
-                        "source": "weibo",
-                        "rank": index,
-                        "hot_value": hot_value
-                    }
-                    hot_topics.append(hot_topic)
-                    logger.debug(f"已添加热搜: {hot_topic['title']} - {hot_topic['url']}")
+            page = await self.fetch_page(session, self.url, self.headers)
+            if page is None:
+                return None
+            html = page.html
+            logger.info(f"微博响应状态码: {page.status}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"微博响应内容: {html[:500]}...")
             
+            hot_topics = self.parse_page(html)
+
+            if hot_topics:
+                self.remember_page(page)
             logger.info(f"成功获取微博热搜 {len(hot_topics)} 条")
             return hot_topics
         except Exception as e:
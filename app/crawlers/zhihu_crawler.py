@@ -1,10 +1,13 @@
 import aiohttp
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
 from app.core.config import get_settings
-from typing import List, Dict, Any
+from app.core.normalize import zhihu_question_id
+from app.crawlers.base import BaseCrawler
+from app.crawlers.extractor import HotListExtractor, ItemRule, class_strainer
+from app.crawlers.http_client import create_crawl_session
+from typing import List, Dict, Any, Optional
 import logging
-import re
-import inspect
+import time
 
 # 配置日志格式
 logging.basicConfig(
@@ -14,7 +17,26 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-class ZhihuCrawler:
+class ZhihuCrawler(BaseCrawler):
+    source = "zhihu"
+    fragment_start = "HotList-list"
+    fragment_end = "</main>"
+
+    # Cookie检查结果缓存：(cookie, 检查时间, 是否有效)
+    _cookie_check = None
+
+    # 抽取器跨实例共享，以便记住上次命中的选择器
+    extractor = HotListExtractor(
+        name="知乎",
+        item_rules=[
+            ItemRule(class_strainer("HotList-item"), ".HotList-item"),
+            ItemRule(class_strainer("HotItem"), ".HotItem"),
+            ItemRule(SoupStrainer(attrs={"data-zop-itemid": True}), "[data-zop-itemid]"),
+        ],
+        title_selectors=[".HotList-itemTitle", ".HotItem-title", ".HotItem-content", "a"],
+        metric_selectors=[".HotList-itemMetrics", ".HotItem-metrics", ".HotItem-meta"]
+    )
+
     def __init__(self):
         self.settings = get_settings()
         self.headers = {
@@ -38,14 +60,19 @@ class ZhihuCrawler:
 
     def extract_question_id(self, url: str) -> str:
         """从URL中提取问题ID"""
-        question_pattern = r'/question/(\d+)'
-        match = re.search(question_pattern, url)
-        if match:
-            return match.group(1)
-        return ""
+        return zhihu_question_id(url)
+
+    def _cache_cookie_check(self, valid: bool):
+        ZhihuCrawler._cookie_check = (self.settings.ZHIHU_COOKIE, time.monotonic(), valid)
 
     async def check_cookie_valid(self, session: aiohttp.ClientSession) -> bool:
-        """检查cookie是否有效"""
+        """检查cookie是否有效，结果在ZHIHU_COOKIE_CHECK_TTL内复用"""
+        cached = ZhihuCrawler._cookie_check
+        if cached:
+            cookie, checked_at, valid = cached
+            if cookie == self.settings.ZHIHU_COOKIE and time.monotonic() - checked_at < self.settings.ZHIHU_COOKIE_CHECK_TTL:
+                return valid
+
         try:
             async with session.get("https://www.zhihu.com/", headers=self.headers) as response:
                 if response.status != 200:
@@ -56,113 +83,72 @@ class ZhihuCrawler:
                 # 如果页面包含登录按钮，说明cookie已失效
                 if "登录" in html and "注册" in html:
                     logger.error("知乎Cookie已失效，请更新Cookie")
+                    self._cache_cookie_check(False)
                     return False
+                self._cache_cookie_check(True)
                 return True
         except Exception as e:
             logger.error(f"检查Cookie有效性时出错: {str(e)}", exc_info=True)
             return False
 
-    async def fetch_hot_topics(self) -> List[Dict[str, Any]]:
-        """获取知乎热搜话题"""
+    def parse_hot_topics(self, html: str) -> List[Dict[str, Any]]:
+        """从热榜页面中解析热搜话题"""
+        hot_topics = []
+        for entry in self.extractor.extract(html):
+            # 如果href为空，尝试从父元素获取
+            href = entry["href"] or entry["parent_href"]
+
+            # 确保链接是完整的问题链接
+            if href.startswith('/'):
+                href = f"https://www.zhihu.com{href}"
+
+            hot_topics.append({
+                "title": entry["title"],
+                "url": href,
+                "source": "zhihu",
+                "rank": entry["rank"],
+                "hot_value": entry["hot_value"]
+            })
+        # 规范化阶段会提取问题ID并构建标准问题链接
+        return self.canonicalize_topics(hot_topics)
+
+    async def fetch_hot_topics(self, session: Optional[aiohttp.ClientSession] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        获取知乎热搜话题，未传入session时使用临时客户端
+        热榜未变化时返回None
+        """
+        if session is None:
+            async with create_crawl_session() as session:
+                return await self.fetch_hot_topics(session)
+
         try:
             logger.info("开始获取知乎热搜...")
-            async with aiohttp.ClientSession() as session:
-                # 首先检查cookie是否有效
-                if not await self.check_cookie_valid(session):
-                    return []
-
-                async with session.get(self.url, headers=self.headers) as response:
-                    if response.status != 200:
-                        logger.error(f"获取知乎热搜失败: HTTP {response.status}")
-                        return []
-                        
-                    html = await response.text()
-                    logger.info(f"知乎响应状态码: {response.status}")
-                    logger.debug(f"知乎响应内容: {html[:500]}...")
-                    
-                    # 检查是否需要登录
-                    if "登录" in html and "注册" in html:
-                        logger.error("知乎Cookie已失效，请更新Cookie")
-                        return []
-            
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # 调试信息：打印所有可能的类名
-            all_classes = set()
-            for tag in soup.find_all(class_=True):
-                all_classes.update(tag['class'])
-            logger.info(f"页面中所有的类名: {all_classes}")
-            
-            # 尝试不同的选择器
-            items = soup.select('.HotList-item')
-            if not items:
-                items = soup.select('.HotItem')
-            if not items:
-                items = soup.select('[data-zop-itemid]')
-            if not items:
-                items = soup.select('.HotList-item')
-            
-            logger.info(f"找到热搜条目数: {len(items)}")
-            
-            hot_topics = []
-            for index, item in enumerate(items, 1):
-                # 打印每个item的HTML结构，用于调试
-                logger.debug(f"Item {index} HTML: {item}")
-                
-                # 尝试不同的标题选择器
-                title_element = (
-                    item.select_one('.HotList-itemTitle') or 
-                    item.select_one('.HotItem-title') or
-                    item.select_one('.HotItem-content') or
-                    item.select_one('a')
-                )
-                
-                if title_element:
-                    # 打印找到的标题元素，用于调试
-                    logger.debug(f"Title element found: {title_element}")
-                    logger.debug(f"Title element attrs: {title_element.attrs}")
-                    logger.debug(f"Title element parent: {title_element.parent}")
-                    
-                    # 获取链接
-                    href = title_element.get('href', '')
-                    logger.debug(f"Original href: {href}")
-                    
-                    # 如果href为空，尝试从父元素获取
-                    if not href and title_element.parent:
-                        href = title_element.parent.get('href', '')
-                        logger.debug(f"Parent href: {href}")
-                    
-                    # 确保链接是完整的问题链接
-                    if href.startswith('/'):
-                        href = f"https://www.zhihu.com{href}"
-                    
-                    # 提取问题ID并构建标准问题链接
-                    question_id = self.extract_question_id(href)
-                    if question_id:
-                        href = f"https://www.zhihu.com/question/{question_id}"
-                    
-                    logger.debug(f"Final href: {href}")
-                    
-                    # 获取热度值
-                    hot_value = ""
-                    metrics_element = (
-                        item.select_one('.HotList-itemMetrics') or 
-                        item.select_one('.HotItem-metrics') or
-                        item.select_one('.HotItem-meta')
-                    )
-                    if metrics_element:
-                        hot_value = metrics_element.text.strip()
-                    
-                    hot_topic = {
-                        "title": title_element.text.strip(),
-                        "url": href,
-                        "source": "zhihu",
-                        "rank": index,
-                        "hot_value": hot_value
-                    }
-                    hot_topics.append(hot_topic)
-                    logger.debug(f"已添加热搜: {hot_topic['title']} - {hot_topic['url']}")
+            # 首先检查cookie是否有效
+            if not await self.check_cookie_valid(session):
+                return []
+
+            page = await self.fetch_page(session, self.url, self.headers)
+            if page is None:
+                return None
+            if page.status != 200:
+                logger.error(f"获取知乎热搜失败: HTTP {page.status}")
+                return []
+
+            html = page.html
+            logger.info(f"知乎响应状态码: {page.status}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"知乎响应内容: {html[:500]}...")
+
+            # 检查是否需要登录
+            if "登录" in html and "注册" in html:
+                logger.error("知乎Cookie已失效，请更新Cookie")
+                self._cache_cookie_check(False)
+                return []
             
+            hot_topics = self.parse_page(html)
+
+            if hot_topics:
+                self.remember_page(page)
             logger.info(f"成功获取知乎热搜 {len(hot_topics)} 条")
             return hot_topics
         except Exception as e:
@@ -1,9 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import hot_topics
-from app.core.config import get_settings, clear_settings_cache
-from app.core.scheduler import init_scheduler
+from app.routers import hot_topics, metrics
+from app.core.config import get_settings
+from app.core.snapshot_sync import load_initial_state, start_snapshot_sync
+from app.core.events import get_broker
+from app.core.http_client import close_http_client
+from app.core.cities import get_city_index
+from app.core.metrics import MetricsMiddleware, start_metrics_export, stop_metrics_export
+from app.core.ratelimit import RateLimitMiddleware
 from app.api import weather
+import asyncio
 import logging
 
 # 配置日志
@@ -14,19 +20,17 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-# 清除配置缓存并重新加载
-clear_settings_cache()
 settings = get_settings()
 
-# 打印配置值进行调试
-logger.debug(f"Settings: {settings.dict()}")
-
 app = FastAPI(
     title="实时热搜资讯平台",
     description="提供知乎和微博的实时热搜数据",
     version="1.0.0"
 )
 
+# 限流和过载保护，放在CORS之内，被拒绝的响应也带有跨域头
+app.add_middleware(RateLimitMiddleware)
+
 # 配置CORS
 app.add_middleware(
     CORSMiddleware,
@@ -36,23 +40,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 记录请求耗时，放在最外层以包含其他中间件的耗时
+app.add_middleware(MetricsMiddleware)
+
 # 注册路由
 app.include_router(hot_topics.router, prefix="/api/v1", tags=["hot_topics"])
 app.include_router(weather.router, prefix="/api/v1", tags=["weather"])
+app.include_router(metrics.router)
 
-# 初始化调度器
+# 快照轮询和内嵌模式下的抓取调度器
+snapshot_sync = None
 scheduler = None
 
 @app.on_event("startup")
 async def startup_event():
-    global scheduler
-    scheduler = init_scheduler()
+    global snapshot_sync, scheduler
+    # 先用数据库中已有的数据构建快照，避免请求全部落到数据库；搜索索引在后台构建
+    snapshot = load_initial_state()
+    # 轮询线程在后台发布变化，需要知道事件循环才能转交给订阅者
+    get_broker().bind(asyncio.get_running_loop(), snapshot.generation if snapshot else 0)
+    # 预先加载城市索引，天气接口首次请求不必等待读文件
+    get_city_index()
+    start_metrics_export()
+    # 抓取进程写入的新批次通过轮询加载
+    snapshot_sync = start_snapshot_sync()
+    if settings.CRAWLER_EMBEDDED:
+        # 延迟导入，独立部署抓取进程时API进程不加载爬虫及其依赖
+        from app.core.scheduler import init_scheduler
+        scheduler = init_scheduler(apply_locally=True)
 
 @app.on_event("shutdown")
 async def shutdown_event():
     if scheduler:
-        scheduler.shutdown()
+        from app.core.scheduler import shutdown_scheduler
+        shutdown_scheduler(scheduler)
+    if snapshot_sync:
+        snapshot_sync.shutdown()
+    get_broker().close()
+    await close_http_client()
+    stop_metrics_export()
 
 @app.get("/")
 async def root():
-    return {"message": "Welcome to Hot News API"} 
\ No newline at end of file
+    return {"message": "Welcome to Hot News API"}
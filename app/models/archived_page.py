@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Index
+from app.core.database import Base
+from app.models.hot_topic import SOURCES
+
+class ArchivedPage(Base):
+    """
+    抓取到的热榜页面索引，页面内容按哈希存放在本地归档目录中
+    话题写入某个批次后记录批次号和历史记录时间，重新解析时据此替换对应的历史记录；
+    解析失败未入库的页面两者为空，重新解析时按抓取时间补写历史
+    """
+    __tablename__ = "archived_pages"
+    __table_args__ = (
+        Index('idx_fetched_at', 'fetched_at'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source = Column(Enum(*SOURCES), nullable=False)
+    fetched_at = Column(DateTime, nullable=False)
+    digest = Column(String(64), nullable=False)
+    size = Column(Integer, nullable=False)
+    generation = Column(Integer, nullable=True)
+    crawled_at = Column(DateTime, nullable=True)
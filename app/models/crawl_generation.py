@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, DateTime, Enum
+from datetime import datetime
+from app.core.database import Base
+
+class CrawlGeneration(Base):
+    """
+    抓取批次
+    每次入库生成一个新批次，提交后状态为published，读取方始终只读最新的已发布批次
+    """
+    __tablename__ = "crawl_generations"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    status = Column(Enum('pending', 'published'), nullable=False, default='pending')
+    topic_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    published_at = Column(DateTime, nullable=True)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, DateTime, JSON
+from datetime import datetime
+from app.core.database import Base
+
+class GenerationChange(Base):
+    """
+    每个批次相对上一批次的榜单变化，入库时计算一次
+    changes为app.core.changes.compact_changes的结果：新上榜、下榜、排名变化和热度变化
+    """
+    __tablename__ = "generation_changes"
+
+    generation = Column(Integer, primary_key=True, autoincrement=False)
+    previous_generation = Column(Integer, nullable=False)
+    changes = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
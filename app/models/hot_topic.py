@@ -1,15 +1,32 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum
+from sqlalchemy import Column, BigInteger, Integer, Float, String, DateTime, Enum, Index
 from datetime import datetime
 from app.core.database import Base
 
+# 支持的热搜来源
+SOURCES = ('zhihu', 'weibo')
+
 class HotTopic(Base):
     __tablename__ = "hot_topics"
+    __table_args__ = (
+        # 与路由中按批次、来源过滤再按排名排序的查询一致
+        Index('idx_generation_source_rank', 'generation', 'source', 'rank'),
+        # 按热度排序和过滤
+        Index('idx_generation_heat', 'generation', 'heat'),
+        # 跨来源综合榜单
+        Index('idx_generation_global_rank', 'generation', 'global_rank'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    generation = Column(Integer, nullable=False, default=0)
+    topic_key = Column(BigInteger, nullable=True, index=True)
     title = Column(String(255), nullable=False)
     url = Column(String(512), nullable=False)
-    source = Column(Enum('zhihu', 'weibo'), nullable=False)
+    source = Column(Enum(*SOURCES), nullable=False)
     rank = Column(Integer, nullable=False)
     hot_value = Column(String(50), nullable=True)
+    heat = Column(BigInteger, nullable=True)
+    heat_label = Column(String(32), nullable=True)
+    score = Column(Float, nullable=True)
+    global_rank = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) 
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, DateTime
+from app.core.database import Base
+
+class SchedulerLock(Base):
+    """
+    调度任务的租约锁
+    多个worker竞争同一行，持有未过期租约的worker为主节点，负责执行抓取；
+    主节点退出后租约过期，其他worker接管
+    """
+    __tablename__ = "scheduler_locks"
+
+    name = Column(String(64), primary_key=True)
+    owner = Column(String(128), nullable=False)
+    acquired_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
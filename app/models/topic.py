@@ -0,0 +1,20 @@
+from sqlalchemy import Column, BigInteger, String, DateTime, Enum, Index
+from app.core.database import Base
+from app.models.hot_topic import SOURCES
+
+class Topic(Base):
+    """
+    话题维表，每个稳定话题一行
+    "是否为新话题"、历史关联和去重都通过整数主键topic_key完成
+    """
+    __tablename__ = "topics"
+    __table_args__ = (
+        Index('idx_last_seen_at', 'last_seen_at'),
+    )
+
+    topic_key = Column(BigInteger, primary_key=True, autoincrement=False)
+    source = Column(Enum(*SOURCES), nullable=False)
+    title = Column(String(255), nullable=False)
+    url = Column(String(512), nullable=False)
+    first_seen_at = Column(DateTime, nullable=False)
+    last_seen_at = Column(DateTime, nullable=False)
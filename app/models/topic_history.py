@@ -0,0 +1,21 @@
+from sqlalchemy import Column, BigInteger, Integer, SmallInteger, DateTime, Enum, Index
+from app.core.database import Base
+from app.models.hot_topic import SOURCES
+
+class TopicHistory(Base):
+    """
+    话题排名历史，只追加
+    每次抓取每个话题一行，主键(topic_key, crawled_at)使同一话题的记录在InnoDB中物理相邻，
+    按话题查询时间范围只需一次主键范围扫描
+    """
+    __tablename__ = "topic_history"
+    __table_args__ = (
+        Index('idx_crawled_at', 'crawled_at'),
+    )
+
+    topic_key = Column(BigInteger, primary_key=True, autoincrement=False)
+    crawled_at = Column(DateTime, primary_key=True)
+    generation = Column(Integer, nullable=False)
+    source = Column(Enum(*SOURCES), nullable=False)
+    rank = Column(SmallInteger, nullable=False)
+    heat = Column(BigInteger, nullable=True)
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, BigInteger, Integer, SmallInteger, DateTime, Enum, Index
+from app.core.database import Base
+from app.models.hot_topic import SOURCES
+
+class RollupColumns:
+    """
+    汇总历史的公共字段，每个话题每个时间段一行
+    - best_rank: 时间段内的最高排名
+    - peak_heat: 时间段内的最高热度
+    - samples: 汇总的原始记录数
+    - on_list_seconds: 在榜时长，每条原始记录计为到该来源下一次抓取的间隔（不超过最长抓取间隔）
+    """
+    topic_key = Column(BigInteger, primary_key=True, autoincrement=False)
+    bucket_start = Column(DateTime, primary_key=True)
+    source = Column(Enum(*SOURCES), nullable=False)
+    best_rank = Column(SmallInteger, nullable=False)
+    peak_heat = Column(BigInteger, nullable=True)
+    samples = Column(Integer, nullable=False)
+    on_list_seconds = Column(Integer, nullable=False)
+
+class TopicHistoryHourly(RollupColumns, Base):
+    """按小时汇总的话题历史，由超过保留期的原始历史汇总而来"""
+    __tablename__ = "topic_history_hourly"
+    __table_args__ = (
+        Index('idx_hourly_bucket_start', 'bucket_start'),
+    )
+
+class TopicHistoryDaily(RollupColumns, Base):
+    """按天汇总的话题历史，由超过保留期的小时汇总而来"""
+    __tablename__ = "topic_history_daily"
+    __table_args__ = (
+        Index('idx_daily_bucket_start', 'bucket_start'),
+    )
@@ -0,0 +1,243 @@
+"""
+重新解析归档的热榜页面并补写历史：
+    python -m app.reparse --since 2026-09-01 [--until 2026-09-08] [--source weibo] [--workers 8] [--dry-run]
+
+用当前的解析规则在进程池中解析时间范围内（UTC）的归档页面，内容相同的页面只解析一次。
+每批页面解析完成后替换这些页面对应时间点的历史记录，写库的同时解析下一批。
+--dry-run只统计解析结果，不写数据库，可以先确认新规则的解析效果。
+超过HISTORY_RAW_DAYS的历史已汇总进小时/天表，汇总按累加合并，不能只替换其中一次抓取：
+这些页面所在的汇总时间段用该来源在此时间段内的全部归档页面整段重建，与原始记录的替换在同一事务中提交。
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from app.core.archive import PageArchive, get_archive
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.core.ingest import backfill_history, backfill_topics, note_seen, page_history
+from app.core.rollup import floor_time, replace_bucket, rollup_step
+from app.crawlers.weibo_crawler import WeiboCrawler
+from app.crawlers.zhihu_crawler import ZhihuCrawler
+from app.models.archived_page import ArchivedPage
+from app.models.hot_topic import SOURCES
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(funcName)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+# 各来源的解析器，直接引用爬虫类，解析进程不必导入调度器
+PARSERS = {
+    'zhihu': ZhihuCrawler,
+    'weibo': WeiboCrawler
+}
+
+# 历史记录时间为批次发布时间，晚于页面的抓取时间；按历史记录时间查找页面时向前放宽的范围
+PUBLISH_SLACK = timedelta(minutes=30)
+
+# 解析进程中的归档和爬虫实例，每个进程初始化一次
+_archive: Optional[PageArchive] = None
+_crawlers: Dict[str, object] = {}
+
+def _init_worker(root: str):
+    global _archive
+    # 逐页的解析日志太多，只保留警告
+    logging.getLogger().setLevel(logging.WARNING)
+    _archive = PageArchive(root)
+
+def parse_archived(job: Tuple[str, str]) -> Tuple[str, Optional[List[dict]]]:
+    """在解析进程中读取并解析一个归档页面，文件缺失或解析出错时返回None"""
+    source, digest = job
+    crawler = _crawlers.get(source)
+    if crawler is None:
+        crawler = _crawlers[source] = PARSERS[source]()
+    try:
+        # parse_hot_topics返回的话题已经规范化
+        topics = crawler.parse_hot_topics(_archive.get(digest))
+    except Exception as e:
+        logger.warning(f"解析归档页面{digest}失败：{str(e)}")
+        return digest, None
+    # 只传回写库需要的字段，减少进程间序列化的开销
+    return digest, [
+        {key: topic.get(key) for key in ('topic_key', 'title', 'url', 'rank', 'hot_value')}
+        for topic in topics
+    ]
+
+def iter_pages(since: datetime, until: datetime, sources: List[str], batch_size: int) -> Iterator[list]:
+    """按ID分页读取时间范围内的归档页面"""
+    last_id = 0
+    while True:
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(ArchivedPage.id, ArchivedPage.source, ArchivedPage.digest,
+                       ArchivedPage.fetched_at, ArchivedPage.crawled_at, ArchivedPage.generation)
+                .where(ArchivedPage.id > last_id,
+                       ArchivedPage.fetched_at >= since,
+                       ArchivedPage.fetched_at < until,
+                       ArchivedPage.source.in_(sources))
+                .order_by(ArchivedPage.id)
+                .limit(batch_size)
+            ).all()
+        finally:
+            db.close()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+def _bucket_crawls(db, pool, parsed: Dict[str, Optional[List[dict]]], source: str,
+                   step: timedelta, bucket_start: datetime) -> Optional[List[Tuple[datetime, Dict[int, dict]]]]:
+    """
+    读取并解析一个来源在汇总时间段内的全部归档页面，返回按时间排序的(抓取时间, 按topic_key去重的历史行)
+    本批之外的页面（时间段跨批次或超出--since/--until）在进程池中补充解析；有页面解析失败时返回None
+    """
+    end = bucket_start + step
+    rows = db.execute(
+        select(ArchivedPage.digest, ArchivedPage.fetched_at, ArchivedPage.crawled_at, ArchivedPage.generation)
+        .where(ArchivedPage.source == source,
+               ArchivedPage.fetched_at >= bucket_start - PUBLISH_SLACK,
+               ArchivedPage.fetched_at < end)
+    ).all()
+    pages = {}
+    for row in rows:
+        crawled_at = row.crawled_at or row.fetched_at
+        if bucket_start <= crawled_at < end:
+            pages[crawled_at] = row
+    missing = list({row.digest for row in pages.values() if row.digest not in parsed})
+    if missing:
+        parsed = {**parsed, **dict(pool.map(parse_archived, [(source, digest) for digest in missing]))}
+    crawls = []
+    for crawled_at in sorted(pages):
+        topics = parsed.get(pages[crawled_at].digest)
+        if topics is None:
+            return None
+        crawls.append((crawled_at, page_history(source, pages[crawled_at].generation or 0, topics)))
+    return crawls
+
+def _following_crawl(db, source: str, end: datetime, max_gap: timedelta) -> Optional[datetime]:
+    """该来源在end之后max_gap以内的下一次抓取时间，用于计算时间段内最后一次抓取的在榜时长"""
+    rows = db.execute(
+        select(ArchivedPage.fetched_at, ArchivedPage.crawled_at)
+        .where(ArchivedPage.source == source,
+               ArchivedPage.fetched_at >= end - PUBLISH_SLACK,
+               ArchivedPage.fetched_at < end + max_gap)
+    ).all()
+    times = [row.crawled_at or row.fetched_at for row in rows]
+    return min((t for t in times if t >= end), default=None)
+
+def write_batch(pages: list, parsed: Dict[str, Optional[List[dict]]], dry_run: bool, stats: dict,
+                pool, rebuilt: Set[Tuple[str, datetime]]):
+    """
+    统计一批页面的解析结果，非dry-run时替换对应的历史记录
+    仍为原始记录的页面逐个替换；已汇总的页面按(来源, 时间段)整段重建汇总，rebuilt记录已重建的时间段
+    """
+    entries = []
+    buckets = {}
+    for page in pages:
+        topics = parsed.get(page.digest)
+        if topics is None:
+            stats["failed_pages"] += 1
+            continue
+        if not topics:
+            stats["empty_pages"] += 1
+        stats["topics"] += len(topics)
+        # 历史记录以发布批次的时间为准，没有关联批次的页面用抓取时间
+        crawled_at = page.crawled_at or page.fetched_at
+        step = rollup_step(crawled_at)
+        if step is None:
+            entries.append((page.source, crawled_at, page.generation or 0, topics))
+            continue
+        bucket = (page.source, floor_time(crawled_at, step))
+        if bucket not in rebuilt:
+            buckets[bucket] = step
+    if dry_run or not (entries or buckets):
+        return
+    max_gap = timedelta(minutes=get_settings().CRAWL_MAX_INTERVAL)
+    db = SessionLocal()
+    try:
+        if entries:
+            stats["history_rows"] += backfill_history(db, entries)
+        seen = {}
+        for (source, bucket_start), step in buckets.items():
+            crawls = _bucket_crawls(db, pool, parsed, source, step, bucket_start)
+            if crawls is None:
+                # 时间段内有页面解析失败时无法完整重建，保留原有汇总
+                stats["failed_buckets"] += 1
+                continue
+            following = _following_crawl(db, source, bucket_start + step, max_gap)
+            stats["rollup_rows"] += replace_bucket(db, source, step, bucket_start, crawls, following, max_gap)
+            stats["rebuilt_buckets"] += 1
+            for crawled_at, unique in crawls:
+                note_seen(seen, unique, crawled_at)
+        if seen:
+            backfill_topics(db, seen)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    rebuilt.update(buckets)
+
+def main(since: datetime, until: datetime, sources: List[str], workers: int,
+         batch_size: int, dry_run: bool) -> dict:
+    archive = get_archive()
+    if archive is None:
+        raise SystemExit("未配置ARCHIVE_DIR，没有可重新解析的页面")
+
+    stats = {"pages": 0, "parsed_pages": 0, "failed_pages": 0, "empty_pages": 0, "topics": 0,
+             "history_rows": 0, "rebuilt_buckets": 0, "failed_buckets": 0, "rollup_rows": 0}
+    # 已重建的汇总时间段，跨批次的时间段只重建一次
+    rebuilt: Set[Tuple[str, datetime]] = set()
+    # 相邻批次中常有内容相同的页面，沿用上一批的解析结果
+    parsed: Dict[str, Optional[List[dict]]] = {}
+    pending = None
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(archive.root,)) as pool:
+        for pages in iter_pages(since, until, sources, batch_size):
+            known = {page.digest: parsed[page.digest] for page in pages if page.digest in parsed}
+            jobs = list({page.digest: (page.source, page.digest) for page in pages
+                         if page.digest not in known}.values())
+            stats["pages"] += len(pages)
+            stats["parsed_pages"] += len(jobs)
+            # 先提交本批的解析任务，再写上一批，解析和写库并行
+            results = pool.map(parse_archived, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+            if pending:
+                write_batch(*pending, dry_run, stats, pool, rebuilt)
+            known.update(results)
+            parsed = known
+            pending = (pages, parsed)
+            logger.info(f"已解析{stats['pages']}个页面")
+        if pending:
+            write_batch(*pending, dry_run, stats, pool, rebuilt)
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = round(elapsed, 2)
+    stats["pages_per_s"] = round(stats["pages"] / elapsed, 1) if elapsed else 0
+    stats["dry_run"] = dry_run
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.reparse", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--since", type=datetime.fromisoformat, required=True, help="起始抓取时间（UTC，含）")
+    parser.add_argument("--until", type=datetime.fromisoformat, default=None, help="结束抓取时间（UTC，不含），默认到现在")
+    parser.add_argument("--source", choices=SOURCES, action="append", help="只处理指定来源，可重复，默认全部")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="解析进程数，默认CPU核数")
+    parser.add_argument("--batch-size", type=int, default=500, help="每批读取和写入的页面数")
+    parser.add_argument("--dry-run", action="store_true", help="只统计解析结果，不写数据库")
+    args = parser.parse_args()
+    result = main(args.since, args.until or datetime.utcnow(), args.source or list(SOURCES),
+                  args.workers, args.batch_size, args.dry_run)
+    print(json.dumps(result, ensure_ascii=False))
@@ -1,47 +1,270 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from app.models.hot_topic import HotTopic
-from app.core.database import get_db
-from app.schemas.hot_topic import HotTopicResponse
+from app.models.topic import Topic
+from app.models.topic_history import TopicHistory
+from app.models.topic_history_rollup import TopicHistoryDaily, TopicHistoryHourly
+from app.core.database import ReadSessionProvider, get_read_db, open_read_session
+from app.core.ingest import current_generation_query, load_changes
+from app.core.search_index import get_search_index
+from app.core.events import get_broker
+from app.core.rollup import RESOLUTIONS, choose_resolution, floor_time, merge_points
+from app.core.snapshot import GLOBAL_VIEW, SnapshotView, get_snapshot
+from app.schemas.hot_topic import HotTopicResponse, TopicChangesResponse, TopicHistoryResponse, TopicSearchResult
 
 router = APIRouter()
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """判断If-None-Match是否命中当前ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def _snapshot_response(request: Request, view: SnapshotView) -> Response:
+    """根据快照视图构造响应，支持304和gzip"""
+    headers = {
+        "ETag": view.etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding"
+    }
+    if _etag_matches(request.headers.get("if-none-match"), view.etag):
+        return Response(status_code=304, headers=headers)
+
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        body = view.gzip_body
+    else:
+        body = view.body
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def _query_topics(
+    db: AsyncSession,
+    source: Optional[str],
+    limit: int,
+    order_by: str = "rank",
+    min_heat: Optional[int] = None
+) -> List[HotTopic]:
+    """从数据库查询热搜话题"""
+    query = select(HotTopic).where(HotTopic.generation == current_generation_query())
+    if source:
+        query = query.where(HotTopic.source == source)
+    if min_heat is not None:
+        query = query.where(HotTopic.heat >= min_heat)
+    if order_by == "heat":
+        query = query.order_by(HotTopic.heat.desc(), HotTopic.rank)
+    elif order_by == "score":
+        query = query.order_by(HotTopic.global_rank)
+    else:
+        query = query.order_by(HotTopic.rank)
+    result = await db.execute(query.limit(limit))
+    return list(result.scalars().all())
+
 @router.get("/hot-topics", response_model=List[HotTopicResponse])
 async def get_hot_topics(
+    request: Request,
     source: str = None,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    order_by: str = Query("rank", pattern="^(rank|heat|score)$"),
+    min_heat: Optional[int] = None,
+    reader: ReadSessionProvider = Depends(get_read_db)
 ):
     """
     获取热搜话题列表
     - source: 可选，来源（zhihu/weibo）
     - limit: 可选，返回数量限制
+    - order_by: 可选，排序方式（rank/heat/score），默认按排名
+    - min_heat: 可选，最低热度
     """
-    query = db.query(HotTopic)
-    if source:
-        query = query.filter(HotTopic.source == source)
-    
-    topics = query.order_by(HotTopic.rank).limit(limit).all()
-    return topics
+    snapshot = get_snapshot()
+    if snapshot is not None and order_by == "rank" and min_heat is None:
+        return _snapshot_response(request, snapshot.render(source, limit))
+
+    return await _query_topics(await reader.get(), source, limit, order_by, min_heat)
+
+@router.get("/hot-topics/stream")
+async def stream_hot_topic_changes(
+    request: Request,
+    last_event_id: Optional[int] = None
+):
+    """
+    以Server-Sent Events推送每次抓取的热搜变化
+    - last_event_id: 可选，上次收到的批次号，也可通过Last-Event-ID请求头传入；
+      能续传时补发错过的变化，否则推送reset事件，客户端应重新拉取全量
+    """
+    header = request.headers.get("last-event-id")
+    if header and header.isdigit():
+        last_event_id = int(header)
+
+    stream = get_broker().open_stream(last_event_id)
+    if stream is None:
+        raise HTTPException(status_code=503, detail="Too many subscribers")
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/hot-topics/changes", response_model=TopicChangesResponse)
+async def get_hot_topic_changes(
+    since: int = Query(..., ge=0),
+    reader: ReadSessionProvider = Depends(get_read_db)
+):
+    """
+    获取某个批次之后的榜单变化，多个批次的变化合并为从since到最新批次的净变化
+    - since: 客户端已有数据的批次号；该批次之后的变化已被清理，或since不是已发布的批次时返回410，客户端应重新拉取全量
+    """
+    db = await reader.get()
+    latest = (await db.execute(select(current_generation_query()))).scalar_one()
+    if since > latest:
+        # 只读副本落后于本进程已加载的快照时，客户端的批次号仍然有效，只是暂时没有新的变化
+        snapshot = get_snapshot()
+        if snapshot is None or since > snapshot.generation:
+            raise HTTPException(status_code=410, detail="Unknown generation")
+        latest = since
+    changes = await db.run_sync(load_changes, since, latest)
+    if changes is None:
+        raise HTTPException(status_code=410, detail="Changes since this generation are no longer available")
+    return {"since": since, "generation": latest, **changes}
+
+@router.get("/hot-topics/search", response_model=List[TopicSearchResult])
+async def search_hot_topics(
+    q: str = Query(..., min_length=2, max_length=64),
+    source: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100)
+):
+    """
+    按标题搜索当前和近期的热搜话题
+    - q: 搜索词，至少两个字
+    - source: 可选，来源（zhihu/weibo）
+    - limit: 可选，返回数量限制
+    """
+    if source and source not in ['zhihu', 'weibo']:
+        raise HTTPException(status_code=400, detail="Invalid source")
+
+    return get_search_index().search(q, source, limit)
+
+@router.get("/hot-topics/global", response_model=List[HotTopicResponse])
+async def get_global_hot_topics(
+    request: Request,
+    limit: int = 50,
+    reader: ReadSessionProvider = Depends(get_read_db)
+):
+    """
+    获取跨来源综合热榜，按每次抓取时预先计算的综合得分排序
+    - limit: 可选，返回数量限制
+    """
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        return _snapshot_response(request, snapshot.render(GLOBAL_VIEW, limit))
+
+    return await _query_topics(await reader.get(), None, limit, "score")
 
 @router.get("/hot-topics/{source}", response_model=List[HotTopicResponse])
 async def get_hot_topics_by_source(
+    request: Request,
     source: str,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    order_by: str = Query("rank", pattern="^(rank|heat|score)$"),
+    min_heat: Optional[int] = None,
+    reader: ReadSessionProvider = Depends(get_read_db)
 ):
     """
     获取指定来源的热搜话题
     - source: 来源（zhihu/weibo）
     - limit: 可选，返回数量限制
+    - order_by: 可选，排序方式（rank/heat/score），默认按排名
+    - min_heat: 可选，最低热度
     """
     if source not in ['zhihu', 'weibo']:
         raise HTTPException(status_code=400, detail="Invalid source")
-    
-    topics = db.query(HotTopic)\
-        .filter(HotTopic.source == source)\
-        .order_by(HotTopic.rank)\
-        .limit(limit)\
-        .all()
-    return topics 
\ No newline at end of file
+
+    snapshot = get_snapshot()
+    if snapshot is not None and order_by == "rank" and min_heat is None:
+        return _snapshot_response(request, snapshot.render(source, limit))
+
+    return await _query_topics(await reader.get(), source, limit, order_by, min_heat)
+
+async def _topic_history(
+    db: AsyncSession,
+    topic: Optional[Topic],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    resolution: Optional[str] = None
+) -> dict:
+    """查询话题在时间范围内的排名和热度"""
+    if topic is None:
+        raise HTTPException(status_code=404, detail="Topic not found")
+
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(hours=24)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be earlier than end")
+
+    key = topic.topic_key
+    resolution = resolution or choose_resolution(start, end)
+    step = RESOLUTIONS[resolution]
+    # 按小时或天查询时从所在时间段的开始读取，第一个时间段的数据才完整
+    since = floor_time(start, step) if step else start
+    result = await db.execute(
+        select(TopicHistory.crawled_at, TopicHistory.rank, TopicHistory.heat)
+        .where(
+            TopicHistory.topic_key == key,
+            TopicHistory.crawled_at >= since,
+            TopicHistory.crawled_at < end
+        )
+        .order_by(TopicHistory.crawled_at)
+    )
+    if step is None:
+        points = result.mappings().all()
+    else:
+        # 较早的数据已汇总，与尚未汇总的原始记录一起对齐到所选粒度
+        points = [{**row, "samples": 1, "on_list_seconds": None} for row in result.mappings()]
+        for model in (TopicHistoryHourly, TopicHistoryDaily):
+            rollup = await db.execute(
+                select(model.bucket_start.label("crawled_at"), model.best_rank.label("rank"),
+                       model.peak_heat.label("heat"), model.samples, model.on_list_seconds)
+                .where(model.topic_key == key, model.bucket_start >= since, model.bucket_start < end)
+            )
+            points.extend(dict(row) for row in rollup.mappings())
+        points = merge_points(points, step)
+    return {
+        "topic_key": key,
+        "title": topic.title,
+        "source": topic.source,
+        "start": start,
+        "end": end,
+        "resolution": resolution,
+        "points": points
+    }
+
+@router.get("/hot-topics/{key}/history", response_model=TopicHistoryResponse)
+async def get_topic_history(
+    key: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    resolution: Optional[str] = Query(None, pattern="^(raw|hour|day)$"),
+    reader: ReadSessionProvider = Depends(get_read_db)
+):
+    """
+    获取话题的排名和热度变化
+    - key: 话题的topic_key，跨批次保持不变，可从列表、搜索结果和变化推送中取得
+    - start: 可选，开始时间，默认为结束时间前24小时
+    - end: 可选，结束时间，默认为当前时间
+    - resolution: 可选，粒度（raw/hour/day），默认按时间窗口选择：
+      两天内返回每次抓取的记录，一个月内按小时，更长按天；按小时或天时每个点为该时间段的最高排名和最高热度
+    """
+    db = await reader.get()
+    topic = await db.get(Topic, key)
+    if topic is None and db.info.get("replica"):
+        # 话题可能首次出现在副本尚未同步的最新批次中，改读主库
+        primary = await open_read_session(require_primary=True)
+        try:
+            return await _topic_history(primary, await primary.get(Topic, key), start, end, resolution)
+        finally:
+            await primary.close()
+    return await _topic_history(db, topic, start, end, resolution)
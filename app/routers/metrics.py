@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from app.core.metrics import CONTENT_TYPE, render_metrics
+
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """
+    Prometheus格式的监控指标
+    配置了METRICS_DIR时合并所有worker进程的数据，读文件在线程池中执行
+    """
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
@@ -1,6 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, PlainSerializer
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, List, Optional
+
+# topic_key是64位整数，超出JavaScript Number能精确表示的范围，JSON中输出为字符串
+TopicKey = Annotated[int, PlainSerializer(str, return_type=str, when_used="json")]
 
 class HotTopicBase(BaseModel):
     title: str
@@ -8,14 +11,87 @@ class HotTopicBase(BaseModel):
     source: str
     rank: int
     hot_value: Optional[str] = None
+    heat: Optional[int] = None
+    heat_label: Optional[str] = None
+    score: Optional[float] = None
+    global_rank: Optional[int] = None
 
 class HotTopicCreate(HotTopicBase):
     pass
 
 class HotTopicResponse(HotTopicBase):
     id: int
+    topic_key: Optional[TopicKey] = None
     created_at: datetime
     updated_at: datetime
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+class TopicHistoryPoint(BaseModel):
+    crawled_at: datetime
+    rank: int
+    heat: Optional[int] = None
+    samples: Optional[int] = None
+    on_list_seconds: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+class TopicHistoryResponse(BaseModel):
+    topic_key: TopicKey
+    title: str
+    source: str
+    start: datetime
+    end: datetime
+    resolution: str = "raw"
+    points: List[TopicHistoryPoint]
+
+class TopicSearchResult(BaseModel):
+    topic_key: TopicKey
+    title: str
+    url: str
+    source: str
+    heat: Optional[int] = None
+    rank: Optional[int] = None
+    id: Optional[int] = None
+    match: float
+
+class NewTopicChange(BaseModel):
+    topic_key: TopicKey
+    title: str
+    url: str
+    source: str
+    rank: int
+    global_rank: Optional[int] = None
+    hot_value: Optional[str] = None
+    heat: Optional[int] = None
+    heat_label: Optional[str] = None
+
+class DroppedTopicChange(BaseModel):
+    topic_key: TopicKey
+    previous_rank: int
+
+class MovedTopicChange(BaseModel):
+    topic_key: TopicKey
+    # 早期保存的变化集合中没有来源
+    source: Optional[str] = None
+    rank: int
+    previous_rank: int
+    global_rank: Optional[int] = None
+
+class HeatTopicChange(BaseModel):
+    topic_key: TopicKey
+    hot_value: Optional[str] = None
+    heat: Optional[int] = None
+    heat_label: Optional[str] = None
+
+class TopicChanges(BaseModel):
+    new: List[NewTopicChange]
+    dropped: List[DroppedTopicChange]
+    moved: List[MovedTopicChange]
+    heat: List[HeatTopicChange]
+
+class TopicChangesResponse(TopicChanges):
+    since: int
+    generation: int
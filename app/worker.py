@@ -0,0 +1,49 @@
+"""
+抓取进程：python -m app.worker
+
+按各来源的自适应间隔抓取热榜并写入新批次，API进程通过轮询数据库加载新批次，
+两者可以分别扩缩容。可以同时运行多个抓取进程，通过数据库租约选出一个主节点执行抓取，
+其余作为热备，主节点退出后自动接管。
+"""
+import logging
+import signal
+import threading
+
+from app.core.config import get_settings
+from app.core.metrics import start_metrics_export, stop_metrics_export
+from app.core.scheduler import init_scheduler, shutdown_scheduler
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(funcName)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+def main():
+    stop = threading.Event()
+
+    def handle_signal(signum, frame):
+        logger.info(f"收到信号{signal.Signals(signum).name}，准备退出")
+        stop.set()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    if get_settings().CRAWLER_EMBEDDED:
+        logger.warning("CRAWLER_EMBEDDED已开启，API进程也会参与抓取主节点选举")
+
+    # 指标写入METRICS_DIR后，由API进程的/metrics合并输出
+    start_metrics_export()
+    scheduler = init_scheduler()
+    try:
+        # 带超时等待，保证信号处理函数能及时执行
+        while not stop.wait(1):
+            pass
+    finally:
+        shutdown_scheduler(scheduler)
+        stop_metrics_export()
+        logger.info("抓取进程已退出")
+
+if __name__ == "__main__":
+    main()
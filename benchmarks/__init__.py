@@ -0,0 +1 @@
+"""离线性能基准测试，python -m benchmarks运行整套并输出JSON结果，各场景的说明见对应脚本"""
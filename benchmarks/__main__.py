@@ -0,0 +1,164 @@
+"""
+运行基准套件，输出JSON结果并可与基线对比
+
+每个场景在独立子进程中运行（各自使用临时数据库和全新的进程内状态），
+结果连同运行环境写入--output；传入--baseline时逐项对比，
+耗时类指标变慢或吞吐类指标下降超过--tolerance时视为退化，退出码为1。
+
+运行：
+    python -m benchmarks --output bench_results.json
+    python -m benchmarks parse crawl --baseline bench_results.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# 场景名 -> (模块, 参数)，参数取各脚本默认值中较快的一组，整套可在几分钟内跑完
+SCENARIOS = {
+    "parse": ("benchmarks.bench_parse", ["--runs", "20"]),
+    "crawl": ("benchmarks.bench_crawl", ["--rounds", "10", "--latency", "0.05"]),
+    "crawl_faulty": ("benchmarks.bench_crawl", ["--rounds", "10", "--latency", "0.05", "--error-rate", "0.2"]),
+    "ingest": ("benchmarks.bench_ingest", ["--rows", "100", "1000", "10000", "--crawls", "3"]),
+    "api": ("benchmarks.bench_api", ["--requests", "1000", "--concurrency", "50"]),
+    "search": ("benchmarks.bench_search", ["--topics", "10000", "--queries", "200"]),
+    "weather": ("benchmarks.bench_weather", ["--requests", "500", "--concurrency", "50"]),
+    "async_db": ("benchmarks.bench_async_db", ["--concurrency", "50", "--rounds", "3"]),
+    "resilience": ("benchmarks.bench_resilience", ["--rounds", "4"]),
+    "metrics": ("benchmarks.bench_metrics", ["--ops", "100000", "--threads", "1", "4"]),
+    "reparse": ("benchmarks.bench_reparse", ["--pages", "200", "--workers", "1", "2"]),
+    "ratelimit": ("benchmarks.bench_ratelimit", ["--ops", "100000"]),
+    "rollup": ("benchmarks.bench_rollup", ["--days", "30", "--topics", "50", "--runs", "20"]),
+}
+
+# 按指标名后缀判断方向：耗时和内存越小越好，吞吐和命中率越大越好
+LOWER_IS_BETTER = ("_ms", "_s", "_ns", "_kib", "_mib")
+HIGHER_IS_BETTER = ("_per_s", "hit_rate")
+
+
+def run_scenario(name: str) -> dict:
+    module, args = SCENARIOS[name]
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-m", module, *args],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8"
+    )
+    elapsed = round(time.perf_counter() - start, 1)
+    if completed.returncode != 0:
+        tail = completed.stderr.strip().splitlines()[-5:]
+        return {"error": f"exit code {completed.returncode}", "stderr": tail, "elapsed_s": elapsed}
+    return {"result": json.loads(completed.stdout), "elapsed_s": elapsed}
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(value, prefix: str = "") -> Dict[str, float]:
+    """把嵌套结果展开为"a.b.c" -> 数值"""
+    if isinstance(value, dict):
+        items = {}
+        for key, child in value.items():
+            items.update(flatten(child, f"{prefix}.{key}" if prefix else str(key)))
+        return items
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: float(value)}
+    return {}
+
+
+def direction(key: str) -> int:
+    """1表示越大越好，-1表示越小越好，0表示不参与对比"""
+    leaf = key.rsplit(".", 1)[-1]
+    if leaf.endswith(HIGHER_IS_BETTER):
+        return 1
+    if leaf.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[dict]:
+    """返回相对基线变化超过容差的指标，regression为True表示退化"""
+    changes = []
+    for name, entry in current.items():
+        base_entry = baseline.get(name)
+        if not base_entry or "result" not in entry or "result" not in base_entry:
+            continue
+        base_values = flatten(base_entry["result"])
+        for key, value in flatten(entry["result"]).items():
+            sign = direction(key)
+            base = base_values.get(key)
+            if not sign or not base:
+                continue
+            change = (value - base) / base
+            if abs(change) > tolerance:
+                changes.append({
+                    "metric": f"{name}.{key}",
+                    "baseline": base,
+                    "current": value,
+                    "change": round(change, 3),
+                    "regression": change * sign < 0,
+                })
+    return changes
+
+
+def main(names: List[str], output: Optional[str], baseline: Optional[str], tolerance: float) -> int:
+    results = {}
+    for name in names:
+        print(f"running {name} ...", file=sys.stderr)
+        results[name] = run_scenario(name)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "scenarios": results,
+    }
+    if baseline:
+        with open(baseline, encoding="utf-8") as f:
+            base_report = json.load(f)
+        report["baseline"] = base_report.get("meta")
+        report["changes"] = compare(results, base_report.get("scenarios", {}), tolerance)
+        for change in report["changes"]:
+            label = "REGRESSION" if change["regression"] else "improved"
+            print(f"{label:10} {change['metric']}: {change['baseline']} -> {change['current']} "
+                  f"({change['change']:+.1%})", file=sys.stderr)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    failed = [name for name, entry in results.items() if "error" in entry]
+    regressions = [change for change in report.get("changes", []) if change["regression"]]
+    if failed:
+        print(f"failed scenarios: {', '.join(failed)}", file=sys.stderr)
+    return 1 if failed or regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help=f"要运行的场景，默认全部：{', '.join(SCENARIOS)}")
+    parser.add_argument("--output", help="结果写入的JSON文件，默认输出到标准输出")
+    parser.add_argument("--baseline", help="作为基线的历史结果文件")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="视为变化的相对幅度，默认0.2")
+    args = parser.parse_args()
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"未知场景：{', '.join(unknown)}")
+    sys.exit(main(args.scenarios or list(SCENARIOS), args.output, args.baseline, args.tolerance))
@@ -0,0 +1,148 @@
+"""
+API读取基准：并发请求下各接口的吞吐量和延迟
+
+用录制的热榜页面解析出话题，写入若干个批次（每批打乱排名，产生历史记录），
+然后在后台线程中用uvicorn启动应用（不执行startup事件，不启动调度器），
+按给定并发数请求各接口，统计每秒请求数和延迟分位数。
+客户端与服务端在同一进程中，结果用于版本间对比，不代表生产环境的绝对吞吐。
+
+使用临时SQLite数据库，不会写入配置的数据库。
+
+运行：python -m benchmarks.bench_api --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import threading
+import time
+from typing import Dict, List, Optional
+
+import httpx
+import uvicorn
+
+from benchmarks.common import read_fixture, summarize, use_temp_database
+
+use_temp_database("api")
+# 全部请求来自同一地址，限流放宽到不会触发，但仍计入中间件的开销
+os.environ["RATE_LIMITS"] = json.dumps({"default": [1e9, 1e9]})
+
+from sqlalchemy import select  # noqa: E402
+
+from app.core import init_db  # noqa: E402,F401  注册全部表结构
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.core.ingest import current_generation_query  # noqa: E402
+from app.core.scheduler import save_topics  # noqa: E402
+from app.core.search_index import rebuild_search_index  # noqa: E402
+from app.core.snapshot import refresh_snapshot  # noqa: E402
+from app.crawlers.weibo_crawler import WeiboCrawler  # noqa: E402
+from app.crawlers.zhihu_crawler import ZhihuCrawler  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.hot_topic import HotTopic  # noqa: E402
+
+
+def seed(generations: int, seed: int = 11) -> dict:
+    """写入若干批次，返回用于构造请求的话题ID和搜索词"""
+    rng = random.Random(seed)
+    parsed = {
+        "zhihu": ZhihuCrawler().parse_hot_topics(read_fixture("zhihu_hot.html")),
+        "weibo": WeiboCrawler().parse_hot_topics(read_fixture("weibo_hot.html")),
+    }
+    for _ in range(generations):
+        batch = {}
+        for source, topics in parsed.items():
+            ranks = list(range(1, len(topics) + 1))
+            rng.shuffle(ranks)
+            batch[source] = [{**topic, "rank": rank} for topic, rank in zip(topics, ranks)]
+        save_topics(batch)
+
+    snapshot = refresh_snapshot()
+    rebuild_search_index(snapshot.topics)
+    with SessionLocal() as db:
+        topic = db.execute(
+            select(HotTopic).where(HotTopic.generation == current_generation_query()).limit(1)
+        ).scalar_one()
+    return {"topic_key": topic.topic_key, "query": topic.title[:2]}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ServerThread:
+    """在后台线程中运行uvicorn，不执行lifespan，避免启动调度器访问外网"""
+
+    def __init__(self, port: int):
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, lifespan="off", log_level="warning", access_log=False)
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self) -> "ServerThread":
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+async def load(client: httpx.AsyncClient, path: str, requests: int, concurrency: int,
+               headers: Optional[Dict[str, str]] = None) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    return {**summarize(latencies), "requests_per_s": round(requests / elapsed, 1), "status": statuses}
+
+
+async def run(base_url: str, targets: dict, requests: int, concurrency: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        etag = (await client.get("/api/v1/hot-topics")).headers.get("ETag")
+        endpoints = {
+            "list": ("/api/v1/hot-topics", None),
+            "list_not_modified": ("/api/v1/hot-topics", {"If-None-Match": etag} if etag else None),
+            "source_by_heat": ("/api/v1/hot-topics/weibo?order_by=heat", None),
+            "global": ("/api/v1/hot-topics/global", None),
+            "search": (f"/api/v1/hot-topics/search?q={targets['query']}", None),
+            "history": (f"/api/v1/hot-topics/{targets['topic_key']}/history", None),
+        }
+        results = {}
+        for name, (path, headers) in endpoints.items():
+            # 预热连接池和路由
+            await load(client, path, min(requests, concurrency), concurrency, headers)
+            results[name] = await load(client, path, requests, concurrency, headers)
+        return results
+
+
+def main(requests: int, concurrency: int, generations: int) -> dict:
+    Base.metadata.create_all(bind=engine)
+    targets = seed(generations)
+    with ServerThread(free_port()) as server:
+        base_url = f"http://127.0.0.1:{server.server.config.port}"
+        return asyncio.run(run(base_url, targets, requests, concurrency))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--generations", type=int, default=10, help="写入的抓取批次数")
+    args = parser.parse_args()
+    print(json.dumps(main(args.requests, args.concurrency, args.generations), indent=2, ensure_ascii=False))
@@ -0,0 +1,102 @@
+"""
+对比同步Session与异步Session在并发请求下的延迟
+
+使用本地SQLite文件作为MySQL的替身，通过自定义函数sleep_ms模拟慢查询。
+同步路径在async路由中直接调用Session，会阻塞事件循环；异步路径走aiosqlite。
+
+运行：python -m benchmarks.bench_async_db --concurrency 50 --query-ms 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from benchmarks.common import summarize
+
+
+def _register_sleep(dbapi_connection, connection_record):
+    dbapi_connection.create_function("sleep_ms", 1, lambda ms: time.sleep(ms / 1000) or 0)
+
+
+def build_app(db_path: str, query_ms: int, pool_size: int) -> FastAPI:
+    # 连接池需容纳全部并发请求：同步路径阻塞事件循环时，依赖的清理无法调度，
+    # 连接池耗尽后会一直等到池超时
+    sync_engine = create_engine(f"sqlite:///{db_path}", pool_size=pool_size, max_overflow=0)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", pool_size=pool_size, max_overflow=0)
+    event.listen(sync_engine, "connect", _register_sleep)
+    event.listen(async_engine.sync_engine, "connect", _register_sleep)
+    SyncSession = sessionmaker(bind=sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine)
+
+    def get_sync_db():
+        db = SyncSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+    statement = text("SELECT sleep_ms(:ms)")
+
+    @app.get("/sync")
+    async def sync_route(db: Session = Depends(get_sync_db)):
+        return {"value": db.execute(statement, {"ms": query_ms}).scalar()}
+
+    @app.get("/async")
+    async def async_route(db: AsyncSession = Depends(get_async_db)):
+        return {"value": (await db.execute(statement, {"ms": query_ms})).scalar()}
+
+    return app
+
+
+async def run_scenario(app: FastAPI, path: str, concurrency: int, rounds: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            start = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+        wall_start = time.perf_counter()
+        for _ in range(rounds):
+            await asyncio.gather(*(one() for _ in range(concurrency)))
+        wall = time.perf_counter() - wall_start
+
+    result = summarize(latencies)
+    result["wall_s"] = round(wall, 3)
+    result["rps"] = round(len(latencies) / wall, 1)
+    return result
+
+
+async def main(concurrency: int, rounds: int, query_ms: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(os.path.join(tmp, "bench.db"), query_ms, concurrency)
+        return {
+            "concurrency": concurrency,
+            "query_ms": query_ms,
+            "sync_session": await run_scenario(app, "/sync", concurrency, rounds),
+            "async_session": await run_scenario(app, "/async", concurrency, rounds),
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--query-ms", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.concurrency, args.rounds, args.query_ms)), indent=2))
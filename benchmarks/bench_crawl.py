@@ -0,0 +1,107 @@
+"""
+端到端抓取基准：假上游 -> 抓取 -> 解析 -> 入库 -> 刷新快照和索引
+
+知乎、微博爬虫指向本地假上游（benchmarks.fake_origin），返回录制的热榜页面，
+延迟和错误率可配置。每轮调用crawl_and_save_topics抓取两个来源并计时；
+"changed"场景每轮清掉内容哈希，模拟热榜每次都有变化，"unchanged"场景按哈希跳过解析和入库。
+各阶段耗时取自app.core.metrics中的直方图。
+
+知乎的Cookie检查请求的是真实首页，基准中预先标记为有效，不访问外网。
+使用临时SQLite数据库，不会写入配置的数据库。
+
+运行：python -m benchmarks.bench_crawl --rounds 10 --latency 0.05 --error-rate 0.1
+"""
+import argparse
+import json
+import random
+import time
+
+from benchmarks.common import read_fixture, summarize, use_temp_database
+
+use_temp_database("crawl")
+
+from app.core import init_db  # noqa: E402,F401  注册全部表结构
+from app.core import metrics  # noqa: E402
+from app.core import scheduler  # noqa: E402
+from app.core.config import get_settings  # noqa: E402
+from app.core.database import Base, engine  # noqa: E402
+from app.crawlers import resilience  # noqa: E402
+from app.crawlers.base import BaseCrawler  # noqa: E402
+from app.crawlers.zhihu_crawler import ZhihuCrawler  # noqa: E402
+from app.models.hot_topic import SOURCES  # noqa: E402
+from benchmarks.fake_origin import FakeOrigin  # noqa: E402
+
+STAGES = {
+    "fetch": metrics.CRAWL_FETCH_SECONDS,
+    "parse": metrics.CRAWL_PARSE_SECONDS,
+    "save": metrics.DB_SAVE_SECONDS,
+}
+
+
+def stage_totals() -> dict:
+    """各阶段直方图的累计(次数, 总耗时)"""
+    totals = {}
+    for (name, _), value in metrics.collect().items():
+        for stage, histogram in STAGES.items():
+            if name == histogram.name:
+                count, seconds = totals.get(stage, (0, 0.0))
+                totals[stage] = (count + sum(value[:-1]), seconds + value[-1])
+    return totals
+
+
+def run_scenario(rounds: int, changed: bool) -> dict:
+    before = stage_totals()
+    latencies = []
+    outcomes = {}
+    for _ in range(rounds):
+        if changed:
+            BaseCrawler._page_states.clear()
+        start = time.perf_counter()
+        results = scheduler.crawl_and_save_topics(SOURCES)
+        latencies.append(time.perf_counter() - start)
+        for source, topics in results.items():
+            outcome = "unchanged" if topics is None else "ok" if topics else "failed"
+            key = f"{source}_{outcome}"
+            outcomes[key] = outcomes.get(key, 0) + 1
+
+    stages = {}
+    for stage, (count, seconds) in stage_totals().items():
+        previous_count, previous_seconds = before.get(stage, (0, 0.0))
+        if count > previous_count:
+            stages[f"{stage}_mean_ms"] = round((seconds - previous_seconds) / (count - previous_count) * 1000, 3)
+    return {"round": summarize(latencies), "stages": stages, "outcomes": outcomes}
+
+
+def main(rounds: int, latency: float, error_rate: float, seed: int = 7) -> dict:
+    settings = get_settings()
+    settings.CRAWL_BACKOFF_BASE = 0.05
+    settings.CRAWL_BACKOFF_MAX = 0.2
+    Base.metadata.create_all(bind=engine)
+    resilience._breakers.clear()
+    ZhihuCrawler._cookie_check = (settings.ZHIHU_COOKIE, time.monotonic() + 3600, True)
+    rng = random.Random(seed)
+
+    with FakeOrigin() as origin:
+        settings.ZHIHU_HOT_URL = origin.add_page("zhihu", read_fixture("zhihu_hot.html"))
+        settings.WEIBO_HOT_URL = origin.add_page("weibo", read_fixture("weibo_hot.html"), charset="gb18030")
+        # 预热：建表后的首次写入和抽取器选择器学习不计入结果
+        scheduler.crawl_and_save_topics(SOURCES)
+
+        origin.page_delay = latency
+        origin.fault = (lambda count: 503 if rng.random() < error_rate else None) if error_rate else None
+        origin.requests.clear()
+        results = {
+            "changed": run_scenario(rounds, changed=True),
+            "unchanged": run_scenario(rounds, changed=False),
+        }
+        results["upstream_requests"] = sum(origin.requests.values())
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05, help="上游延迟（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="上游返回503的概率")
+    args = parser.parse_args()
+    print(json.dumps(main(args.rounds, args.latency, args.error_rate), indent=2))
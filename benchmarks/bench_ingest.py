@@ -0,0 +1,127 @@
+"""
+入库基准：对比旧的"全表删除+逐行ORM插入"与按批次批量插入并原子发布
+
+使用开启WAL的SQLite文件作为数据库替身。写入期间另起一个线程持续执行
+路由使用的读取查询，统计写入耗时和读取延迟。
+
+运行：python -m benchmarks.bench_ingest --rows 100 1000 10000
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, List
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.database import Base
+from app.core.ingest import current_generation_query, publish_generation
+from app.models.crawl_generation import CrawlGeneration  # noqa: F401  注册表结构
+from app.models.hot_topic import HotTopic, SOURCES
+from benchmarks.common import summarize
+
+
+def make_topics(count: int) -> dict:
+    per_source = max(1, count // len(SOURCES))
+    return {
+        source: [
+            {
+                "title": f"{source}话题{i}",
+                "url": f"https://example.com/{source}/{i}",
+                "rank": i,
+                "hot_value": f"{i} 万热度",
+            }
+            for i in range(1, per_source + 1)
+        ]
+        for source in SOURCES
+    }
+
+
+def legacy_save(db: Session, topics_by_source: dict):
+    """基线：旧版save_topics"""
+    db.query(HotTopic).delete()
+    for source, topics in topics_by_source.items():
+        for topic in topics:
+            db.add(HotTopic(
+                title=topic["title"], url=topic["url"], source=source,
+                rank=topic["rank"], hot_value=topic["hot_value"]
+            ))
+    db.commit()
+
+
+def legacy_read(db: Session):
+    return db.query(HotTopic).filter(HotTopic.source == "zhihu").order_by(HotTopic.rank).limit(50).all()
+
+
+def generation_read(db: Session):
+    return db.execute(
+        select(HotTopic)
+        .where(HotTopic.generation == current_generation_query(), HotTopic.source == "zhihu")
+        .order_by(HotTopic.rank)
+        .limit(50)
+    ).scalars().all()
+
+
+def run(writer: Callable, reader: Callable, rows: int, crawls: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        event.listen(engine, "connect", lambda conn, _: conn.execute("PRAGMA journal_mode=WAL"))
+        Base.metadata.create_all(engine)
+        SessionFactory = sessionmaker(bind=engine)
+        topics = make_topics(rows)
+
+        with SessionFactory() as db:
+            writer(db, topics)
+
+        stop = threading.Event()
+        read_latencies: List[float] = []
+        short_reads = [0]
+
+        def read_loop():
+            with SessionFactory() as db:
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    result = reader(db)
+                    read_latencies.append(time.perf_counter() - start)
+                    if len(result) < min(50, rows // len(SOURCES)):
+                        short_reads[0] += 1
+                    db.rollback()
+
+        thread = threading.Thread(target=read_loop)
+        thread.start()
+        write_latencies = []
+        for _ in range(crawls):
+            with SessionFactory() as db:
+                start = time.perf_counter()
+                writer(db, topics)
+                write_latencies.append(time.perf_counter() - start)
+        stop.set()
+        thread.join()
+        engine.dispose()
+
+    return {
+        "write": summarize(write_latencies),
+        "read_during_write": summarize(read_latencies),
+        "incomplete_reads": short_reads[0],
+    }
+
+
+def main(row_counts: List[int], crawls: int) -> dict:
+    return {
+        str(rows): {
+            "legacy": run(legacy_save, legacy_read, rows, crawls),
+            "generation": run(publish_generation, generation_read, rows, crawls),
+        }
+        for rows in row_counts
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--crawls", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(main(args.rows, args.crawls), indent=2))
@@ -0,0 +1,87 @@
+"""
+指标采集开销基准：对比按线程分片的计数/直方图与全局锁保护的实现
+
+多个线程同时累加同一个带标签的计数、记录同一个直方图，统计每次操作的平均耗时；
+最后统计合并全部分片并输出Prometheus文本的耗时。
+
+运行：python -m benchmarks.bench_metrics --ops 200000 --threads 1 4 8
+"""
+import argparse
+import bisect
+import json
+import threading
+import time
+from typing import Callable, Dict, List
+
+from app.core import metrics
+
+COUNTER = metrics.Counter("bench_ops_total", "基准计数", ("source",))
+HISTOGRAM = metrics.Histogram("bench_latency_seconds", "基准直方图", ("route",))
+
+
+class LockedMetrics:
+    """基线：所有线程共用一个字典，每次更新都加锁"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[tuple, float] = {}
+        self.histograms: Dict[tuple, List[float]] = {}
+
+    def inc(self, source: str):
+        with self.lock:
+            key = ("bench_ops_total", (source,))
+            self.counters[key] = self.counters.get(key, 0.0) + 1
+
+    def observe(self, value: float, route: str):
+        with self.lock:
+            key = ("bench_latency_seconds", (route,))
+            entry = self.histograms.get(key)
+            if entry is None:
+                entry = self.histograms[key] = [0] * (len(metrics.DEFAULT_BUCKETS) + 1) + [0.0]
+            entry[bisect.bisect_left(metrics.DEFAULT_BUCKETS, value)] += 1
+            entry[-1] += value
+
+
+def run_threads(threads: int, ops: int, operation: Callable[[int], None]) -> float:
+    """threads个线程各执行ops次操作，返回每次操作的平均耗时（纳秒）"""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        barrier.wait()
+        for i in range(ops):
+            operation(i)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for worker_thread in workers:
+        worker_thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker_thread in workers:
+        worker_thread.join()
+    return round((time.perf_counter() - start) / (threads * ops) * 1e9, 1)
+
+
+def main(ops: int, thread_counts: List[int]) -> dict:
+    locked = LockedMetrics()
+    results = {}
+    for threads in thread_counts:
+        results[str(threads)] = {
+            "sharded_inc_ns": run_threads(threads, ops, lambda i: COUNTER.inc("weibo")),
+            "locked_inc_ns": run_threads(threads, ops, lambda i: locked.inc("weibo")),
+            "sharded_observe_ns": run_threads(threads, ops, lambda i: HISTOGRAM.observe(i % 100 / 1000, "/hot-topics")),
+            "locked_observe_ns": run_threads(threads, ops, lambda i: locked.observe(i % 100 / 1000, "/hot-topics")),
+        }
+
+    start = time.perf_counter()
+    text = metrics.render_metrics()
+    results["render_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    results["render_bytes"] = len(text)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ops", type=int, default=200000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+    print(json.dumps(main(args.ops, args.threads), indent=2))
@@ -0,0 +1,109 @@
+"""
+热榜页面解析基准：对比旧的全量解析与HotListExtractor
+
+旧实现：html.parser构建整棵树、遍历全部标签收集class、逐条f-string调试日志。
+新实现：lxml + SoupStrainer只解析热榜子树，记住命中的选择器，调试日志按级别惰性构建。
+
+运行：python -m benchmarks.bench_parse --runs 20
+"""
+import argparse
+import json
+import logging
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict
+
+from bs4 import BeautifulSoup
+
+from app.crawlers.weibo_crawler import WeiboCrawler
+from app.crawlers.zhihu_crawler import ZhihuCrawler
+
+FIXTURES = Path(__file__).parent / "fixtures"
+logger = logging.getLogger("benchmarks.legacy")
+
+
+def legacy_zhihu(html: str) -> int:
+    """基线：旧版ZhihuCrawler的解析流程"""
+    soup = BeautifulSoup(html, "html.parser")
+    all_classes = set()
+    for tag in soup.find_all(class_=True):
+        all_classes.update(tag["class"])
+    logger.info(f"页面中所有的类名: {all_classes}")
+    items = soup.select(".HotList-item") or soup.select(".HotItem") or soup.select("[data-zop-itemid]")
+    count = 0
+    for index, item in enumerate(items, 1):
+        logger.debug(f"Item {index} HTML: {item}")
+        title = (item.select_one(".HotList-itemTitle") or item.select_one(".HotItem-title")
+                 or item.select_one(".HotItem-content") or item.select_one("a"))
+        if title:
+            logger.debug(f"Title element found: {title}")
+            logger.debug(f"Title element parent: {title.parent}")
+            metrics = (item.select_one(".HotList-itemMetrics") or item.select_one(".HotItem-metrics")
+                       or item.select_one(".HotItem-meta"))
+            _ = metrics.text.strip() if metrics else ""
+            count += 1
+    return count
+
+
+def legacy_weibo(html: str) -> int:
+    """基线：旧版WeiboCrawler的解析流程"""
+    soup = BeautifulSoup(html, "html.parser")
+    all_classes = set()
+    for tag in soup.find_all(class_=True):
+        all_classes.update(tag["class"])
+    count = 0
+    for index, item in enumerate(soup.select(".td-02"), 1):
+        logger.debug(f"Item {index} HTML: {item}")
+        title = item.select_one("a")
+        if title:
+            logger.debug(f"Title element found: {title}")
+            count += 1
+    return count
+
+
+def measure(parse: Callable[[str], int], html: str, runs: int) -> Dict[str, float]:
+    parse(html)  # 预热，同时让抽取器记住命中的规则
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        items = parse(html)
+        durations.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    parse(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "items": items,
+        "median_ms": round(statistics.median(durations) * 1000, 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def main(runs: int) -> dict:
+    logging.getLogger().setLevel(logging.WARNING)
+    zhihu = ZhihuCrawler()
+    weibo = WeiboCrawler()
+    pages = {
+        "zhihu": ((FIXTURES / "zhihu_hot.html").read_text(encoding="utf-8"), legacy_zhihu,
+                  lambda html: len(zhihu.parse_hot_topics(html))),
+        "weibo": ((FIXTURES / "weibo_hot.html").read_text(encoding="utf-8"), legacy_weibo,
+                  lambda html: len(weibo.parse_hot_topics(html))),
+    }
+    results = {}
+    for source, (html, legacy, current) in pages.items():
+        results[source] = {
+            "page_kib": round(len(html.encode("utf-8")) / 1024, 1),
+            "legacy": measure(legacy, html, runs),
+            "extractor": measure(current, html, runs),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(main(args.runs), indent=2))
@@ -0,0 +1,79 @@
+"""
+限流中间件开销基准
+
+- acquire：单个客户端连续取令牌、以及大量不同客户端轮流取令牌（触发LRU淘汰）时每次的耗时
+- middleware：直接调用ASGI中间件（内层应用立即返回204），对比不加中间件时每个请求多出的耗时
+- 淘汰后令牌桶数量不超过上限
+
+运行：python -m benchmarks.bench_ratelimit --ops 200000 --clients 50000
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+os.environ["RATE_LIMITS"] = json.dumps({"default": [1e9, 1e9]})
+
+from app.core.ratelimit import RateLimiter, RateLimitMiddleware  # noqa: E402
+
+
+def time_acquire(limiter: RateLimiter, clients: int, ops: int) -> float:
+    names = [f"10.0.{i // 256 % 256}.{i % 256}-{i}" for i in range(clients)]
+    start = time.perf_counter()
+    for i in range(ops):
+        limiter.acquire(names[i % clients], "default")
+    return round((time.perf_counter() - start) / ops * 1e9, 1)
+
+
+async def inner_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 204, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def send(message):
+    pass
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def time_requests(app, ops: int) -> float:
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/hot-topics",
+        "headers": [(b"host", b"localhost"), (b"user-agent", b"bench"), (b"accept", b"*/*")],
+        "client": ("127.0.0.1", 50000),
+    }
+    start = time.perf_counter()
+    for _ in range(ops):
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / ops * 1e9
+
+
+def main(ops: int, clients: int, max_buckets: int) -> dict:
+    rules = {"default": [1e9, 1e9]}
+    single = time_acquire(RateLimiter(rules, max_buckets), 1, ops)
+    evicting = RateLimiter(rules, max_buckets)
+    many = time_acquire(evicting, clients, ops)
+
+    bare = asyncio.run(time_requests(inner_app, ops))
+    wrapped = asyncio.run(time_requests(RateLimitMiddleware(inner_app), ops))
+    return {
+        "acquire_single_client_ns": single,
+        "acquire_many_clients_ns": many,
+        "buckets": len(evicting),
+        "max_buckets": max_buckets,
+        "middleware_overhead_ns": round(wrapped - bare, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ops", type=int, default=200000)
+    parser.add_argument("--clients", type=int, default=50000, help="轮流取令牌的不同客户端数")
+    parser.add_argument("--max-buckets", type=int, default=10000)
+    args = parser.parse_args()
+    print(json.dumps(main(args.ops, args.clients, args.max_buckets), indent=2))
@@ -0,0 +1,83 @@
+"""
+归档重新解析基准：按不同解析进程数重新解析同一批归档页面并补写历史
+
+用录制的知乎、微博页面生成内容各不相同的归档页面（避免按哈希去重后只解析一次），
+分别以--workers中的每个进程数运行app.reparse，统计每秒处理的页面数；
+"dry_run"只解析不写库，用来区分解析和写库各自的开销。
+使用临时SQLite数据库和临时归档目录。
+
+运行：python -m benchmarks.bench_reparse --pages 400 --workers 1 4
+"""
+import argparse
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+from typing import List
+
+from benchmarks.common import read_fixture, use_temp_database
+
+use_temp_database("reparse")
+os.environ["ARCHIVE_DIR"] = tempfile.mkdtemp()
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import reparse  # noqa: E402
+from app.core import init_db  # noqa: E402,F401  注册全部表结构
+from app.core.archive import get_archive  # noqa: E402
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.models.archived_page import ArchivedPage  # noqa: E402
+
+FIXTURES = {"zhihu": "zhihu_hot.html", "weibo": "weibo_hot.html"}
+
+
+def populate(pages: int, start: datetime):
+    """按抓取间隔生成归档页面和索引"""
+    archive = get_archive()
+    html = {source: read_fixture(name) for source, name in FIXTURES.items()}
+    rows = []
+    for i in range(pages):
+        source = list(FIXTURES)[i % len(FIXTURES)]
+        data = f"{html[source]}<!-- {i} -->".encode("utf-8")
+        crawled_at = start + timedelta(minutes=i // len(FIXTURES))
+        rows.append({
+            "source": source,
+            "fetched_at": crawled_at,
+            "digest": archive.put(data),
+            "size": len(data),
+            "generation": i // len(FIXTURES) + 1,
+            "crawled_at": crawled_at,
+        })
+    db = SessionLocal()
+    try:
+        db.execute(insert(ArchivedPage), rows)
+        db.commit()
+    finally:
+        db.close()
+
+
+def main(pages: int, worker_counts: List[int], batch_size: int) -> dict:
+    Base.metadata.create_all(bind=engine)
+    start = datetime(2026, 1, 1)
+    populate(pages, start)
+    until = start + timedelta(days=365)
+    results = {}
+    for workers in worker_counts:
+        for dry_run in (True, False):
+            stats = reparse.main(start, until, list(FIXTURES), workers, batch_size, dry_run)
+            results[f"{'dry_run' if dry_run else 'write'}_{workers}"] = {
+                "pages_per_s": stats["pages_per_s"],
+                "elapsed_s": stats["seconds"],
+                "topics": stats["topics"],
+            }
+    results["cpu_count"] = os.cpu_count()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+    print(json.dumps(main(args.pages, args.workers, args.batch_size), indent=2))
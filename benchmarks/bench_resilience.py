@@ -0,0 +1,112 @@
+"""
+抓取容错场景：正常、慢响应、持续报错、时好时坏的上游
+
+微博爬虫指向本地假上游（benchmarks.fake_origin），先成功抓取一次作为上一批次，
+再在各故障模式下连续抓取若干轮，记录每轮结果、耗时、上游请求数和熔断器状态，
+最后检查当前批次中微博的话题数是否仍为故障前的数量（失败不应覆盖上一批次）。
+
+使用临时SQLite数据库，不会写入配置的数据库。
+
+运行：python -m benchmarks.bench_resilience --rounds 6
+"""
+import argparse
+import json
+import time
+
+from benchmarks.common import read_fixture, use_temp_database
+
+use_temp_database("resilience")
+
+from sqlalchemy import func, select  # noqa: E402
+
+from app.core.config import get_settings  # noqa: E402
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.core.ingest import current_generation_query  # noqa: E402
+from app.core import init_db  # noqa: E402,F401  注册全部表结构
+from app.core import scheduler  # noqa: E402
+from app.core.metrics import collect  # noqa: E402
+from app.crawlers import resilience  # noqa: E402
+from app.crawlers.base import BaseCrawler  # noqa: E402
+from app.models.hot_topic import HotTopic  # noqa: E402
+from benchmarks.fake_origin import FakeOrigin  # noqa: E402
+
+SCENARIOS = {
+    "healthy": {"delay": 0.0, "fault": None},
+    # 响应慢于CRAWL_READ_TIMEOUT，每次请求都读超时
+    "slow": {"delay": 1.5, "fault": None},
+    "erroring": {"delay": 0.0, "fault": lambda count: 503},
+    # 每两个请求失败一个，重试即可恢复
+    "flapping": {"delay": 0.0, "fault": lambda count: 502 if count % 2 else None},
+}
+
+
+def current_weibo_rows() -> int:
+    with SessionLocal() as db:
+        return db.execute(
+            select(func.count()).select_from(HotTopic)
+            .where(HotTopic.generation == current_generation_query(), HotTopic.source == "weibo")
+        ).scalar_one()
+
+
+def skipped_crawls() -> float:
+    return collect().get(("hot_news_crawls_total", ("weibo", "skipped")), 0.0)
+
+
+def crawl_round() -> str:
+    # 清掉内容哈希，每轮都真正解析，而不是按未变化跳过
+    BaseCrawler._page_states.clear()
+    skipped = skipped_crawls()
+    topics = scheduler.crawl_and_save_topics(["weibo"]).get("weibo", [])
+    # 熔断跳过与失败一样返回空列表，按计数区分
+    if skipped_crawls() > skipped:
+        return "skipped"
+    return f"ok:{len(topics)}" if topics else "failed"
+
+
+def run_scenario(origin: FakeOrigin, name: str, rounds: int) -> dict:
+    resilience._breakers.clear()
+    origin.page_delay, origin.fault = 0.0, None
+    crawl_round()
+    seeded = current_weibo_rows()
+
+    scenario = SCENARIOS[name]
+    origin.page_delay, origin.fault = scenario["delay"], scenario["fault"]
+    origin.requests.clear()
+    results = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        outcome = crawl_round()
+        results.append({
+            "outcome": outcome,
+            "seconds": round(time.perf_counter() - start, 2),
+            "breaker": resilience.get_breaker("weibo").state,
+        })
+    return {
+        "rounds": results,
+        "upstream_requests": sum(origin.requests.values()),
+        "rows_before": seeded,
+        "rows_after": current_weibo_rows(),
+    }
+
+
+def main(rounds: int) -> dict:
+    settings = get_settings()
+    settings.CRAWL_READ_TIMEOUT = 1
+    settings.CRAWL_TIMEOUT = 8
+    settings.CRAWL_BACKOFF_BASE = 0.1
+    settings.CRAWL_BACKOFF_MAX = 0.5
+    settings.CRAWL_BREAKER_THRESHOLD = 3
+    settings.CRAWL_BREAKER_COOLDOWN = 2
+    Base.metadata.create_all(bind=engine)
+
+    html = read_fixture("weibo_hot.html")
+    with FakeOrigin() as origin:
+        settings.WEIBO_HOT_URL = origin.add_page("weibo", html, charset="gb18030")
+        return {name: run_scenario(origin, name, rounds) for name in SCENARIOS}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=6)
+    args = parser.parse_args()
+    print(json.dumps(main(args.rounds), indent=2, ensure_ascii=False))
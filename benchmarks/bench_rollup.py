@@ -0,0 +1,104 @@
+"""
+历史汇总基准：汇总吞吐量，以及长时间窗口的历史查询在汇总前后的耗时
+
+写入--days天、每--interval分钟抓取一次的原始历史（每次--topics个话题），
+先按原始记录查询一个话题最近30天的历史，再运行compact_history，
+按默认粒度（30天窗口为按小时）查询同一话题，对比耗时和读取的点数。
+使用临时SQLite数据库，不会写入配置的数据库。
+
+运行：python -m benchmarks.bench_rollup --days 30 --interval 30 --topics 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import summarize, use_temp_database
+
+use_temp_database("rollup")
+os.environ.setdefault("HISTORY_RAW_DAYS", "2")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.core import init_db  # noqa: E402,F401  注册全部表结构
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.core.rollup import compact_history  # noqa: E402
+from app.models.topic import Topic  # noqa: E402
+from app.models.topic_history import TopicHistory  # noqa: E402
+from app.routers import hot_topics  # noqa: E402
+
+app = FastAPI()
+app.include_router(hot_topics.router, prefix="/api/v1")
+
+
+def seed(days: int, interval: int, topics: int, now: datetime, seed: int = 5) -> int:
+    rng = random.Random(seed)
+    crawled_at = now - timedelta(days=days)
+    total = 0
+    with SessionLocal() as db:
+        while crawled_at < now:
+            rows = [
+                {"topic_key": key, "crawled_at": crawled_at, "generation": 1, "source": "weibo",
+                 "rank": rng.randint(1, 50), "heat": rng.randint(1, 10 ** 7)}
+                for key in range(1, topics + 1)
+            ]
+            db.execute(insert(TopicHistory), rows)
+            total += len(rows)
+            crawled_at += timedelta(minutes=interval)
+        db.add(Topic(topic_key=1, source="weibo", title="bench", url="https://example.com",
+                     first_seen_at=now - timedelta(days=days), last_seen_at=now))
+        db.commit()
+    return total
+
+
+async def query(path: str, runs: int) -> dict:
+    latencies = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for _ in range(runs):
+            start = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - start)
+    result = summarize(latencies)
+    body = response.json()
+    result["points"] = len(body["points"])
+    result["resolution"] = body["resolution"]
+    return result
+
+
+def main(days: int, interval: int, topics: int, runs: int) -> dict:
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    rows = seed(days, interval, topics, now)
+    start = (now - timedelta(days=30)).isoformat()
+    path = f"/api/v1/hot-topics/1/history?start={start}&end={now.isoformat()}"
+
+    before = asyncio.run(query(f"{path}&resolution=raw", runs))
+    compact_start = time.perf_counter()
+    stats = compact_history(now=now)
+    compact_seconds = time.perf_counter() - compact_start
+    after = asyncio.run(query(path, runs))
+    return {
+        "raw_rows": rows,
+        "compact": {
+            "rows": stats["raw_rows"],
+            "elapsed_s": round(compact_seconds, 3),
+            "rows_per_s": round(stats["raw_rows"] / compact_seconds, 1) if compact_seconds else 0,
+        },
+        "history_30d_raw": before,
+        "history_30d_rollup": after,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--interval", type=int, default=30, help="抓取间隔（分钟）")
+    parser.add_argument("--topics", type=int, default=100, help="每次抓取的话题数")
+    parser.add_argument("--runs", type=int, default=50, help="每种查询的请求次数")
+    args = parser.parse_args()
+    print(json.dumps(main(args.days, args.interval, args.topics, args.runs), indent=2, ensure_ascii=False))
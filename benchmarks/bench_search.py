@@ -0,0 +1,105 @@
+"""
+标题搜索基准：对比 LIKE '%关键词%' 全表扫描与内存二字组倒排索引
+
+topics表中写入N个合成话题，分别用SQLite的LIKE查询和SearchIndex检索同一批关键词，
+统计单次查询延迟和索引占用的内存。
+
+运行：python -m benchmarks.bench_search --topics 10000 100000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.core.search_index import build_search_index
+from app.models.topic import Topic
+from benchmarks.common import summarize
+
+def make_vocabulary(size: int, seed: int = 3) -> List[str]:
+    """从常用汉字区间随机组成二到四字的词"""
+    rng = random.Random(seed)
+    return [
+        "".join(chr(rng.randint(0x4E00, 0x4FFF)) for _ in range(rng.randint(2, 4)))
+        for _ in range(size)
+    ]
+
+
+WORDS = make_vocabulary(2000)
+
+
+def make_titles(count: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    return [f"{''.join(rng.sample(WORDS, 4))}第{i}期" for i in range(count)]
+
+
+def run(count: int, queries: int) -> dict:
+    rng = random.Random(11)
+    keywords = [rng.choice(WORDS) for _ in range(queries)]
+    now = datetime.utcnow()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine, tables=[Topic.__table__])
+        SessionFactory = sessionmaker(bind=engine)
+        with SessionFactory() as db:
+            db.execute(insert(Topic), [
+                {"topic_key": i, "source": "weibo", "title": title, "url": f"https://example.com/{i}",
+                 "first_seen_at": now, "last_seen_at": now}
+                for i, title in enumerate(make_titles(count))
+            ])
+            db.commit()
+
+            like_latencies = []
+            for keyword in keywords:
+                start = time.perf_counter()
+                # 与索引一样返回最相关的20条，因此必须扫描全部匹配行再排序
+                db.execute(
+                    select(Topic)
+                    .where(Topic.title.like(f"%{keyword}%"))
+                    .order_by(Topic.last_seen_at.desc())
+                    .limit(20)
+                ).all()
+                like_latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            index = build_search_index(db, [], days=1)
+            build_seconds = time.perf_counter() - start
+
+            tracemalloc.start()
+            build_search_index(db, [], days=1)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        engine.dispose()
+
+    index_latencies = []
+    for keyword in keywords:
+        start = time.perf_counter()
+        index.search(keyword, limit=20)
+        index_latencies.append(time.perf_counter() - start)
+
+    return {
+        "like": summarize(like_latencies),
+        "index": summarize(index_latencies),
+        "index_build_s": round(build_seconds, 3),
+        "index_peak_mib": round(peak / 1024 / 1024, 1),
+    }
+
+
+def main(topic_counts: List[int], queries: int) -> dict:
+    return {str(count): run(count, queries) for count in topic_counts}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--topics", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(main(args.topics, args.queries), indent=2))
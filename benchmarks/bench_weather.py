@@ -0,0 +1,95 @@
+"""
+天气代理基准：对比每次请求新建httpx客户端且不缓存，与共用客户端+TTL缓存+请求合并
+
+上游为本地假服务器（benchmarks.fake_origin），固定延迟。以给定并发数请求若干城市的
+"查城市ID -> 查实时天气"，统计端到端延迟、上游请求数和缓存命中率。
+
+运行：python -m benchmarks.bench_weather --requests 500 --concurrency 50 --cities 20
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Awaitable, Callable, List, Tuple
+
+import httpx
+
+from app.api import weather
+from app.core.config import get_settings
+from app.core.http_client import close_http_client
+from benchmarks.common import summarize
+from benchmarks.fake_origin import FakeOrigin
+
+
+async def legacy_lookup(city: str) -> dict:
+    """基线：旧版get_location + get_current_weather，每次请求新建客户端"""
+    host = get_settings().QWEATHER_API_HOST
+    async with httpx.AsyncClient() as client:
+        response = await client.get(f"{host}/geo/v2/city/lookup", params={"location": city})
+        location = response.json()["location"][0]
+    async with httpx.AsyncClient() as client:
+        response = await client.get(f"{host}/v7/weather/now", params={"location": location["id"]})
+        return response.json()["now"]
+
+
+async def cached_lookup(city: str) -> dict:
+    location = await weather.lookup_location(city)
+    return await weather.fetch_current_weather(location["locationId"])
+
+
+async def run(lookup: Callable[[str], Awaitable[dict]], cities: List[str], concurrency: int) -> Tuple[List[float], int]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = [0]
+
+    async def one(city: str):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await lookup(city)
+            except httpx.HTTPError:
+                # 每次新建客户端都要加载证书，并发高时事件循环被占满，连接可能超时
+                errors[0] += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(city) for city in cities))
+    return latencies, errors[0]
+
+
+def main(requests: int, concurrency: int, city_count: int, latency: float) -> dict:
+    rng = random.Random(5)
+    cities = [f"城市{rng.randrange(city_count)}" for _ in range(requests)]
+    results = {}
+    with FakeOrigin(latency=latency) as origin:
+        get_settings().QWEATHER_API_HOST = origin.url
+        for name, lookup in (("legacy", legacy_lookup), ("cached", cached_lookup)):
+            origin.requests.clear()
+
+            async def scenario():
+                try:
+                    return await run(lookup, cities, concurrency)
+                finally:
+                    await close_http_client()
+
+            started = time.perf_counter()
+            latencies, errors = asyncio.run(scenario())
+            results[name] = {
+                "latency": summarize(latencies),
+                "errors": errors,
+                "throughput_rps": round(requests / (time.perf_counter() - started), 1),
+                "upstream_requests": sum(origin.requests.values()),
+            }
+        results["cached"]["cache"] = weather.cache_stats()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--cities", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="上游延迟（秒）")
+    args = parser.parse_args()
+    print(json.dumps(main(args.requests, args.concurrency, args.cities, args.latency), indent=2, ensure_ascii=False))
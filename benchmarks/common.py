@@ -0,0 +1,43 @@
+import os
+import statistics
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """计算百分位数（最近秩法）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    """汇总延迟样本，单位毫秒"""
+    samples = [value * 1000 for value in latencies]
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples), 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "max_ms": round(max(samples), 3) if samples else 0.0,
+    }
+
+
+def use_temp_database(name: str) -> str:
+    """
+    让app使用临时SQLite文件，返回文件路径
+    必须在导入app.core.database之前调用，引擎在导入时按DATABASE_URL创建
+    """
+    path = os.path.join(tempfile.mkdtemp(), f"{name}.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    return path
+
+
+def read_fixture(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
@@ -0,0 +1,88 @@
+"""
+本地假上游：模拟和风天气API和热榜页面，在独立线程的事件循环中运行
+
+可配置固定延迟，并按路径统计收到的请求数，用于衡量缓存和请求合并节省了多少上游调用。
+热榜页面通过add_page注册，page_delay和fault用于模拟慢响应、报错和时好时坏的上游。
+"""
+import asyncio
+import threading
+from collections import Counter
+from typing import Callable, Dict, Optional, Tuple
+
+from aiohttp import web
+
+
+class FakeOrigin:
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.requests: Counter = Counter()
+        self.url: Optional[str] = None
+        # 页面名 -> (内容, 编码)
+        self.pages: Dict[str, Tuple[bytes, str]] = {}
+        self.page_delay = 0.0
+        # 传入该页面的第几次请求，返回要模拟的错误状态码，返回None表示正常响应
+        self.fault: Optional[Callable[[int], Optional[int]]] = None
+        self._loop = asyncio.new_event_loop()
+        self._runner: Optional[web.AppRunner] = None
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    async def _city_lookup(self, request: web.Request) -> web.Response:
+        self.requests[request.path] += 1
+        await asyncio.sleep(self.latency)
+        city = request.query.get("location", "")
+        return web.json_response({
+            "code": "200",
+            "location": [{"id": str(101000000 + sum(map(ord, city)) % 100000), "name": city}],
+        })
+
+    async def _weather_now(self, request: web.Request) -> web.Response:
+        self.requests[request.path] += 1
+        await asyncio.sleep(self.latency)
+        return web.json_response({
+            "code": "200",
+            "now": {"temp": "23", "text": "多云", "humidity": "65", "windSpeed": "12"},
+        })
+
+    def add_page(self, name: str, html: str, charset: str = "utf-8") -> str:
+        """注册一个热榜页面，返回其URL"""
+        self.pages[name] = (html.encode(charset, errors="replace"), charset)
+        return f"{self.url}/pages/{name}"
+
+    async def _page(self, request: web.Request) -> web.Response:
+        self.requests[request.path] += 1
+        count = self.requests[request.path]
+        await asyncio.sleep(self.page_delay)
+        status = self.fault(count) if self.fault else None
+        if status:
+            return web.Response(status=status, text="upstream error")
+        body, charset = self.pages[request.match_info["name"]]
+        return web.Response(body=body, content_type="text/html", charset=charset)
+
+    async def _start(self) -> str:
+        app = web.Application()
+        app.router.add_get("/pages/{name}", self._page)
+        app.router.add_get("/geo/v2/city/lookup", self._city_lookup)
+        app.router.add_get("/v7/weather/now", self._weather_now)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    def start(self) -> "FakeOrigin":
+        self._thread.start()
+        self.url = asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self
+
+    def stop(self):
+        if self._runner is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def __enter__(self) -> "FakeOrigin":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
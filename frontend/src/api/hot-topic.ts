@@ -1,5 +1,5 @@
 import axios from 'axios';
-import type { HotTopic, HotTopicQuery } from '@/types/hot-topic';
+import type { HotTopic, HotTopicChanges, HotTopicQuery } from '@/types/hot-topic';
 
 const api = axios.create({
   baseURL: 'http://localhost:8000/api/v1',
@@ -14,4 +14,17 @@ export const getHotTopics = async (params?: HotTopicQuery): Promise<HotTopic[]>
 export const getHotTopicsBySource = async (source: 'zhihu' | 'weibo', limit?: number): Promise<HotTopic[]> => {
   const { data } = await api.get(`/hot-topics/${source}`, { params: { limit } });
   return data;
-}; 
\ No newline at end of file
+};
+
+// 订阅每次抓取的热搜变化，断线后浏览器会自动携带Last-Event-ID重连续传
+export const subscribeHotTopicChanges = (
+  onChanges: (changes: HotTopicChanges) => void,
+  onReset: () => void
+): EventSource => {
+  const source = new EventSource(`${api.defaults.baseURL}/hot-topics/stream`);
+  source.addEventListener('changes', (event) => {
+    onChanges(JSON.parse((event as MessageEvent).data));
+  });
+  source.addEventListener('reset', () => onReset());
+  return source;
+};
@@ -1,23 +1,34 @@
 import { defineStore } from 'pinia';
-import type { HotTopic } from '@/types/hot-topic';
-import { getHotTopics, getHotTopicsBySource } from '@/api/hot-topic';
+import type { HotTopic, HotTopicChanges, HotTopicMove } from '@/types/hot-topic';
+import { getHotTopics, getHotTopicsBySource, subscribeHotTopicChanges } from '@/api/hot-topic';
+
+let eventSource: EventSource | null = null;
+
+// 与服务端列表相同的顺序：按排名，同名次按来源写入的先后
+const SOURCE_ORDER = ['zhihu', 'weibo'];
+const compareTopics = (a: HotTopic, b: HotTopic) =>
+  a.rank - b.rank || SOURCE_ORDER.indexOf(a.source) - SOURCE_ORDER.indexOf(b.source);
 
 export const useHotTopicStore = defineStore('hotTopic', {
   state: () => ({
     topics: [] as HotTopic[],
     loading: false,
     error: null as string | null,
+    source: undefined as 'zhihu' | 'weibo' | undefined,
+    // 拉取的列表窗口大小，应用变化后按此截取
+    limit: 50,
   }),
 
   actions: {
     async fetchTopics(source?: 'zhihu' | 'weibo') {
       this.loading = true;
       this.error = null;
+      this.source = source;
       try {
         if (source) {
-          this.topics = await getHotTopicsBySource(source);
+          this.topics = await getHotTopicsBySource(source, this.limit);
         } else {
-          this.topics = await getHotTopics();
+          this.topics = await getHotTopics({ limit: this.limit });
         }
       } catch (err) {
         this.error = err instanceof Error ? err.message : '获取热搜失败';
@@ -25,5 +36,59 @@ export const useHotTopicStore = defineStore('hotTopic', {
         this.loading = false;
       }
     },
+
+    // 应用一次抓取的变化，只更新有变化的话题，不重新下载整个列表
+    // 变化覆盖整个批次，本地只有列表窗口内的话题：应用后截取到窗口大小；
+    // 窗口外的话题排进窗口，或窗口中的话题下榜后需要后面的话题补位时，本地没有这些话题，改为重新拉取
+    applyChanges(changes: HotTopicChanges) {
+      const inSource = (source?: string | null) => !this.source || !source || source === this.source;
+      const wasFull = this.topics.length >= this.limit;
+      const byKey = new Map(this.topics.map((topic) => [topic.topic_key, topic]));
+      changes.dropped.forEach((drop) => byKey.delete(drop.topic_key));
+      const outside: HotTopicMove[] = [];
+      changes.moved.forEach((move) => {
+        const topic = byKey.get(move.topic_key);
+        if (topic) {
+          topic.rank = move.rank;
+          topic.global_rank = move.global_rank;
+        } else if (inSource(move.source)) {
+          outside.push(move);
+        }
+      });
+      changes.heat.forEach((change) => {
+        const topic = byKey.get(change.topic_key);
+        if (topic) {
+          Object.assign(topic, change);
+        }
+      });
+      changes.new
+        .filter((topic) => inSource(topic.source))
+        .forEach((topic) => byKey.set(topic.topic_key, topic));
+
+      const topics = [...byKey.values()].sort(compareTopics).slice(0, this.limit);
+      const full = topics.length >= this.limit;
+      const last = topics[topics.length - 1];
+      const entered = outside.some((move) => !full || !last || move.rank <= last.rank);
+      if (entered || (wasFull && !full)) {
+        this.fetchTopics(this.source);
+        return;
+      }
+      this.topics = topics;
+    },
+
+    subscribe() {
+      if (eventSource) {
+        return;
+      }
+      eventSource = subscribeHotTopicChanges(
+        (changes) => this.applyChanges(changes),
+        () => this.fetchTopics(this.source)
+      );
+    },
+
+    unsubscribe() {
+      eventSource?.close();
+      eventSource = null;
+    },
   },
-}); 
\ No newline at end of file
+});
@@ -1,15 +1,52 @@
 export interface HotTopic {
-  id: number;
+  // 通过推送新上榜的话题没有id和时间字段，列表以topic_key为键
+  id?: number;
+  // 64位整数超出Number的精度，接口以字符串返回
+  topic_key?: string | null;
   title: string;
   url: string;
   source: 'zhihu' | 'weibo';
   rank: number;
   hot_value?: string;
-  created_at: string;
-  updated_at: string;
+  heat?: number | null;
+  heat_label?: string | null;
+  score?: number | null;
+  global_rank?: number | null;
+  created_at?: string;
+  updated_at?: string;
 }
 
 export interface HotTopicQuery {
   source?: 'zhihu' | 'weibo';
   limit?: number;
-} 
\ No newline at end of file
+  order_by?: 'rank' | 'heat' | 'score';
+  min_heat?: number;
+} 
+export interface HotTopicMove {
+  topic_key: string;
+  source?: 'zhihu' | 'weibo' | null;
+  rank: number;
+  previous_rank: number;
+  global_rank?: number | null;
+}
+
+export interface HotTopicDrop {
+  topic_key: string;
+  previous_rank: number;
+}
+
+export interface HotTopicHeatChange {
+  topic_key: string;
+  heat?: number | null;
+  hot_value?: string;
+  heat_label?: string | null;
+}
+
+export interface HotTopicChanges {
+  generation: number;
+  previous_generation: number;
+  new: HotTopic[];
+  dropped: HotTopicDrop[];
+  moved: HotTopicMove[];
+  heat: HotTopicHeatChange[];
+}
@@ -12,18 +12,114 @@ FLUSH PRIVILEGES;
 -- 创建热门话题表
 CREATE TABLE IF NOT EXISTS hot_topics (
     id INT AUTO_INCREMENT PRIMARY KEY,
+    generation INT NOT NULL DEFAULT 0,
+    topic_key BIGINT,
     title VARCHAR(255) NOT NULL,
     url VARCHAR(512) NOT NULL,
     source ENUM('zhihu', 'weibo') NOT NULL,
     `rank` INT NOT NULL,
     hot_value VARCHAR(50),
+    heat BIGINT,
+    heat_label VARCHAR(32),
+    score DOUBLE,
+    global_rank INT,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_generation_source_rank (generation, source, `rank`),
+    INDEX idx_generation_heat (generation, heat),
+    INDEX idx_generation_global_rank (generation, global_rank),
+    INDEX idx_topic_key (topic_key),
     INDEX idx_rank (`rank`),
     INDEX idx_source (source),
     INDEX idx_created_at (created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- 创建抓取批次表
+CREATE TABLE IF NOT EXISTS crawl_generations (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    status ENUM('pending', 'published') NOT NULL DEFAULT 'pending',
+    topic_count INT NOT NULL DEFAULT 0,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    published_at DATETIME
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- 创建话题维表，每个稳定话题一行
+CREATE TABLE IF NOT EXISTS topics (
+    topic_key BIGINT NOT NULL PRIMARY KEY,
+    source ENUM('zhihu', 'weibo') NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    url VARCHAR(512) NOT NULL,
+    first_seen_at DATETIME NOT NULL,
+    last_seen_at DATETIME NOT NULL,
+    INDEX idx_last_seen_at (last_seen_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- 创建话题排名历史表（只追加）
+-- 主键(topic_key, crawled_at)使同一话题的记录物理相邻，按话题查询时间范围为一次主键范围扫描
+CREATE TABLE IF NOT EXISTS topic_history (
+    topic_key BIGINT NOT NULL,
+    crawled_at DATETIME NOT NULL,
+    generation INT NOT NULL,
+    source ENUM('zhihu', 'weibo') NOT NULL,
+    `rank` SMALLINT NOT NULL,
+    heat BIGINT,
+    PRIMARY KEY (topic_key, crawled_at),
+    INDEX idx_crawled_at (crawled_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- 创建按小时、按天汇总的话题历史，超过保留期的原始历史在后台逐级汇总
+CREATE TABLE IF NOT EXISTS topic_history_hourly (
+    topic_key BIGINT NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    source ENUM('zhihu', 'weibo') NOT NULL,
+    best_rank SMALLINT NOT NULL,
+    peak_heat BIGINT,
+    samples INT NOT NULL,
+    on_list_seconds INT NOT NULL,
+    PRIMARY KEY (topic_key, bucket_start),
+    INDEX idx_hourly_bucket_start (bucket_start)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS topic_history_daily (
+    topic_key BIGINT NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    source ENUM('zhihu', 'weibo') NOT NULL,
+    best_rank SMALLINT NOT NULL,
+    peak_heat BIGINT,
+    samples INT NOT NULL,
+    on_list_seconds INT NOT NULL,
+    PRIMARY KEY (topic_key, bucket_start),
+    INDEX idx_daily_bucket_start (bucket_start)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- 创建调度租约表，多worker部署时只有持有租约的worker执行抓取
+CREATE TABLE IF NOT EXISTS scheduler_locks (
+    name VARCHAR(64) NOT NULL PRIMARY KEY,
+    owner VARCHAR(128) NOT NULL,
+    acquired_at DATETIME NOT NULL,
+    expires_at DATETIME NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- 创建热榜页面归档索引，页面内容按SHA-256存放在本地归档目录（ARCHIVE_DIR）中
+CREATE TABLE IF NOT EXISTS archived_pages (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    source ENUM('zhihu', 'weibo') NOT NULL,
+    fetched_at DATETIME NOT NULL,
+    digest CHAR(64) NOT NULL,
+    size INT NOT NULL,
+    generation INT,
+    crawled_at DATETIME,
+    INDEX idx_fetched_at (fetched_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- 创建批次变化表，每个批次相对上一批次的榜单变化
+CREATE TABLE IF NOT EXISTS generation_changes (
+    generation INT NOT NULL PRIMARY KEY,
+    previous_generation INT NOT NULL,
+    changes JSON NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- 插入测试数据
 INSERT INTO hot_topics (title, url, source, `rank`, hot_value) VALUES
 ('测试知乎话题1', 'https://www.zhihu.com/question/123', 'zhihu', 1, '1000'),
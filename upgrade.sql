@@ -0,0 +1,104 @@
+-- 升级已有数据库：为hot_topics补充新列和索引，并创建新增的表
+-- init.sql中的CREATE TABLE IF NOT EXISTS不会修改已存在的表，已用旧版init.sql建库时执行一次：
+--     mysql -u root -p hot_news < upgrade.sql
+-- 已有的热搜记录批次为0，在第一个批次发布前照常可读，发布后由批次清理任务删除
+
+USE hot_news;
+
+-- 热门话题表：抓取批次、稳定话题标识、归一化热度、综合得分和排名
+ALTER TABLE hot_topics
+    ADD COLUMN generation INT NOT NULL DEFAULT 0 AFTER id,
+    ADD COLUMN topic_key BIGINT AFTER generation,
+    ADD COLUMN heat BIGINT AFTER hot_value,
+    ADD COLUMN heat_label VARCHAR(32) AFTER heat,
+    ADD COLUMN score DOUBLE AFTER heat_label,
+    ADD COLUMN global_rank INT AFTER score,
+    ADD INDEX idx_generation_source_rank (generation, source, `rank`),
+    ADD INDEX idx_generation_heat (generation, heat),
+    ADD INDEX idx_generation_global_rank (generation, global_rank),
+    ADD INDEX idx_topic_key (topic_key);
+
+-- 创建抓取批次表
+CREATE TABLE IF NOT EXISTS crawl_generations (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    status ENUM('pending', 'published') NOT NULL DEFAULT 'pending',
+    topic_count INT NOT NULL DEFAULT 0,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    published_at DATETIME
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- 创建话题维表，每个稳定话题一行
+CREATE TABLE IF NOT EXISTS topics (
+    topic_key BIGINT NOT NULL PRIMARY KEY,
+    source ENUM('zhihu', 'weibo') NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    url VARCHAR(512) NOT NULL,
+    first_seen_at DATETIME NOT NULL,
+    last_seen_at DATETIME NOT NULL,
+    INDEX idx_last_seen_at (last_seen_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- 创建话题排名历史表（只追加）
+CREATE TABLE IF NOT EXISTS topic_history (
+    topic_key BIGINT NOT NULL,
+    crawled_at DATETIME NOT NULL,
+    generation INT NOT NULL,
+    source ENUM('zhihu', 'weibo') NOT NULL,
+    `rank` SMALLINT NOT NULL,
+    heat BIGINT,
+    PRIMARY KEY (topic_key, crawled_at),
+    INDEX idx_crawled_at (crawled_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- 创建按小时、按天汇总的话题历史
+CREATE TABLE IF NOT EXISTS topic_history_hourly (
+    topic_key BIGINT NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    source ENUM('zhihu', 'weibo') NOT NULL,
+    best_rank SMALLINT NOT NULL,
+    peak_heat BIGINT,
+    samples INT NOT NULL,
+    on_list_seconds INT NOT NULL,
+    PRIMARY KEY (topic_key, bucket_start),
+    INDEX idx_hourly_bucket_start (bucket_start)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS topic_history_daily (
+    topic_key BIGINT NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    source ENUM('zhihu', 'weibo') NOT NULL,
+    best_rank SMALLINT NOT NULL,
+    peak_heat BIGINT,
+    samples INT NOT NULL,
+    on_list_seconds INT NOT NULL,
+    PRIMARY KEY (topic_key, bucket_start),
+    INDEX idx_daily_bucket_start (bucket_start)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- 创建调度租约表
+CREATE TABLE IF NOT EXISTS scheduler_locks (
+    name VARCHAR(64) NOT NULL PRIMARY KEY,
+    owner VARCHAR(128) NOT NULL,
+    acquired_at DATETIME NOT NULL,
+    expires_at DATETIME NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- 创建热榜页面归档索引
+CREATE TABLE IF NOT EXISTS archived_pages (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    source ENUM('zhihu', 'weibo') NOT NULL,
+    fetched_at DATETIME NOT NULL,
+    digest CHAR(64) NOT NULL,
+    size INT NOT NULL,
+    generation INT,
+    crawled_at DATETIME,
+    INDEX idx_fetched_at (fetched_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- 创建批次变化表
+CREATE TABLE IF NOT EXISTS generation_changes (
+    generation INT NOT NULL PRIMARY KEY,
+    previous_generation INT NOT NULL,
+    changes JSON NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;